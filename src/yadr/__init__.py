@@ -3,5 +3,60 @@ __init__
 ~~~~~~~~
 
 Initialization for the :mod:`yadr` package.
+
+The public API is imported from :mod:`yadr.yadr` the first time it
+is used, so importing a module of the package, like running
+:mod:`yadr` from the command line, doesn't have to import all of it.
+The modules of the package are also imported the first time they are
+used as attributes of the package, like `yadr.operator`.
 """
-from yadr.yadr import add_dice_map, list_dice_maps, roll
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+
+if TYPE_CHECKING:
+    from yadr.yadr import (
+        Roller,
+        add_dice_map,
+        compile,
+        distribution,
+        list_dice_maps,
+        roll,
+        roll_batch,
+        roll_stats,
+        tally,
+        tally_distribution
+    )
+
+
+__all__ = [
+    'Roller',
+    'add_dice_map',
+    'compile',
+    'distribution',
+    'list_dice_maps',
+    'roll',
+    'roll_batch',
+    'roll_stats',
+    'tally',
+    'tally_distribution',
+]
+
+
+def __getattr__(name: str) -> Any:
+    if name in __all__:
+        from yadr import yadr
+        return getattr(yadr, name)
+    if not name.startswith('__'):
+        module = f'{__name__}.{name}'
+        try:
+            return import_module(module)
+        except ModuleNotFoundError as ex:
+            if ex.name != module:
+                raise
+    msg = f'module {__name__!r} has no attribute {name!r}'
+    raise AttributeError(msg)
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *__all__])
@@ -5,10 +5,15 @@ __main__
 Mainline for the CLI interface of the :mod:`yadr` package.
 
 .. autofunction:: yadr.__main__.parse_cli
+.. autofunction:: yadr.__main__.roll_batch_file
+.. autofunction:: yadr.__main__.roll_repeated
 """
-from argparse import ArgumentParser
+import sys
+from argparse import ArgumentParser, Namespace
 
-from yadr.yadr import add_dice_map, list_dice_maps, roll
+from yadr import profiling
+from yadr.maps import add_dice_map, list_dice_maps
+from yadr.model import EXECUTORS
 
 
 def parse_cli() -> None:
@@ -28,7 +33,20 @@ def parse_cli() -> None:
     easiest way to view these options is to invoke the help::
 
         $ yadr -h
+
+    Running `yadr serve` starts a server that rolls :ref:`YADN` sent
+    to it as JSON. See :mod:`yadr.server` for its options.
+
+    Each command only imports the parts of :mod:`yadr` it needs, so
+    listing the dice maps doesn't import the lexer for :ref:`YADN`,
+    and only rolls that use a dice map load the default dice maps.
     """
+    # The server has its own options, so it has its own parser.
+    if sys.argv[1:2] == ['serve']:
+        from yadr.server import main
+        main(sys.argv[2:])
+        return
+
     # Stand up the parser.
     p = ArgumentParser(
         description='Execute YADN syntax to roll dice.',
@@ -55,19 +73,160 @@ def parse_cli() -> None:
         action='store',
         type=str
     )
+    p.add_argument(
+        '--batch', '-b',
+        help='Roll each line of YADN in the given file, or stdin if the '
+             'file is - or not given.',
+        metavar='FILE',
+        nargs='?',
+        const='-',
+        action='store',
+        type=str
+    )
+    p.add_argument(
+        '--repeat', '-r',
+        help='Roll the YADN this many times.',
+        metavar='N',
+        action='store',
+        type=int
+    )
+    p.add_argument(
+        '--stats', '-S',
+        help='Print statistics for the repeated rolls rather than each '
+             'result.',
+        action='store_true'
+    )
+    p.add_argument(
+        '--workers', '-w',
+        help='Roll the rolls of a compound roll, or the lines of a batch, '
+             'with this many workers.',
+        action='store',
+        type=int
+    )
+    p.add_argument(
+        '--executor', '-e',
+        help='Whether the workers are threads or processes. The default '
+             'is processes for the lines of a batch, and threads for '
+             'the rolls of a compound roll.',
+        action='store',
+        choices=EXECUTORS
+    )
+    p.add_argument(
+        '--seed', '-s',
+        help='The seed for the random number generators.',
+        action='store',
+        type=int
+    )
+    p.add_argument(
+        '--profile', '-p',
+        help='Write the time spent in each phase and operator as JSON '
+             'to stderr.',
+        action='store_true'
+    )
 
     # Parse and execute the command.
     args = p.parse_args()
+    if args.stats and not args.repeat:
+        p.error('--stats requires --repeat.')
+    if args.repeat is not None and args.repeat < 1:
+        p.error('--repeat must be at least 1.')
+    if args.profile:
+        profiler = profiling.enable()
     result = 'Use `yadr -h` to view the available options for running yadr.\n'
     dice_map = {}
     if args.add_dice_map:
         dice_map = add_dice_map(args.add_dice_map[0])
     elif args.list_dice_maps:
         result = list_dice_maps()
-    if args.yadn:
-        raw_result = roll(args.yadn, True, dice_map)
-        result = str(raw_result)
-    print(result)
+    failed = False
+    if args.batch:
+        failed = roll_batch_file(args, dice_map)
+    elif args.repeat and args.yadn:
+        roll_repeated(args, dice_map)
+    else:
+        if args.yadn:
+            from yadr.yadr import roll
+
+            raw_result = roll(
+                args.yadn,
+                True,
+                dice_map,
+                args.workers,
+                args.executor or 'thread',
+                args.seed
+            )
+            result = str(raw_result)
+        print(result)
+    if args.profile:
+        profiling.disable()
+        print(profiler.to_json(), file=sys.stderr)
+    if failed:
+        sys.exit(1)
+
+
+def roll_batch_file(args: Namespace, dice_map: dict) -> bool:
+    """Roll each line of a file of YADN, printing each result as it
+    is rolled.
+
+    :param args: The parsed command line options.
+    :param dice_map: The dice maps loaded from the command line.
+    :returns: Whether any of the lines failed.
+    :rtype: bool
+
+    Each result is printed on the line matching the line it was rolled
+    from. A line that can't be rolled prints a blank line, and the
+    error is written to stderr.
+    """
+    from yadr.parallel import roll_lines
+
+    failed = False
+    fh = sys.stdin if args.batch == '-' else open(args.batch)
+    try:
+        lines = (line.rstrip('\n') for line in fh)
+        results = roll_lines(
+            lines,
+            dice_map,
+            args.workers,
+            args.executor or 'process',
+            args.seed
+        )
+        for number, result in enumerate(results, 1):
+            if isinstance(result, Exception):
+                failed = True
+                msg = f'yadr: line {number}: {result}'
+                print(msg, file=sys.stderr)
+                result = ''
+            print(result, flush=True)
+    finally:
+        if fh is not sys.stdin:
+            fh.close()
+    return failed
+
+
+def roll_repeated(args: Namespace, dice_map: dict) -> None:
+    """Roll YADN many times, printing each result or statistics for
+    all of the results.
+
+    :param args: The parsed command line options.
+    :param dice_map: The dice maps loaded from the command line.
+    :returns: `None`.
+    :rtype: NoneType
+
+    The YADN is only lexed and parsed once. Statistics are found with
+    :func:`yadr.roll_stats`, so the rolls aren't rolled one at a time
+    if :mod:`numpy` is installed.
+    """
+    from yadr.yadr import Roller, compile, roll_stats
+
+    if args.stats:
+        summaries = roll_stats(args.yadn, args.repeat, dice_map, args.seed)
+        print('\n\n'.join(summary.report() for summary in summaries))
+        return
+
+    compiled = compile(args.yadn, dice_map)
+    roller = Roller(seed=args.seed)
+    for result in roller.roll_many(compiled, args.repeat, True):
+        print(result)
 
 
 if __name__ == '__main__':
@@ -5,8 +5,10 @@ base
 Base classes for the :mod:`yadr` package.
 """
 from abc import ABC, abstractmethod
-from collections.abc import Callable
-from typing import Optional
+from collections import OrderedDict
+from collections.abc import Callable, Iterator, Sequence
+from threading import Lock
+from typing import Optional, TextIO
 
 from yadr.model import CompoundResult, Result, Token, TokenInfo
 
@@ -14,6 +16,9 @@ from yadr.model import CompoundResult, Result, Token, TokenInfo
 # Types
 ResultMethod = Callable[[str], Result]
 StateMethod = Callable[[str], None]
+RowKey = tuple[Token, int | str | Token]
+Row = dict[str, tuple[bool, Optional[Token], Optional[RowKey]]]
+CacheKey = tuple[type, str]
 
 
 # Utility functions.
@@ -26,6 +31,125 @@ def _mutable(value, type_=list):
     return value
 
 
+# Caches.
+class LexCache:
+    """A least recently used cache of lexed code.
+
+    :param maxsize: (Optional.) The most strings that will be kept in
+        the cache. Setting it to zero turns off the cache. The default
+        is 256.
+    :return: A :class:`yadr.base.LexCache` object.
+    :rtype: yadr.base.LexCache
+
+    Lexing only turns text into tokens, it doesn't roll anything. So,
+    the same text always gives the same tokens, and the tokens from
+    the last time the text was lexed can be returned instead of lexing
+    it again. The cache is shared by every lexer in the process, with
+    the tokens stored by the class of the lexer and the text.
+
+    Usage::
+
+        >>> from yadr.base import lex_cache
+        >>> from yadr.lex import Lexer
+        >>>
+        >>> lex_cache.clear()
+        >>> _ = Lexer().lex('3d6')
+        >>> _ = Lexer().lex('3d6')
+        >>> lex_cache.info()
+        {'hits': 1, 'misses': 1, 'maxsize': 256, 'size': 1}
+    """
+    def __init__(self, maxsize: int = 256) -> None:
+        self._maxsize = maxsize
+        self._tokens: OrderedDict[CacheKey, tuple[TokenInfo, ...]]
+        self._tokens = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    @property
+    def maxsize(self) -> int:
+        """The most strings that will be kept in the cache."""
+        return self._maxsize
+
+    @maxsize.setter
+    def maxsize(self, value: int) -> None:
+        if value < 0:
+            msg = f'Cache size cannot be negative. Was {value}.'
+            raise ValueError(msg)
+        with self._lock:
+            self._maxsize = value
+            self._trim()
+
+    # Public methods.
+    def clear(self) -> None:
+        """Remove everything from the cache and reset the statistics.
+
+        :return: `None`.
+        :rtype: NoneType
+        """
+        with self._lock:
+            self._tokens.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def get(self, key: CacheKey) -> Optional[tuple[TokenInfo, ...]]:
+        """Get the tokens for lexed code.
+
+        :param key: The class of the lexer and the code that was lexed.
+        :return: The tokens as a :class:`tuple`, or `None` if the code
+            isn't in the cache.
+        :rtype: tuple or NoneType
+        """
+        with self._lock:
+            tokens = self._tokens.get(key)
+            if tokens is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._tokens.move_to_end(key)
+            return tokens
+
+    def info(self) -> dict[str, int]:
+        """Get the statistics for the cache.
+
+        :return: The number of hits and misses, the maximum size, and
+            the current size as a :class:`dict`.
+        :rtype: dict
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'maxsize': self._maxsize,
+            'size': len(self._tokens),
+        }
+
+    def put(self, key: CacheKey, tokens: tuple[TokenInfo, ...]) -> None:
+        """Add the tokens for lexed code to the cache.
+
+        :param key: The class of the lexer and the code that was lexed.
+        :param tokens: The tokens lexed from the code.
+        :return: `None`.
+        :rtype: NoneType
+        """
+        with self._lock:
+            self._tokens[key] = tokens
+            self._tokens.move_to_end(key)
+            self._trim()
+
+    # Private methods.
+    def _trim(self) -> None:
+        """Remove the least recently used code over the maximum size."""
+        while len(self._tokens) > self._maxsize:
+            self._tokens.popitem(last=False)
+
+
+# The cache of lexed code used by every lexer.
+lex_cache = LexCache()
+
+
 # Base classes.
 class BaseLexer(ABC):
     """An abstract base class for building lexers.
@@ -115,10 +239,12 @@ class BaseLexer(ABC):
     While specific tokens may require different behavior, in general
     a processing method does two things:
 
-    *   Define a list of states that are allowed to follow the
-        current state within the syntax being lexed.
-    *   Pass that list and the character to :meth:`BaseLexer._check_char`,
-        which handles the actual processing.
+    *   Look up the states that are allowed to follow the current
+        state within the syntax being lexed in
+        :attr:`BaseLexer.follows`.
+    *   Pass those states and the character to
+        :meth:`BaseLexer._check_char`, which handles the actual
+        processing.
 
     The end result of calling a processing method is usually that
     the characters in the string that make up the symbol for the
@@ -312,7 +438,56 @@ class BaseLexer(ABC):
 
     The result map is passed to the `result_map` parameter when the
     :class:`BaseLexer` is initialized.
+
+
+    Follows
+    -------
+    The states that are allowed to follow each state are defined in
+    the :attr:`BaseLexer.follows` class attribute. It is a dictionary.
+    The keys are the states. The values are tuples of the states that
+    can follow that state, in the order they should be checked. For
+    example::
+
+        >>> follows = {
+        >>>     Token.MULDIV: (
+        >>>         Token.NUMBER,
+        >>>         Token.WHITESPACE,
+        >>>     ),
+        >>> }
+
+    A state should only be in :attr:`BaseLexer.follows` if its
+    processing method does nothing more than pass the character and
+    the states in :attr:`BaseLexer.follows` to
+    :meth:`BaseLexer._check_char`. The one exception is that
+    processing methods for `Token.NUMBER` may also add digits to the
+    buffer.
+
+
+    The Transition Table
+    --------------------
+    Calling a processing method for every character is slow, so the
+    first time a :class:`BaseLexer` subclass is initialized, its
+    symbol map and :attr:`BaseLexer.follows` are compiled into a
+    :class:`yadr.base.TransitionTable`. That table is shared by every
+    instance of the subclass. While lexing, the lexer looks each
+    character up in the row of the table for its current state. If
+    the character is there, the row says whether it is added to the
+    buffer or starts a new state, so the processing method doesn't
+    need to be called.
+
+    Characters that aren't in the row, such as the contents of
+    bracket states or characters that cause errors, are sent to the
+    processing method for the current state as described above. This
+    means the processing methods are still the definition of how the
+    lexer behaves. The table is only a faster way to get the same
+    result.
     """
+    # The states that are allowed to follow each state.
+    follows: dict[Token, tuple[Token, ...]] = {}
+
+    # The compiled transition table for the class.
+    _table: 'TransitionTable'
+
     def __init__(
         self, state_map: dict[Token, StateMethod],
         symbol_map: dict[Token, list[str]],
@@ -337,6 +512,13 @@ class BaseLexer(ABC):
         self.process: StateMethod = self._start
         self.buffer = ''
         self.tokens: list[TokenInfo] = []
+        self._sent = 0
+
+        # Compile the transition table the first time the class is
+        # initialized.
+        cls = type(self)
+        if '_table' not in cls.__dict__:
+            cls._table = TransitionTable(self)
 
     # Public methods.
     def lex(self, code: str) -> tuple[TokenInfo, ...]:
@@ -345,33 +527,133 @@ class BaseLexer(ABC):
         :param code: A string of code to tranform into tokens.
         :return: A :class:`tuple` object.
         :rtype: tuple
+
+        If the code has been lexed before, the tokens are returned from
+        :data:`yadr.base.lex_cache` instead.
         """
-        # Process each character in the code.
-        for char in code:
-            self.process(char)
+        key = (type(self), code)
+        tokens = lex_cache.get(key)
+        if tokens is None:
+            tokens = self._lex(code)
+            lex_cache.put(key, tokens)
+        return tokens
+
+    def feed(self, chunk: str) -> tuple[TokenInfo, ...]:
+        """Lex part of the code, returning the tokens that have been
+        completed so far.
+
+        :param chunk: The next part of the code to lex.
+        :return: The tokens completed since the last call as a
+            :class:`tuple`.
+        :rtype: tuple
 
-        # Reset the lexer after processing the string in case the lexer
-        # is reused.
-        else:
-            self._change_state(self.init_state, '')
+        A token isn't complete until the lexer sees the character
+        after it, so the last token in a chunk is usually returned by
+        a later call. Call :meth:`BaseLexer.close` after the last
+        chunk to get the rest of the tokens.
+
+        Usage::
+
+            >>> from yadr.lex import Lexer
+            >>>
+            >>> lexer = Lexer()
+            >>> [value for _, value in lexer.feed('3d')]
+            [3]
+            >>> [value for _, value in lexer.feed('6 + 2')]
+            ['d', 6, '+']
+            >>> [value for _, value in lexer.close()]
+            [2]
+        """
+        # Process each character in the code. If the character is in
+        # the transition table, that says what to do with it.
+        # Otherwise, the processing method for the state handles it.
+        rows = self._table.rows
+        row = self._get_row()
+        for char in chunk:
+            step = row.get(char) if row is not None else None
+            if step is None:
+                self.process(char)
+                row = self._get_row()
+                continue
+            append, new_state, key = step
+            if new_state is not None:
+                self._change_state(new_state, char)
+            elif append:
+                self.buffer += char
+            row = rows.get(key) if key is not None else self._get_row()
+
+        # Only the last token is needed to lex the rest of the code,
+        # so the tokens that have been returned are dropped to keep
+        # memory use down.
+        tokens = tuple(self.tokens[self._sent:])
+        self.tokens = self.tokens[-1:]
+        self._sent = len(self.tokens)
+        return tokens
+
+    def close(self) -> tuple[TokenInfo, ...]:
+        """Finish lexing code given to :meth:`BaseLexer.feed`.
+
+        :return: The tokens that haven't been returned yet as a
+            :class:`tuple`.
+        :rtype: tuple
 
-        # Return the tokens from the code.
-        return tuple(self.tokens)
+        The lexer is reset afterwards, so it can be used to lex other
+        code.
+        """
+        self._change_state(self.init_state, '')
+        tokens = tuple(self.tokens[self._sent:])
+        self.tokens = []
+        self._sent = 0
+        return tokens
+
+    def lex_iter(
+        self,
+        file: TextIO,
+        size: int = 2 ** 16
+    ) -> Iterator[TokenInfo]:
+        """Lex code from a file, yielding each token as soon as it is
+        complete.
+
+        :param file: The file to read the code from.
+        :param size: (Optional.) The number of characters to read from
+            the file at a time.
+        :return: The tokens lexed from the file.
+        :rtype: Iterator
+
+        Only one chunk of the file is in memory at a time, so this can
+        lex files too large to read into memory. The tokens can be
+        passed straight to :meth:`yadr.parser.Parser.parse_iter`.
+        """
+        while chunk := file.read(size):
+            yield from self.feed(chunk)
+        yield from self.close()
 
     # Private operation method.
+    def _lex(self, code: str) -> tuple[TokenInfo, ...]:
+        """Lex code into tokens without using the cache."""
+        return self.feed(code) + self.close()
+
+    def _get_row(self) -> Optional[Row]:
+        """Get the row of the transition table for the current state."""
+        state = self.state
+        if state == Token.WHITESPACE:
+            prev_state = self.init_state
+            if self.tokens:
+                prev_state = self.tokens[-1][0]
+            prev_state = self.bracket_ends.get(prev_state, prev_state)
+            return self._table.rows.get((state, prev_state))
+        key = self._table.key(state, self.buffer)
+        return self._table.rows.get(key)
+
     def _is_token_start(self, token: Token, char: str) -> bool:
         """Is the given character the start of a new token."""
-        valid = {s[0] for s in self.symbol_map[token]}
-        return char in valid
+        return char in self._table.starts[token]
 
     def _is_token_still(self, char: str) -> bool:
         """Is the given character still a part of the current token."""
         index = len(self.buffer)
-        tokens = [t for t in self.symbol_map[self.state] if len(t) > index]
-        if tokens:
-            valid = {s[index] for s in tokens}
-            return char in valid
-        return False
+        stills = self._table.stills[self.state]
+        return index < len(stills) and char in stills[index]
 
     def _cannot_follow(self, char: str) -> None:
         """The character is not allowed by the current state."""
@@ -411,7 +693,7 @@ class BaseLexer(ABC):
         self.state = new_state
         self.process = self.state_map[new_state]
 
-    def _check_char(self, char: str, can_follow: list) -> None:
+    def _check_char(self, char: str, can_follow: Sequence[Token]) -> None:
         """Determine how to process a character."""
         new_state: Optional[Token] = None
 
@@ -476,3 +758,159 @@ class BaseLexer(ABC):
             prev_state = self.bracket_ends[prev_state]
         process = self.state_map[prev_state]
         process(char)
+
+
+class TransitionTable:
+    """The rules of a :class:`yadr.base.BaseLexer` compiled into lookup
+    tables.
+
+    :param lexer: The lexer to compile.
+    :return: A :class:`yadr.base.TransitionTable` object.
+    :rtype: yadr.base.TransitionTable
+
+    The table has three parts:
+
+    *   `starts` maps each state to the characters that can start
+        its symbols.
+    *   `stills` maps each state to a tuple of the characters that
+        can be at each position within its symbols.
+    *   `rows` maps a row key to a row of the table.
+
+    A row is a dictionary that maps each character the lexer knows
+    what to do with in that row to a step. The step is a tuple of:
+
+    *   Whether the character is added to the buffer,
+    *   The new state, or `None` if the state doesn't change,
+    *   The key of the next row.
+
+    Row keys are tuples of the state and:
+
+    *   For `Token.NUMBER`, the buffer if it's just a negative sign
+        or an empty string if it isn't.
+    *   For `Token.WHITESPACE`, the state whose rules apply after
+        the white space.
+    *   For anything else, the length of the buffer up to the length
+        of the longest symbol of the state.
+
+    A next row key of `None` means the next row can't be known ahead
+    of time, so the lexer has to look at its state to find it.
+    """
+    def __init__(self, lexer: 'BaseLexer') -> None:
+        symbol_map = lexer.symbol_map
+        self.starts: dict[Token, frozenset[str]] = {
+            token: frozenset(symbol[0] for symbol in symbols)
+            for token, symbols in symbol_map.items()
+        }
+        self.stills: dict[Token, tuple[frozenset[str], ...]] = {}
+        for token, symbols in symbol_map.items():
+            length = max((len(symbol) for symbol in symbols), default=0)
+            self.stills[token] = tuple(
+                frozenset(s[i] for s in symbols if len(s) > i)
+                for i in range(length)
+            )
+
+        # The initial state can reset the lexer, so it always goes
+        # through its processing method.
+        self.rows: dict[RowKey, Row] = {}
+        states = [
+            state for state in lexer.follows
+            if state != lexer.init_state and state in lexer.state_map
+        ]
+        for state in states:
+            if state == Token.NUMBER:
+                for buffer in ('', '-'):
+                    key = self.key(state, buffer)
+                    self.rows[key] = self._build_row(lexer, state, buffer)
+            else:
+                for length in range(len(self.stills[state]) + 1):
+                    buffer = ' ' * length
+                    key = self.key(state, buffer)
+                    self.rows[key] = self._build_row(lexer, state, buffer)
+            ws_key = (Token.WHITESPACE, state)
+            self.rows[ws_key] = self._build_row(
+                lexer, Token.WHITESPACE, ' ', state
+            )
+
+    def key(self, state: Token, buffer: str) -> RowKey:
+        """Get the key of the row for a state and buffer.
+
+        :param state: The state of the lexer.
+        :param buffer: The buffer of the lexer.
+        :return: The row key as a :class:`tuple`.
+        :rtype: tuple
+
+        .. note::
+            This doesn't handle `Token.WHITESPACE`, since the row
+            for white space depends on the previous token.
+        """
+        if state == Token.NUMBER:
+            return (state, '-' if buffer == '-' else '')
+        length = len(self.stills.get(state, ()))
+        return (state, min(len(buffer), length))
+
+    def _build_row(
+        self, lexer: 'BaseLexer',
+        state: Token,
+        buffer: str,
+        rule: Optional[Token] = None
+    ) -> Row:
+        """Build the row for a state."""
+        if rule is None:
+            rule = state
+        row: Row = {}
+
+        # White space is skipped until something else shows up.
+        if state == Token.WHITESPACE:
+            for char in lexer.symbol_map[Token.WHITESPACE]:
+                row[char] = (False, None, (state, rule))
+
+        # Digits are added to numbers.
+        if state == Token.NUMBER:
+            for char in '0123456789':
+                row[char] = (True, None, self.key(state, char))
+
+        # Characters that are still part of the current symbol are
+        # added to the buffer.
+        index = len(buffer)
+        stills = self.stills[state]
+        if index < len(stills):
+            next_key = self.key(state, buffer + ' ')
+            for char in stills[index]:
+                row.setdefault(char, (True, None, next_key))
+
+        # The first state in the rule's follows that a character
+        # starts is the new state. Characters that would cause an
+        # error are left out of the row, so the processing method
+        # can raise the error.
+        claimed = set(row)
+        for token in lexer.follows[rule]:
+            for char in self.starts.get(token, ()):
+                if char in claimed:
+                    continue
+                claimed.add(char)
+                if state == Token.NUMBER and buffer == '-':
+                    continue
+                new_state = lexer.bracket_states.get(token, token)
+                row[char] = (False, new_state, self._next_key(
+                    lexer, state, new_state, char
+                ))
+        return row
+
+    def _next_key(
+        self, lexer: 'BaseLexer',
+        state: Token,
+        new_state: Token,
+        char: str
+    ) -> Optional[RowKey]:
+        """Get the key of the row after a state change."""
+        if new_state != Token.WHITESPACE:
+            return self.key(new_state, char)
+
+        # The rules for white space come from the last stored token,
+        # so they can only be known if the state being left will be
+        # the last stored token.
+        if state not in lexer.no_store:
+            return (new_state, lexer.bracket_ends.get(state, state))
+        if state in lexer.bracket_ends.values():
+            return (new_state, state)
+        return None
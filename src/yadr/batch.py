@@ -0,0 +1,579 @@
+"""
+batch
+~~~~~
+
+Roll :ref:`YADN` for many trials at once with :mod:`numpy`.
+
+.. note::
+    This module requires :mod:`numpy`, which is an optional dependency
+    of :mod:`yadr`.
+"""
+from collections.abc import Callable
+from math import log2
+from typing import Any, Optional
+
+import numpy as np
+
+from yadr import operator as yo
+from yadr.maps import DenseMap
+from yadr.model import Token, id_tokens
+from yadr.parser import Tree, Unary
+
+
+# Result types for annotation.
+Batch = Any
+Options = tuple[str, str]
+
+# The limits of the integers numpy stores batches in. Results that
+# could pass them are computed as Python integers instead, so they are
+# the same as :func:`yadr.roll` would give.
+INT64_MAX = np.iinfo(np.int64).max
+INT64_DIGITS = 18
+
+
+class BatchPool:
+    """A dice pool for each trial of a batch.
+
+    :param values: The values of the dice as an array with a row for
+        each trial and a column for each die.
+    :param valid: (Optional.) Which of the values are still in the
+        pool for each trial. The default is that all values are in
+        the pool.
+    :return: A :class:`yadr.batch.BatchPool` object.
+    :rtype: yadr.batch.BatchPool
+
+    Operators that remove dice from a pool only mark them as no
+    longer valid, so every trial can keep the same number of columns
+    even when the pools end up being different sizes.
+    """
+    def __init__(
+        self,
+        values: np.ndarray,
+        valid: Optional[np.ndarray] = None
+    ) -> None:
+        if valid is None:
+            valid = np.ones(values.shape, dtype=bool)
+        self.values = values
+        self.valid = valid
+
+    def __repr__(self) -> str:
+        name = self.__class__.__name__
+        return f'{name}(shape={self.values.shape})'
+
+    @property
+    def count(self) -> np.ndarray:
+        """The number of dice in the pool for each trial."""
+        return self.valid.sum(axis=1)
+
+    def masked(self) -> np.ma.MaskedArray:
+        """The pool as a :class:`numpy.ma.MaskedArray` where the dice
+        no longer in the pool are masked.
+        """
+        return np.ma.masked_array(self.values, ~self.valid)
+
+    def keep(self, keep: np.ndarray) -> 'BatchPool':
+        """Keep only the dice that are in the pool and are marked to
+        be kept.
+        """
+        return BatchPool(self.values, self.valid & keep)
+
+    def where(self, values: np.ndarray) -> 'BatchPool':
+        """Replace the values of the dice in the pool."""
+        return BatchPool(values, self.valid)
+
+
+# Registration.
+batch_ops: dict[str, Callable] = {}
+
+
+class batch_operation:
+    """A registration decorator for batch operations.
+
+    :param symbol: The string used to refer to the operation.
+    :return: None.
+    :rtype: NoneType
+    """
+    def __init__(self, symbol: str) -> None:
+        self.symbol = symbol
+
+    def __call__(self, fn: Callable) -> Callable:
+        """Register the operation.
+
+        :param fn: The decorated function. It's sent automatically
+            when :class:`batch.batch_operation` is used as a decorator.
+        :return: The decorated :class:`collections.abc.Callable`.
+        :rtype: Callable
+        """
+        batch_ops[self.symbol] = fn
+        return fn
+
+
+# Execution.
+class BatchRoller:
+    """Execute trees for many trials at once.
+
+    :param trials: The number of trials to roll.
+    :param rng: (Optional.) The :class:`numpy.random.Generator` used to
+        roll the dice. The default is a new generator seeded from the
+        operating system.
+    :return: A :class:`yadr.batch.BatchRoller` object.
+    :rtype: yadr.batch.BatchRoller
+
+    Numbers are arrays with one value for each trial, and pools are
+    :class:`yadr.batch.BatchPool` objects. Values that are the same
+    for every trial, like the numbers written in the :ref:`YADN`, stay
+    as Python objects until they are combined with dice.
+    """
+    def __init__(
+        self,
+        trials: int,
+        rng: Optional[np.random.Generator] = None
+    ) -> None:
+        if rng is None:
+            rng = np.random.default_rng()
+        self.trials = trials
+        self.rng = rng
+
+    # Public methods.
+    def compute(self, tree: Tree) -> Batch:
+        """Execute the tree for each trial.
+
+        :param tree: The tree to execute.
+        :return: The result of each trial as a :class:`numpy.ndarray`,
+            or a :class:`numpy.ma.MaskedArray` if the result is a pool.
+        :rtype: numpy.ndarray
+        """
+        result = self._compute(tree)
+        if isinstance(result, BatchPool):
+            return result.masked()
+        if isinstance(result, np.ndarray) and result.ndim:
+            return result
+        shape: tuple[int, ...] = (self.trials,)
+        if isinstance(result, tuple):
+            shape = (self.trials, len(result))
+        return np.full(shape, result)
+
+    # Private methods.
+    def _compute(self, tree: Tree) -> Batch:
+        """Execute a tree, leaving the results as batch values."""
+        if tree.kind == Token.POOL:
+            values = np.array(tree.value, dtype=np.int64)
+            return BatchPool(np.tile(values, (self.trials, 1)))
+        if tree.kind in id_tokens:
+            return tree.value
+        symbol = str(tree.value)
+
+        # Unary operators only work on pools.
+        if isinstance(tree, Unary):
+            child = self._compute(self._branch(tree.child, symbol))
+            if not isinstance(child, BatchPool):
+                msg = f'Operator {symbol} can only be used on a pool.'
+                raise ValueError(msg)
+            return batch_ops[symbol](child)
+
+        left = self._compute(self._branch(tree.left, symbol))
+        right = self._compute(self._branch(tree.right, symbol))
+        if symbol in batch_ops:
+            return batch_ops[symbol](self, left, right)
+        if symbol == 'm':
+            return _map_result(tree.dice_map[right], left)
+        if isinstance(left, BatchPool) or isinstance(right, BatchPool):
+            msg = f'Operator {symbol} cannot be used on a pool.'
+            raise ValueError(msg)
+        if symbol in ('/', '%') and np.any(np.asarray(right) == 0):
+            raise ZeroDivisionError('integer division or modulo by zero')
+
+        # The remaining operators from the standard library work on
+        # arrays as well as single values.
+        try:
+            op = yo.ops[symbol]
+        except KeyError:
+            msg = f'Operator not recognized: {symbol}.'
+            raise ValueError(msg)
+        return op(*_widen(symbol, left, right))
+
+    def _branch(self, tree: Optional[Tree], symbol: str) -> Tree:
+        """Make sure an operator has the branch it needs."""
+        if tree is None:
+            msg = f'Operator {symbol} is missing an operand.'
+            raise ValueError(msg)
+        return tree
+
+    def _pool(self, num: Batch, size: Batch) -> BatchPool:
+        """Roll a pool of dice for each trial."""
+        num = np.asarray(num)
+        size = np.asarray(size)
+        if np.any(size < 1):
+            raise ValueError('Dice must have at least one side.')
+        columns = max(int(num.max(initial=0)), 0)
+        shape = (self.trials, columns)
+        if size.ndim:
+            size = size[:, np.newaxis]
+        values = self.rng.integers(1, size + 1, size=shape)
+        valid = np.arange(columns) < num[..., np.newaxis]
+        return BatchPool(values, np.broadcast_to(valid, shape))
+
+    def _exploding_pool(self, num: Batch, size: Batch) -> BatchPool:
+        """Roll a pool of exploding dice for each trial.
+
+        The number of times a die explodes follows a geometric
+        distribution, so each die can be rolled at once rather than
+        rolling again for each explosion. Dice stop exploding after
+        :data:`yadr.operator.explode_limit` explosions.
+        """
+        limit = yo.explode_limit.get()
+        size = np.asarray(size)
+        if np.any(size < 1):
+            raise ValueError('Dice must have at least one side.')
+        pool = self._pool(num, np.maximum(size - 1, 1))
+        if size.ndim:
+            size = size[:, np.newaxis]
+
+        # A die with one side always explodes, which is a chance of
+        # zero of stopping.
+        stop = np.where(size > 1, 1 - 1 / size, 0)
+        explosions = np.full(pool.values.shape, limit + 1)
+        stops = stop > 0
+        if np.any(stops):
+            chance = np.where(stops, stop, 1)
+            drawn = self.rng.geometric(chance, explosions.shape)
+            explosions = np.where(stops, drawn - 1, explosions)
+        values = np.where(
+            explosions > limit,
+            (limit + 1) * size,
+            explosions * size + pool.values
+        )
+        return pool.where(values)
+
+
+# Choice operators.
+@batch_operation('?')
+def choice(roller: BatchRoller, boolean: Batch, options: Options) -> Batch:
+    """Make a choice for each trial."""
+    return np.where(boolean, options[0], options[1])
+
+
+@batch_operation(':')
+def choice_options(roller: BatchRoller, a: str, b: str) -> Options:
+    """Create the options for a choice."""
+    return (a, b)
+
+
+# Dice operators.
+@batch_operation('dc')
+def concat(roller: BatchRoller, num: Batch, size: Batch) -> np.ndarray:
+    """Concatenate the least significant digits of dice."""
+    pool = roller._pool(num, size)
+    return pool_concatenate(pool_modulo(roller, pool, 10))
+
+
+@batch_operation('d')
+def die(roller: BatchRoller, num: Batch, size: Batch) -> np.ndarray:
+    """Roll a number of same-sized dice for each trial."""
+    return pool_sum(roller._pool(num, size))
+
+
+@batch_operation('d!')
+def exploding_die(roller: BatchRoller, num: Batch, size: Batch) -> np.ndarray:
+    """Roll a number of exploding dice for each trial."""
+    return pool_sum(roller._exploding_pool(num, size))
+
+
+@batch_operation('dh')
+def keep_high_die(roller: BatchRoller, num: Batch, size: Batch) -> np.ndarray:
+    """Roll a number of dice and keep the highest for each trial."""
+    pool = roller._pool(num, size)
+    _check_empty(pool)
+    return np.where(pool.valid, pool.values, np.iinfo(np.int64).min).max(1)
+
+
+@batch_operation('dl')
+def keep_low_die(roller: BatchRoller, num: Batch, size: Batch) -> np.ndarray:
+    """Roll a number of dice and keep the lowest for each trial."""
+    pool = roller._pool(num, size)
+    _check_empty(pool)
+    return np.where(pool.valid, pool.values, np.iinfo(np.int64).max).min(1)
+
+
+@batch_operation('dw')
+def wild_die(roller: BatchRoller, num: Batch, size: Batch) -> np.ndarray:
+    """Roll a number of dice with one wild die for each trial."""
+    wild = pool_sum(roller._exploding_pool(1, size))
+    regular = pool_sum(roller._pool(np.asarray(num) - 1, size))
+    return np.where(wild == 1, 0, wild + regular)
+
+
+# Pool operators.
+@batch_operation('pc')
+def pool_cap(roller: BatchRoller, pool: BatchPool, cap: Batch) -> BatchPool:
+    """Cap the maximum value in each pool."""
+    return pool.where(np.minimum(pool.values, _column(cap)))
+
+
+@batch_operation('pf')
+def pool_floor(
+    roller: BatchRoller,
+    pool: BatchPool,
+    floor: Batch
+) -> BatchPool:
+    """Floor the minimum value in each pool."""
+    return pool.where(np.maximum(pool.values, _column(floor)))
+
+
+@batch_operation('pa')
+def pool_keep_above(
+    roller: BatchRoller,
+    pool: BatchPool,
+    floor: Batch
+) -> BatchPool:
+    """Discard all values in each pool below a given value."""
+    return pool.keep(pool.values >= _column(floor))
+
+
+@batch_operation('pb')
+def pool_keep_below(
+    roller: BatchRoller,
+    pool: BatchPool,
+    ceiling: Batch
+) -> BatchPool:
+    """Discard all values in each pool above a given value."""
+    return pool.keep(pool.values <= _column(ceiling))
+
+
+@batch_operation('ph')
+def pool_keep_high(
+    roller: BatchRoller,
+    pool: BatchPool,
+    keep: Batch
+) -> BatchPool:
+    """Keep a number of the highest dice in each pool."""
+    return _keep_ranked(pool, pool.values, keep)
+
+
+@batch_operation('pl')
+def pool_keep_low(
+    roller: BatchRoller,
+    pool: BatchPool,
+    keep: Batch
+) -> BatchPool:
+    """Keep a number of the lowest dice in each pool."""
+    return _keep_ranked(pool, -pool.values, keep)
+
+
+@batch_operation('p%')
+def pool_modulo(
+    roller: BatchRoller,
+    pool: BatchPool,
+    divisor: Batch
+) -> BatchPool:
+    """Perform a modulo operation on each member of each pool."""
+    return pool.where(pool.values % _column(divisor))
+
+
+@batch_operation('pr')
+def pool_remove(roller: BatchRoller, pool: BatchPool, cut: Batch) -> BatchPool:
+    """Remove members of each pool of the given value."""
+    return pool.keep(pool.values != _column(cut))
+
+
+# Pool degeneration operators.
+@batch_operation('C')
+def pool_concatenate(pool: BatchPool) -> np.ndarray:
+    """Concatenate the dice in each pool."""
+    _check_empty(pool)
+    if np.any(pool.valid & (pool.values < 0)):
+        raise ValueError('Cannot concatenate negative numbers.')
+    digits = np.ones(pool.values.shape, dtype=np.int64)
+    digits = np.where(
+        pool.values > 0,
+        np.floor(np.log10(np.maximum(pool.values, 1))).astype(np.int64) + 1,
+        digits
+    )
+
+    # Concatenations too long for int64 are joined as text, one trial
+    # at a time.
+    lengths = np.where(pool.valid, digits, 0).sum(axis=1)
+    if lengths.max(initial=0) > INT64_DIGITS:
+        return np.array([
+            int(''.join(str(value) for value in row.compressed()))
+            for row in pool.masked()
+        ], dtype=object)
+
+    result = np.zeros(pool.values.shape[0], dtype=np.int64)
+    for column in range(pool.values.shape[1]):
+        valid = pool.valid[:, column]
+        shifted = result * 10 ** digits[:, column] + pool.values[:, column]
+        result = np.where(valid, shifted, result)
+    return result
+
+
+@batch_operation('N')
+def pool_count(pool: BatchPool) -> np.ndarray:
+    """Count the dice in each pool."""
+    return pool.count
+
+
+@batch_operation('S')
+def pool_sum(pool: BatchPool) -> np.ndarray:
+    """Sum the dice in each pool."""
+    values = pool.values
+    largest = _magnitude(values)
+    if largest is not None and largest * values.shape[1] > INT64_MAX:
+        values = values.astype(object)
+    return np.where(pool.valid, values, 0).sum(axis=1)
+
+
+@batch_operation('ns')
+def count_successes(
+    roller: BatchRoller,
+    pool: BatchPool,
+    target: Batch
+) -> np.ndarray:
+    """Count the number of successes in each pool."""
+    return pool_keep_above(roller, pool, target).count
+
+
+@batch_operation('nb')
+def count_successes_with_botch(
+    roller: BatchRoller,
+    pool: BatchPool,
+    target: Batch
+) -> np.ndarray:
+    """Count the number of successes in each pool, then remove a
+    success for each botch.
+    """
+    botches = (pool.valid & (pool.values == 1)).sum(axis=1)
+    return count_successes(roller, pool, target) - botches
+
+
+# Pool generation operators.
+@batch_operation('g')
+def dice_pool(roller: BatchRoller, num: Batch, size: Batch) -> BatchPool:
+    """Roll a dice pool for each trial."""
+    return roller._pool(num, size)
+
+
+@batch_operation('g!')
+def exploding_pool(roller: BatchRoller, num: Batch, size: Batch) -> BatchPool:
+    """Roll an exploding dice pool for each trial."""
+    return roller._exploding_pool(num, size)
+
+
+# Utility functions.
+def _check_empty(pool: BatchPool) -> None:
+    """Raise an error if any of the pools is empty, like the Python
+    built-ins do for empty sequences.
+    """
+    if np.any(pool.count == 0):
+        raise ValueError('Pool cannot be empty.')
+
+
+def _column(value: Batch) -> Batch:
+    """Make a value for each trial line up with the rows of a pool."""
+    value = np.asarray(value)
+    if value.ndim:
+        return value[:, np.newaxis]
+    return value
+
+
+def _keep_ranked(pool: BatchPool, key: np.ndarray, keep: Batch) -> BatchPool:
+    """Keep a number of the dice with the highest keys in each pool.
+
+    Dice are dropped from the lowest key up. When dice tie, the one
+    earliest in the pool is dropped first, which is the same as
+    :func:`yadr.operator.pool_keep_high`.
+    """
+    if np.any(np.asarray(keep) < 0):
+        raise ValueError('Keep count cannot be negative.')
+    key = np.where(pool.valid, key, np.iinfo(np.int64).max)
+    order = np.argsort(key, axis=1, kind='stable')
+    ranks = np.empty_like(order)
+    rows = np.arange(order.shape[0])[:, np.newaxis]
+    ranks[rows, order] = np.arange(order.shape[1])
+    drop = pool.count - np.asarray(keep)
+    return pool.keep(ranks >= drop[:, np.newaxis])
+
+
+def _magnitude(value: Batch) -> Optional[int]:
+    """Get the largest magnitude of an integer batch value, or `None`
+    if the value isn't stored as integers by numpy.
+    """
+    if isinstance(value, int):
+        return abs(value)
+    array = np.asarray(value)
+    if array.dtype.kind not in 'biu':
+        return None
+    if not array.size:
+        return 0
+    return max(abs(int(array.min())), abs(int(array.max())))
+
+
+def _widen(symbol: str, left: Batch, right: Batch) -> tuple[Batch, Batch]:
+    """Change the operands of an operator to Python integers if the
+    result might not fit in an int64 or needs to be a float.
+    """
+    a = _magnitude(left)
+    b = _magnitude(right)
+    if a is None or b is None:
+        return left, right
+    if symbol in ('+', '-'):
+        fits = a + b <= INT64_MAX
+    elif symbol == '*':
+        fits = a * b <= INT64_MAX
+    elif symbol == '^':
+        # Negative powers are floats, like they are in Python.
+        fits = not np.any(np.asarray(right) < 0)
+        fits = fits and (a < 2 or b * log2(a) < 63)
+    else:
+        fits = a <= INT64_MAX and b <= INT64_MAX
+    if fits:
+        return left, right
+    return _objects(left), _objects(right)
+
+
+def _objects(value: Batch) -> Batch:
+    """Store an array as Python objects."""
+    if isinstance(value, np.ndarray):
+        return value.astype(object)
+    return value
+
+
+def _map_result(dice_map: dict, result: Batch) -> Batch:
+    """Map the results of each trial to a dice map."""
+    if isinstance(dice_map, DenseMap) and dice_map.table is not None:
+        return _gather(dice_map, result)
+    lookup = np.vectorize(dice_map.__getitem__, otypes=[object])
+    if isinstance(result, BatchPool):
+        values = lookup(result.values).astype(str)
+        return np.ma.masked_array(values, ~result.valid)
+    return lookup(result)
+
+
+def _gather(dice_map: DenseMap, result: Batch) -> Batch:
+    """Map the results of each trial with one lookup into the table of
+    a dice map.
+    """
+    is_pool = isinstance(result, BatchPool)
+    table: Optional[tuple[Any, ...]]
+    if isinstance(result, BatchPool):
+        faces = result.values
+        valid = result.valid
+        table = dice_map.str_table
+    else:
+        faces = np.asarray(result)
+        valid = np.ones(faces.shape, dtype=bool)
+        table = dice_map.table
+    assert table is not None
+    lookup = np.array(table + (None,), dtype=object)
+
+    # Faces outside of the table are sent to the None at the end of the
+    # lookup, so they are caught with the faces missing from the map.
+    index = faces - dice_map.base
+    index = np.where(valid & (index >= 0) & (index < len(table)), index, -1)
+    mapped = lookup[index]
+    missing = valid & (mapped == None)  # noqa: E711
+    if missing.any():
+        raise KeyError(faces[missing][0].item())
+    if is_pool:
+        return np.ma.masked_array(mapped.astype(str), ~valid)
+    return np.asarray(mapped, dtype=object)
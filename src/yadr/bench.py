@@ -0,0 +1,562 @@
+"""
+bench
+~~~~~
+
+Benchmarks for the :mod:`yadr` package.
+
+The benchmarks are split into groups:
+
+lex
+    Lexing each of the :data:`yadr.bench.WORKLOADS` without the
+    :data:`yadr.base.lex_cache`.
+parse
+    Parsing and lowering the tokens of each workload.
+operator
+    Calling each operator in :data:`yadr.operator.ops`.
+map-load
+    Parsing the default dice maps.
+encode
+    Encoding results as :ref:`YADN`.
+roll
+    Rolling each workload with :func:`yadr.roll`.
+pool-scaling
+    Keeping the highest and lowest dice of pools of growing sizes.
+startup
+    Importing :mod:`yadr` and running it from the command line in a
+    new interpreter, measured with `-X importtime`.
+
+Each benchmark is reported as the time of one call in seconds, keyed
+by its group and name. The results can be saved as JSON and compared
+against a saved baseline, to see if any benchmark got slower.
+
+.. autofunction:: yadr.bench.main
+.. autofunction:: yadr.bench.compare
+.. autofunction:: yadr.bench.import_times
+.. autofunction:: yadr.bench.load
+.. autofunction:: yadr.bench.pool_scaling
+.. autofunction:: yadr.bench.run
+.. autofunction:: yadr.bench.save
+.. autofunction:: yadr.bench.time_call
+"""
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+from argparse import ArgumentParser
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from importlib.resources import files
+from math import log2
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Optional
+
+import yadr.data
+from yadr import operator as yo
+from yadr.base import lex_cache
+from yadr.encode import Encoder
+from yadr.lex import FastLexer
+from yadr.model import CompoundResult
+from yadr.parser import Parser
+from yadr.yadr import CompiledRoll, overlay_maps, parse_map, read_file, roll
+
+
+# Types.
+Timing = tuple[str, str, float]
+Results = dict[str, float]
+
+
+# The pool sizes used to show how pool operations scale.
+POOL_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+
+# The size of the pools used to time the operators.
+OPERATOR_POOL_SIZE = 1_000
+
+# The ratio of the current time to the baseline time above which a
+# benchmark is reported as a regression.
+THRESHOLD = 1.25
+
+# The shortest time a timed run of a benchmark can take. Quick
+# benchmarks are called as many times as it takes to reach this, so
+# the timer's resolution doesn't swamp them.
+MIN_TIME = 0.02
+
+# Representative strings of YADN for the benchmarks.
+WORKLOADS = {
+    'small': '3d6 + 2',
+    'huge pool': 'S 100000g6',
+    'compound': '; '.join(['3d6 + 2'] * 500),
+    'nested': '(' * 25 + '1d6' + ' + 1)' * 25,
+    'mapped': '3g8m"sweote ability"; 2g8m"sweote difficulty"',
+}
+
+
+# The commands timed by the startup group, as the arguments to a new
+# Python interpreter.
+STARTUP_COMMANDS = {
+    'import': ('-c', 'import yadr'),
+    'roll': ('-m', 'yadr', '3d6'),
+    'mapped roll': ('-m', 'yadr', '3g6m"sweote boost"'),
+    'list maps': ('-m', 'yadr', '-l'),
+}
+
+
+# Timing.
+def import_times(args: Sequence[str]) -> dict[str, float]:
+    """Find how long each module took to import when running a new
+    Python interpreter.
+
+    :param args: The arguments to the interpreter, such as
+        `('-m', 'yadr', '3d6')`.
+    :return: A :class:`dict` of the time in seconds each module took
+        to import, not counting the modules it imported, in the order
+        the imports finished.
+    :rtype: dict
+
+    The times come from the `-X importtime` option of the interpreter.
+    The interpreter is run with the :mod:`yadr` being benchmarked at
+    the front of its path.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(yadr.__file__)))
+    path = os.environ.get('PYTHONPATH')
+    env = dict(os.environ)
+    env['PYTHONPATH'] = root if not path else os.pathsep.join((root, path))
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', *args],
+        capture_output=True,
+        check=True,
+        env=env,
+        text=True
+    )
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        own, _, name = line.removeprefix('import time:').split('|')
+        if own.strip().isdigit():
+            times[name.strip()] = int(own) / 1e6
+    return times
+
+
+def time_call(
+    fn: Callable,
+    *args,
+    repeat: int = 3,
+    number: int = 1
+) -> float:
+    """Time a call to a function.
+
+    :param fn: The function to time.
+    :param args: The arguments to pass to the function.
+    :param repeat: (Optional.) How many times to time the function.
+        The fastest time is used, since slower times are slowed by
+        things other than the function.
+    :param number: (Optional.) How many times to call the function
+        each time it is timed.
+    :return: The time of one call in seconds as a :class:`float`.
+    :rtype: float
+    """
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        for _ in range(number):
+            fn(*args)
+        times.append(perf_counter() - start)
+    return min(times) / number
+
+
+# Benchmarks.
+def pool_scaling(
+    sizes: Sequence[int] = POOL_SIZES,
+    keep: int = 10,
+    repeat: int = 3
+) -> list[tuple[str, int, float, float]]:
+    """Time the keep high and keep low pool operators for pools of
+    different sizes.
+
+    :param sizes: (Optional.) The sizes of the pools to time.
+    :param keep: (Optional.) The number of dice to keep.
+    :param repeat: (Optional.) How many times to time each size.
+    :return: A :class:`list` of the operator, the pool size, the time
+        in seconds, and the time in nanoseconds divided by n log n.
+    :rtype: list
+
+    If the operators scale by n log n, the last value should stay
+    about the same as the size of the pool grows. Since log n is zero
+    for a pool of one die, the pools must have at least two dice.
+    """
+    if any(size < 2 for size in sizes):
+        msg = f'Pool sizes must be at least 2, not {min(sizes)}.'
+        raise ValueError(msg)
+    rng = random.Random(1138)
+    results = []
+    for size in sizes:
+        pool = tuple(rng.randint(1, 10) for _ in range(size))
+        for symbol in ('ph', 'pl'):
+            seconds = time_call(yo.ops[symbol], pool, keep, repeat=repeat)
+            scaled = seconds * 1e9 / (size * log2(size))
+            results.append((symbol, size, seconds, scaled))
+    return results
+
+
+def run(
+    groups: Optional[Iterable[str]] = None,
+    repeat: int = 3,
+    sizes: Sequence[int] = POOL_SIZES
+) -> Results:
+    """Run the benchmarks.
+
+    :param groups: (Optional.) The groups of benchmarks to run. The
+        default is to run all of them.
+    :param repeat: (Optional.) How many times to time each benchmark.
+    :param sizes: (Optional.) The sizes of the pools for the
+        `pool-scaling` group.
+    :return: A :class:`dict` of the time of one call in seconds for
+        each benchmark, keyed by `group/name`.
+    :rtype: dict
+    """
+    if groups is None:
+        groups = GROUP_NAMES
+    unknown = set(groups) - set(GROUP_NAMES)
+    if unknown:
+        msg = f'Unknown benchmark groups: {", ".join(sorted(unknown))}.'
+        raise ValueError(msg)
+
+    results: Results = {}
+    for group in groups:
+        if group == 'pool-scaling':
+            timings = [
+                (group, f'{symbol} {size}', seconds)
+                for symbol, size, seconds, _ in pool_scaling(
+                    sizes,
+                    repeat=repeat
+                )
+            ]
+        else:
+            timings = GROUPS[group](repeat)
+        results.update({f'{g}/{name}': sec for g, name, sec in timings})
+    return results
+
+
+# Benchmark groups.
+def _encoding(repeat: int) -> list[Timing]:
+    """Time encoding results as YADN."""
+    rng = random.Random(1138)
+    pool = tuple(rng.randint(1, 6) for _ in range(OPERATOR_POOL_SIZE))
+    results = {
+        'number': 11,
+        'pool': pool,
+        'mapped': ('++', '•', '', '•+'),
+        'compound': CompoundResult([11] * 500),
+    }
+
+    # Encoders add to the YADN they already have, so each result needs
+    # a new one.
+    def encode(result: Any) -> None:
+        Encoder().encode(result)
+
+    return [
+        ('encode', name, _time(encode, (result,), repeat))
+        for name, result in results.items()
+    ]
+
+
+def _lexing(repeat: int) -> list[Timing]:
+    """Time lexing the workloads without the lex cache."""
+    def lex(yadn: str) -> None:
+        lex_cache.clear()
+        FastLexer().lex(yadn)
+
+    return [
+        ('lex', name, _time(lex, (yadn,), repeat))
+        for name, yadn in WORKLOADS.items()
+    ]
+
+
+def _map_loading(repeat: int) -> list[Timing]:
+    """Time parsing the default dice maps."""
+    yadn = read_file(Path(f'{files(yadr.data)}') / 'dice_maps.yadn')
+    return [('map-load', 'default', _time(parse_map, (yadn,), repeat))]
+
+
+def _operators(repeat: int) -> list[Timing]:
+    """Time each operator."""
+    args = operator_args(OPERATOR_POOL_SIZE)
+    return [
+        ('operator', symbol, _time(yo.ops[symbol], args[symbol], repeat))
+        for symbol in sorted(yo.ops)
+    ]
+
+
+def _parsing(repeat: int) -> list[Timing]:
+    """Time parsing the tokens of each workload into instructions."""
+    maps_ = overlay_maps()
+
+    def parse(yadn: str, tokens: tuple) -> None:
+        parser = Parser()
+        parser.dice_map = maps_
+        CompiledRoll(yadn, parser.build(tokens), maps_)
+
+    return [
+        ('parse', name, _time(parse, (yadn, FastLexer().lex(yadn)), repeat))
+        for name, yadn in WORKLOADS.items()
+    ]
+
+
+def _rolling(repeat: int) -> list[Timing]:
+    """Time rolling each workload."""
+    return [
+        ('roll', name, _time(roll, (yadn,), repeat))
+        for name, yadn in WORKLOADS.items()
+    ]
+
+
+def _startup(repeat: int) -> list[Timing]:
+    """Time importing the modules needed by each startup command."""
+    # Only the modules the interpreter doesn't import just to start
+    # are counted.
+    python = set(import_times(('-c', 'pass')))
+    timings = []
+    for name, args in STARTUP_COMMANDS.items():
+        seconds = min(
+            sum(
+                time for module, time in import_times(args).items()
+                if module not in python
+            )
+            for _ in range(repeat)
+        )
+        timings.append(('startup', name, seconds))
+    return timings
+
+
+# The benchmarks in each group. The pool-scaling group isn't here,
+# since it needs the sizes of the pools.
+GROUPS: dict[str, Callable[[int], list[Timing]]] = {
+    'lex': _lexing,
+    'parse': _parsing,
+    'operator': _operators,
+    'map-load': _map_loading,
+    'encode': _encoding,
+    'roll': _rolling,
+    'startup': _startup,
+}
+GROUP_NAMES = (*GROUPS, 'pool-scaling')
+
+
+# Baselines.
+def compare(
+    results: Mapping[str, float],
+    baseline: Mapping[str, float],
+    threshold: float = THRESHOLD
+) -> list[tuple[str, float, float, float, bool]]:
+    """Compare benchmark results against a baseline.
+
+    :param results: The current results.
+    :param baseline: The baseline results.
+    :param threshold: (Optional.) The ratio of the current time to the
+        baseline time above which a benchmark is a regression.
+    :return: A :class:`list` of the key, baseline time, current time,
+        ratio, and whether it is a regression for each benchmark in
+        both the results and the baseline.
+    :rtype: list
+
+    Usage::
+
+        >>> compare({'roll/small': 3.0}, {'roll/small': 2.0})
+        [('roll/small', 2.0, 3.0, 1.5, True)]
+    """
+    comparison = []
+    for key in results:
+        if key not in baseline:
+            continue
+        ratio = results[key] / baseline[key]
+        row = (key, baseline[key], results[key], ratio, ratio > threshold)
+        comparison.append(row)
+    return comparison
+
+
+def load(path: str | Path) -> Results:
+    """Load results saved by :func:`yadr.bench.save`.
+
+    :param path: The location of the saved results.
+    :return: The results as a :class:`dict`.
+    :rtype: dict
+    """
+    with open(path) as fh:
+        data = json.load(fh)
+    return data['results']
+
+
+def save(results: Mapping[str, float], path: str | Path) -> None:
+    """Save results as JSON to use as a baseline.
+
+    :param results: The results to save.
+    :param path: The location to save the results.
+    :return: None.
+    :rtype: NoneType
+    """
+    with open(path, 'w') as fh:
+        json.dump(_export(results), fh, indent=4)
+        fh.write('\n')
+
+
+# Utility functions.
+def operator_args(size: int) -> dict[str, tuple[Any, ...]]:
+    """Build the arguments each operator is timed with.
+
+    :param size: The number of dice in the pools.
+    :return: A :class:`dict` of the arguments for each operator.
+    :rtype: dict
+    """
+    rng = random.Random(1138)
+    pool = tuple(rng.randint(1, 10) for _ in range(size))
+    args: dict[str, tuple[Any, ...]] = {
+        ':': ('spam', 'eggs'),
+        '?': (True, ('spam', 'eggs')),
+    }
+    for symbol in ('!=', '%', '*', '+', '-', '/', '<', '<=', '==', '>',
+                   '>=', '^'):
+        args[symbol] = (7, 3)
+    for symbol in yo.random_ops:
+        args[symbol] = (size, 10)
+    for symbol in ('nb', 'ns', 'p%', 'pa', 'pb', 'pc', 'pf', 'ph', 'pl',
+                   'pr'):
+        args[symbol] = (pool, 5)
+    for symbol in ('C', 'N', 'S'):
+        args[symbol] = (pool,)
+    return args
+
+
+def _export(results: Mapping[str, float]) -> dict[str, Any]:
+    """Package results with the details of the platform."""
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': dict(results),
+    }
+
+
+def _time(fn: Callable, args: tuple, repeat: int) -> float:
+    """Time a benchmark, calling it enough times to be measured."""
+    number = 1
+    while True:
+        start = perf_counter()
+        for _ in range(number):
+            fn(*args)
+        if perf_counter() - start >= MIN_TIME:
+            break
+        number *= 2
+    return time_call(fn, *args, repeat=repeat, number=number)
+
+
+# Mainline.
+def main() -> None:
+    """Run the benchmarks from the command line.
+
+    :returns: `None`.
+    :rtype: NoneType
+
+    Running the Benchmarks
+    ----------------------
+    The benchmarks can be run from the command line with::
+
+        $ python -m yadr.bench
+
+    To save the results as a baseline, and then compare later results
+    against it::
+
+        $ python -m yadr.bench --save baseline.json
+        $ python -m yadr.bench --compare baseline.json
+
+    When comparing, the exit status is `1` if any benchmark is slower
+    than the baseline by more than the threshold.
+    """
+    p = ArgumentParser(
+        description='Run the benchmarks for yadr.',
+        prog='yadr.bench'
+    )
+    p.add_argument(
+        '--group', '-g',
+        help='The groups of benchmarks to run. The default is all.',
+        nargs='+',
+        action='store',
+        choices=GROUP_NAMES
+    )
+    p.add_argument(
+        '--sizes', '-s',
+        help='The sizes of the pools to time. Each must be at least 2.',
+        nargs='+',
+        action='store',
+        type=int,
+        default=POOL_SIZES
+    )
+    p.add_argument(
+        '--repeat', '-r',
+        help='How many times to time each benchmark.',
+        action='store',
+        type=int,
+        default=3
+    )
+    p.add_argument(
+        '--json', '-j',
+        help='Write the results as JSON.',
+        action='store_true'
+    )
+    p.add_argument(
+        '--save',
+        help='Save the results as a baseline at the given location.',
+        action='store',
+        type=str
+    )
+    p.add_argument(
+        '--compare', '-c',
+        help='Compare the results against the baseline at the given '
+             'location.',
+        action='store',
+        type=str
+    )
+    p.add_argument(
+        '--threshold', '-t',
+        help='The ratio to the baseline time that is a regression.',
+        action='store',
+        type=float,
+        default=THRESHOLD
+    )
+    args = p.parse_args()
+    if any(size < 2 for size in args.sizes):
+        p.error('--sizes must each be at least 2.')
+
+    results = run(args.group, args.repeat, args.sizes)
+    if args.save:
+        save(results, args.save)
+    comparison = []
+    if args.compare:
+        comparison = compare(results, load(args.compare), args.threshold)
+
+    if args.json:
+        data = _export(results)
+        if args.compare:
+            data['comparison'] = {
+                key: {'baseline': base, 'ratio': ratio, 'regression': bad}
+                for key, base, _, ratio, bad in comparison
+            }
+        print(json.dumps(data, indent=4))
+    elif comparison:
+        print(f'{"benchmark":<32}{"baseline":>12}{"seconds":>12}'
+              f'{"ratio":>8}')
+        for key, base, seconds, ratio, bad in comparison:
+            flag = '  slower' if bad else ''
+            print(f'{key:<32}{base:>12.3e}{seconds:>12.3e}'
+                  f'{ratio:>8.2f}{flag}')
+    else:
+        print(f'{"benchmark":<32}{"seconds":>12}')
+        for key, seconds in results.items():
+            print(f'{key:<32}{seconds:>12.3e}')
+
+    if any(bad for *_, bad in comparison):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
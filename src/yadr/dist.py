@@ -0,0 +1,484 @@
+"""
+dist
+~~~~
+
+Exact probability distributions for :ref:`YADN`.
+"""
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from fractions import Fraction
+from math import comb
+from typing import Any, Optional
+
+from yadr import maps
+from yadr import operator as yo
+from yadr.model import DiceMapping, Tally, id_tokens
+from yadr.parser import Tree, Unary
+
+
+# Result types for annotation.
+PMF = dict[Any, Fraction]
+Counts = dict[int, int]
+MappedPool = tuple[int, int, DiceMapping]
+
+
+# Operation types for annotation.
+DiceDist = Callable[[int, int], PMF]
+
+
+# Registration.
+dist_ops: dict[str, DiceDist] = {}
+
+
+class dist_operation:
+    """A registration decorator for the distributions of dice
+    operations.
+
+    :param symbol: The string used to refer to the operation.
+    :return: None.
+    :rtype: NoneType
+    """
+    def __init__(self, symbol: str) -> None:
+        self.symbol = symbol
+
+    def __call__(self, fn: DiceDist) -> DiceDist:
+        """Register the distribution.
+
+        :param fn: The decorated function. It's sent automatically
+            when :class:`dist.dist_operation` is used as a decorator.
+        :return: The decorated :class:`collections.abc.Callable`.
+        :rtype: Callable
+        """
+        dist_ops[self.symbol] = fn
+        return fn
+
+
+# Tree distributions.
+def pmf(tree: Tree) -> PMF:
+    """Find the probability mass function of a tree.
+
+    :param tree: The tree to find the distribution of.
+    :return: A :class:`dict` of each possible result and its
+        probability as a :class:`fractions.Fraction`.
+    :rtype: dict
+
+    Usage::
+
+        >>> from yadr.model import Token
+        >>> from yadr.parser import Tree
+        >>>
+        >>> tree = Tree(
+        ...     Token.DICE_OPERATOR, 'd',
+        ...     Tree(Token.NUMBER, 2),
+        ...     Tree(Token.NUMBER, 2)
+        ... )
+        >>> pmf(tree)
+        {2: Fraction(1, 4), 3: Fraction(1, 2), 4: Fraction(1, 4)}
+    """
+    # Trees without dice always have the same result.
+    if tree.kind in id_tokens or not is_random(tree):
+        return {tree.compute(): Fraction(1)}
+
+    # Unary operators only work on pools, and the distribution of a
+    # pool of dice isn't a distribution of single values.
+    if isinstance(tree, Unary):
+        msg = f'Cannot find the distribution of {tree.value}.'
+        raise ValueError(msg)
+
+    symbol = str(tree.value)
+    if tree.left is None or tree.right is None:
+        msg = f'Operator {symbol} is missing an operand.'
+        raise ValueError(msg)
+    left = pmf(tree.left)
+    right = pmf(tree.right)
+    if symbol in dist_ops:
+        return _mix(dist_ops[symbol], left, right)
+    if symbol in yo.random_ops:
+        msg = f'Cannot find the distribution of {symbol}.'
+        raise ValueError(msg)
+
+    # Operators on values that don't roll dice combine every possible
+    # left value with every possible right value, which is the
+    # convolution of the two distributions.
+    try:
+        op = yo.ops[symbol]
+    except KeyError:
+        if symbol != 'm':
+            msg = f'Operator not recognized: {symbol}.'
+            raise ValueError(msg)
+        op = tree._map_result
+    return _combine(op, left, right)
+
+
+def ordered(dist: PMF) -> PMF:
+    """Sort a distribution by its results, if the results can be
+    sorted.
+
+    :param dist: The distribution to sort.
+    :return: A :class:`dict` object.
+    :rtype: dict
+    """
+    try:
+        return dict(sorted(dist.items()))
+    except TypeError:
+        return dist
+
+
+def is_random(tree: Tree) -> bool:
+    """Determine whether a tree rolls any dice.
+
+    :param tree: The tree to check.
+    :return: A :class:`bool` object.
+    :rtype: bool
+    """
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if node.kind in id_tokens:
+            continue
+        if node.value in yo.random_ops:
+            return True
+        if isinstance(node, Unary):
+            branches: tuple[Optional[Tree], ...] = (node.child,)
+        else:
+            branches = (node.left, node.right)
+        stack.extend(branch for branch in branches if branch is not None)
+    return False
+
+
+# Tally distributions.
+def tally_pmf(trees: Sequence[Tree]) -> PMF:
+    """Find the distribution of the symbols rolled by mapped pools.
+
+    :param trees: The trees of the mapped pools. Each tree must be a
+        pool of dice mapped with a dice map, such as `3g8m"spam"`.
+    :return: A :class:`dict` of each possible tally of the symbols
+        rolled by all of the pools, as returned by
+        :func:`yadr.maps.tally`, and its probability as a
+        :class:`fractions.Fraction`.
+    :rtype: dict
+
+    Usage::
+
+        >>> from yadr.model import Token
+        >>> from yadr.parser import Tree
+        >>>
+        >>> pool = Tree(
+        ...     Token.POOL_GEN_OPERATOR, 'g',
+        ...     Tree(Token.NUMBER, 2),
+        ...     Tree(Token.NUMBER, 2)
+        ... )
+        >>> tree = Tree(
+        ...     Token.MAPPING_OPERATOR, 'm',
+        ...     pool,
+        ...     Tree(Token.QUALIFIER, 'coin'),
+        ...     {'coin': {1: '', 2: '+'}}
+        ... )
+        >>> tally_pmf([tree])[(('+', 1),)]
+        Fraction(1, 2)
+    """
+    return tally_pool(_mapped_pool(tree) for tree in trees)
+
+
+def tally_pool(dice: Iterable[MappedPool]) -> PMF:
+    """Find the distribution of the symbols rolled by mapped pools.
+
+    :param dice: The number of dice, the number of sides of the dice,
+        and the dice map for each pool.
+    :return: A :class:`dict` of each possible tally and its probability
+        as a :class:`fractions.Fraction`.
+    :rtype: dict
+
+    The tally of each face of a dice map is only counted once. The
+    counts of the tallies for each die are then convolved together,
+    so the size of the work depends on the number of different
+    tallies rather than the number of ways the dice can be rolled.
+    """
+    pools = []
+    for num, size, map_ in dice:
+        _check_dice(num, size)
+        if isinstance(map_, maps.DenseMap):
+            face_tallies = map_.tallies
+        else:
+            face_tallies = {face: maps.tally(map_[face]) for face in map_}
+        try:
+            faces = [face_tallies[face] for face in range(1, size + 1)]
+        except KeyError as ex:
+            msg = f'Face {ex} of a d{size} is not in the dice map.'
+            raise ValueError(msg)
+        pools.append((num, size, faces))
+
+    # Each tally is packed into an int with a digit for each symbol,
+    # which is big enough to hold the most of that symbol the dice can
+    # roll. Adding tallies is then adding ints, so the counts can be
+    # convolved like the counts of sums of dice.
+    limits: dict[str, int] = {}
+    for num, _, faces in pools:
+        for face in faces:
+            for symbol, count in face:
+                limits[symbol] = limits.get(symbol, 0) + num * count
+    symbols = sorted(limits)
+    places: dict[str, int] = {}
+    place = 1
+    for symbol in symbols:
+        places[symbol] = place
+        place *= limits[symbol] + 1
+
+    # Finding the counts for each pool before combining the pools
+    # keeps the counts small for most of the convolutions.
+    counts: Counts = {0: 1}
+    total = 1
+    for num, size, faces in pools:
+        die: Counts = {}
+        for face in faces:
+            packed = sum(places[symbol] * count for symbol, count in face)
+            die[packed] = die.get(packed, 0) + 1
+        pool_counts: Counts = {0: 1}
+        for _ in range(num):
+            pool_counts = _convolve(pool_counts, die)
+        counts = _convolve(counts, pool_counts)
+        total *= size ** num
+
+    tallies: dict[Tally, int] = {}
+    for packed, count in counts.items():
+        tally = tuple(
+            (symbol, packed // places[symbol] % (limits[symbol] + 1))
+            for symbol in symbols
+        )
+        tallies[tuple(pair for pair in tally if pair[1])] = count
+    return _normalize(tallies, total)
+
+
+# Dice distributions.
+@dist_operation('dc')
+def concat(num: int, size: int) -> PMF:
+    """The distribution of concatenating the least significant digits
+    of dice.
+
+    :param num: The number of dice to roll.
+    :param size: The highest number that can be rolled on a die.
+    :return: A :class:`dict` object.
+    :rtype: dict
+    """
+    _check_dice(num, size, 1)
+    digit: Counts = {}
+    for face in range(1, size + 1):
+        digit[face % 10] = digit.get(face % 10, 0) + 1
+    counts: Counts = {0: 1}
+    for _ in range(num):
+        counts = _convolve(counts, digit, 10)
+    return _normalize(counts, size ** num)
+
+
+@dist_operation('d')
+def die(num: int, size: int) -> PMF:
+    """The distribution of the sum of a number of dice.
+
+    :param num: The number of dice to roll.
+    :param size: The highest number that can be rolled on a die.
+    :return: A :class:`dict` object.
+    :rtype: dict
+    """
+    _check_dice(num, size)
+    num = max(num, 0)
+    return _normalize(_sum_counts(num, size), size ** num)
+
+
+@dist_operation('d!')
+def exploding_die(num: int, size: int) -> PMF:
+    """The distribution of the sum of a number of exploding dice.
+
+    :param num: The number of dice to roll.
+    :param size: The highest number that can be rolled on a die.
+    :return: A :class:`dict` object.
+    :rtype: dict
+    """
+    _check_dice(num, size)
+    num = max(num, 0)
+    return _normalize(*_explode_counts(num, size))
+
+
+@dist_operation('dh')
+def keep_high_die(num: int, size: int) -> PMF:
+    """The distribution of the highest of a number of dice.
+
+    :param num: The number of dice to roll.
+    :param size: The highest number that can be rolled on a die.
+    :return: A :class:`dict` object.
+    :rtype: dict
+    """
+    _check_dice(num, size, 1)
+    counts = {
+        face: face ** num - (face - 1) ** num
+        for face in range(1, size + 1)
+    }
+    return _normalize(counts, size ** num)
+
+
+@dist_operation('dl')
+def keep_low_die(num: int, size: int) -> PMF:
+    """The distribution of the lowest of a number of dice.
+
+    :param num: The number of dice to roll.
+    :param size: The highest number that can be rolled on a die.
+    :return: A :class:`dict` object.
+    :rtype: dict
+    """
+    _check_dice(num, size, 1)
+    counts = {
+        face: (size - face + 1) ** num - (size - face) ** num
+        for face in range(1, size + 1)
+    }
+    return _normalize(counts, size ** num)
+
+
+@dist_operation('dw')
+def wild_die(num: int, size: int) -> PMF:
+    """The distribution of a number of dice where one of the dice is
+    the wild die.
+
+    :param num: The number of dice to roll.
+    :param size: The highest number that can be rolled on a die.
+    :return: A :class:`dict` object.
+    :rtype: dict
+    """
+    _check_dice(num, size)
+    wild = _normalize(*_explode_counts(1, size))
+    lost = wild.pop(1, Fraction(0))
+    regular = die(max(num - 1, 0), size)
+    result = _combine(yo.ops['+'], wild, regular)
+    result[0] = result.get(0, 0) + lost
+    return result
+
+
+# Utility functions.
+def _check_dice(num: int, size: int, least: int = 0) -> None:
+    """Check the dice can be rolled."""
+    if not isinstance(num, int) or not isinstance(size, int):
+        msg = 'The number and size of dice must be integers.'
+        raise ValueError(msg)
+    if size < 1:
+        msg = f'Dice must have at least one side. Was {size}.'
+        raise ValueError(msg)
+    if num < least:
+        msg = f'Must roll at least {least} dice. Was {num}.'
+        raise ValueError(msg)
+
+
+def _combine(op: Callable, left: PMF, right: PMF) -> PMF:
+    """Combine two independent distributions with an operation."""
+    result: PMF = {}
+    for a, pa in left.items():
+        for b, pb in right.items():
+            value = op(a, b)
+            result[value] = result.get(value, 0) + pa * pb
+    return result
+
+
+def _convolve(counts: Counts, die: Counts, shift: int = 1) -> Counts:
+    """Add a die to the counts, shifting the counts first."""
+    result: Counts = {}
+    for a, ca in counts.items():
+        for b, cb in die.items():
+            value = a * shift + b
+            result[value] = result.get(value, 0) + ca * cb
+    return result
+
+
+def _explode_counts(num: int, size: int) -> tuple[Counts, int]:
+    """Count the ways each sum can be rolled on a number of exploding
+    dice, and the total number of ways.
+
+    The dice stop exploding after :data:`yadr.operator.explode_limit`
+    explosions, the same as when they are rolled.
+    """
+    limit = yo.explode_limit.get()
+
+    # A die that stops before the limit explodes some number of times
+    # and then rolls a face lower than its size. Each number of
+    # explosions is equally likely with each face, so the explosions
+    # and the faces of those dice can be counted separately. Fewer
+    # explosions are more likely, so they are counted more times.
+    explosions = {
+        times: size ** (limit - times)
+        for times in range(limit + 1)
+    }
+    exploded: Counts = {0: 1}
+    counts: Counts = {}
+    stopping = num if size > 1 else 0
+    for stopped in range(stopping + 1):
+        # The rest of the dice reach the limit.
+        capped = num - stopped
+        ways = comb(num, capped)
+        base = capped * (limit + 1) * size
+        faces = _sum_counts(stopped, size - 1)
+        for times, exploded_count in exploded.items():
+            for face, face_count in faces.items():
+                value = base + times * size + face
+                count = ways * exploded_count * face_count
+                counts[value] = counts.get(value, 0) + count
+        exploded = _convolve(exploded, explosions)
+    return counts, size ** ((limit + 1) * num)
+
+
+def _mapped_pool(tree: Tree) -> MappedPool:
+    """Find the dice and dice map of a mapped pool."""
+    pool = tree.left
+    if (
+        tree.value != 'm'
+        or pool is None
+        or pool.value != 'g'
+        or pool.left is None
+        or pool.right is None
+        or tree.right is None
+        or is_random(pool.left)
+        or is_random(pool.right)
+    ):
+        msg = 'Can only tally pools of dice mapped with a dice map.'
+        raise ValueError(msg)
+    num = pool.left.compute()
+    size = pool.right.compute()
+    name = tree.right.compute()
+    if tree.dice_map is None or name not in tree.dice_map:
+        msg = f'No dice map named {name}.'
+        raise ValueError(msg)
+    _check_dice(num, size)
+    return num, size, tree.dice_map[name]
+
+
+def _mix(fn: DiceDist, left: PMF, right: PMF) -> PMF:
+    """Mix the distributions of dice rolled for each possible number
+    and size of dice.
+    """
+    result: PMF = {}
+    for num, pn in left.items():
+        for size, ps in right.items():
+            for value, pv in fn(num, size).items():
+                result[value] = result.get(value, 0) + pn * ps * pv
+    return result
+
+
+def _normalize(counts: Mapping[Any, int], total: int) -> PMF:
+    """Turn counts of outcomes into probabilities."""
+    return {
+        value: Fraction(count, total)
+        for value, count in sorted(counts.items())
+        if count
+    }
+
+
+def _sum_counts(num: int, size: int) -> Counts:
+    """Count the ways each sum can be rolled on a number of dice."""
+    counts = [1]
+    for _ in range(num):
+        # Each new sum is the sum of a window of the previous counts,
+        # so keep a running total rather than adding every face.
+        new = []
+        window = 0
+        for i in range(len(counts) + size - 1):
+            if i < len(counts):
+                window += counts[i]
+            if i >= size:
+                window -= counts[i - size]
+            new.append(window)
+        counts = new
+    return {value + num: count for value, count in enumerate(counts)}
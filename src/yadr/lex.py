@@ -4,16 +4,175 @@ lex
 
 A lexer for `yadr` dice notation.
 """
+import re
+from collections.abc import Callable
 from typing import Optional
 
 from yadr import maps, pools
-from yadr.base import BaseLexer, ResultMethod, StateMethod
-from yadr.model import CompoundResult, Result, Token, TokenInfo, symbols
+from yadr.base import BaseLexer, ResultMethod, StateMethod, lex_cache
+from yadr.model import CompoundResult, Token, TokenInfo, symbols
+
+
+# The characters that start white space and numbers in YADN.
+_whitespace = frozenset(' \t\n')
+_digits = frozenset('0123456789')
 
 
 # Lexers.
 class Lexer(BaseLexer):
     """A state-machine to lex :ref:`YADN` dice notation."""
+    # A pool of integers that can be parsed without the pool lexer.
+    _pool_literal = re.compile(
+        r'\[[ \t\n]*-?[0-9]+[ \t\n]*(?:,[ \t\n]*-?[0-9]+[ \t\n]*)*\]'
+    )
+
+    # The tokens allowed to follow each state.
+    follows: dict[Token, tuple[Token, ...]] = {
+        Token.AS_OPERATOR: (
+            Token.NUMBER,
+            Token.NEGATIVE_SIGN,
+            Token.GROUP_OPEN,
+            Token.U_POOL_DEGEN_OPERATOR,
+            Token.WHITESPACE,
+        ),
+        Token.BOOLEAN: (
+            Token.CHOICE_OPERATOR,
+            Token.WHITESPACE,
+        ),
+        Token.CHOICE_OPERATOR: (
+            Token.QUALIFIER,
+            Token.QUALIFIER_DELIMITER,
+            Token.CHOICE_OPTIONS,
+            Token.WHITESPACE,
+        ),
+        Token.COMPARISON_OPERATOR: (
+            Token.GROUP_OPEN,
+            Token.NEGATIVE_SIGN,
+            Token.NUMBER,
+            Token.U_POOL_DEGEN_OPERATOR,
+            Token.WHITESPACE,
+        ),
+        Token.DICE_OPERATOR: (
+            Token.NUMBER,
+            Token.NEGATIVE_SIGN,
+            Token.GROUP_OPEN,
+            Token.U_POOL_DEGEN_OPERATOR,
+            Token.WHITESPACE,
+        ),
+        Token.EX_OPERATOR: (
+            Token.NUMBER,
+            Token.NEGATIVE_SIGN,
+            Token.GROUP_OPEN,
+            Token.U_POOL_DEGEN_OPERATOR,
+            Token.WHITESPACE,
+        ),
+        Token.GROUP_CLOSE: (
+            Token.AS_OPERATOR,
+            Token.MD_OPERATOR,
+            Token.EX_OPERATOR,
+            Token.DICE_OPERATOR,
+            Token.GROUP_CLOSE,
+            Token.POOL_OPERATOR,
+            Token.POOL_GEN_OPERATOR,
+            Token.ROLL_DELIMITER,
+            Token.WHITESPACE,
+        ),
+        Token.GROUP_OPEN: (
+            Token.GROUP_OPEN,
+            Token.NUMBER,
+            Token.NEGATIVE_SIGN,
+            Token.POOL_OPEN,
+            Token.U_POOL_DEGEN_OPERATOR,
+            Token.WHITESPACE,
+        ),
+        Token.MAPPING_OPERATOR: (
+            Token.QUALIFIER,
+            Token.QUALIFIER_DELIMITER,
+            Token.WHITESPACE,
+        ),
+        Token.MAP_END: (
+            Token.ROLL_DELIMITER,
+            Token.WHITESPACE,
+        ),
+        Token.MD_OPERATOR: (
+            Token.NUMBER,
+            Token.NEGATIVE_SIGN,
+            Token.GROUP_OPEN,
+            Token.U_POOL_DEGEN_OPERATOR,
+            Token.WHITESPACE,
+        ),
+        Token.NUMBER: (
+            Token.AS_OPERATOR,
+            Token.COMPARISON_OPERATOR,
+            Token.DICE_OPERATOR,
+            Token.EX_OPERATOR,
+            Token.GROUP_CLOSE,
+            Token.MAPPING_OPERATOR,
+            Token.MD_OPERATOR,
+            Token.POOL_GEN_OPERATOR,
+            Token.ROLL_DELIMITER,
+            Token.WHITESPACE,
+        ),
+        Token.OPTIONS_OPERATOR: (
+            Token.QUALIFIER_DELIMITER,
+            Token.WHITESPACE,
+        ),
+        Token.POOL_DEGEN_OPERATOR: (
+            Token.NUMBER,
+            Token.NEGATIVE_SIGN,
+            Token.GROUP_OPEN,
+            Token.U_POOL_DEGEN_OPERATOR,
+            Token.WHITESPACE,
+        ),
+        Token.POOL_END: (
+            Token.GROUP_CLOSE,
+            Token.POOL_DEGEN_OPERATOR,
+            Token.POOL_OPERATOR,
+            Token.ROLL_DELIMITER,
+            Token.WHITESPACE,
+        ),
+        Token.POOL_GEN_OPERATOR: (
+            Token.NUMBER,
+            Token.NEGATIVE_SIGN,
+            Token.GROUP_OPEN,
+            Token.U_POOL_DEGEN_OPERATOR,
+            Token.WHITESPACE,
+        ),
+        Token.POOL_OPERATOR: (
+            Token.GROUP_OPEN,
+            Token.NUMBER,
+            Token.NEGATIVE_SIGN,
+            Token.U_POOL_DEGEN_OPERATOR,
+            Token.WHITESPACE,
+        ),
+        Token.QUALIFIER_END: (
+            Token.OPTIONS_OPERATOR,
+            Token.ROLL_DELIMITER,
+            Token.WHITESPACE,
+        ),
+        Token.ROLL_DELIMITER: (
+            Token.MAP_OPEN,
+            Token.NUMBER,
+            Token.NEGATIVE_SIGN,
+            Token.BOOLEAN,
+            Token.GROUP_OPEN,
+            Token.POOL_OPEN,
+            Token.U_POOL_DEGEN_OPERATOR,
+            Token.QUALIFIER_DELIMITER,
+            Token.QUALIFIER,
+            Token.BOOLEAN,
+            Token.WHITESPACE,
+        ),
+        Token.U_POOL_DEGEN_OPERATOR: (
+            Token.GROUP_OPEN,
+            Token.NUMBER,
+            Token.NEGATIVE_SIGN,
+            Token.POOL_OPEN,
+            Token.U_POOL_DEGEN_OPERATOR,
+            Token.WHITESPACE,
+        ),
+    }
+
     def __init__(self) -> None:
         state_map: dict[Token, StateMethod] = {
             Token.START: self._start,
@@ -97,6 +256,12 @@ class Lexer(BaseLexer):
         return int(value)
 
     def _tf_pool(self, value: str) -> tuple[int, ...]:
+        # Most pools are only integers, commas, and white space, so
+        # they can be checked and converted all at once. Anything else
+        # goes through the pool lexer, which raises the right error if
+        # the pool isn't valid.
+        if self._pool_literal.fullmatch(value):
+            return tuple(map(int, value[1:-1].split(',')))
         plexer = pools.Lexer()
         pparser = pools.Parser()
         lexed = plexer.lex(value)
@@ -108,100 +273,39 @@ class Lexer(BaseLexer):
     # Lexing rules.
     def _as_operator(self, char: str) -> None:
         """Processing an operator."""
-        can_follow = [
-            Token.NUMBER,
-            Token.NEGATIVE_SIGN,
-            Token.GROUP_OPEN,
-            Token.U_POOL_DEGEN_OPERATOR,
-            Token.WHITESPACE,
-        ]
-        self._check_char(char, can_follow)
+        self._check_char(char, self.follows[Token.AS_OPERATOR])
 
     def _boolean(self, char: str) -> None:
         """Processing a boolean."""
-        can_follow = [
-            Token.CHOICE_OPERATOR,
-            Token.WHITESPACE,
-        ]
-        self._check_char(char, can_follow)
+        self._check_char(char, self.follows[Token.BOOLEAN])
 
     def _choice_operator(self, char: str) -> None:
         """Processing a choice operator."""
-        can_follow = [
-            Token.QUALIFIER,
-            Token.QUALIFIER_DELIMITER,
-            Token.CHOICE_OPTIONS,
-            Token.WHITESPACE,
-        ]
-        self._check_char(char, can_follow)
+        self._check_char(char, self.follows[Token.CHOICE_OPERATOR])
 
     def _comparison_operator(self, char: str) -> None:
         """Processing a comparison operator."""
-        can_follow = [
-            Token.GROUP_OPEN,
-            Token.NEGATIVE_SIGN,
-            Token.NUMBER,
-            Token.U_POOL_DEGEN_OPERATOR,
-            Token.WHITESPACE,
-        ]
-        self._check_char(char, can_follow)
+        self._check_char(char, self.follows[Token.COMPARISON_OPERATOR])
 
     def _dice_operator(self, char: str) -> None:
         """Processing an operator."""
-        can_follow = [
-            Token.NUMBER,
-            Token.NEGATIVE_SIGN,
-            Token.GROUP_OPEN,
-            Token.U_POOL_DEGEN_OPERATOR,
-            Token.WHITESPACE,
-        ]
-        self._check_char(char, can_follow)
+        self._check_char(char, self.follows[Token.DICE_OPERATOR])
 
     def _ex_operator(self, char: str) -> None:
         """Processing an operator."""
-        can_follow = [
-            Token.NUMBER,
-            Token.NEGATIVE_SIGN,
-            Token.GROUP_OPEN,
-            Token.U_POOL_DEGEN_OPERATOR,
-            Token.WHITESPACE,
-        ]
-        self._check_char(char, can_follow)
+        self._check_char(char, self.follows[Token.EX_OPERATOR])
 
     def _group_close(self, char: str) -> None:
         """Processing a close group token."""
-        can_follow = [
-            Token.AS_OPERATOR,
-            Token.MD_OPERATOR,
-            Token.EX_OPERATOR,
-            Token.DICE_OPERATOR,
-            Token.GROUP_CLOSE,
-            Token.POOL_OPERATOR,
-            Token.POOL_GEN_OPERATOR,
-            Token.ROLL_DELIMITER,
-            Token.WHITESPACE,
-        ]
-        self._check_char(char, can_follow)
+        self._check_char(char, self.follows[Token.GROUP_CLOSE])
 
     def _group_open(self, char: str) -> None:
         """Processing an open group token."""
-        can_follow = [
-            Token.GROUP_OPEN,
-            Token.NUMBER,
-            Token.NEGATIVE_SIGN,
-            Token.POOL_OPEN,
-            Token.U_POOL_DEGEN_OPERATOR,
-            Token.WHITESPACE,
-        ]
-        self._check_char(char, can_follow)
+        self._check_char(char, self.follows[Token.GROUP_OPEN])
 
     def _map_end(self, char: str) -> None:
         """Processing a choice operator."""
-        can_follow = [
-            Token.ROLL_DELIMITER,
-            Token.WHITESPACE,
-        ]
-        self._check_char(char, can_follow)
+        self._check_char(char, self.follows[Token.MAP_END])
 
     def _map(self, char: str) -> None:
         """Processing a choice operator."""
@@ -211,38 +315,15 @@ class Lexer(BaseLexer):
             self._change_state(new_state, char)
 
     def _mapping_operator(self, char: str) -> None:
-        can_follow = [
-            Token.QUALIFIER,
-            Token.QUALIFIER_DELIMITER,
-            Token.WHITESPACE,
-        ]
-        self._check_char(char, can_follow)
+        self._check_char(char, self.follows[Token.MAPPING_OPERATOR])
 
     def _md_operator(self, char: str) -> None:
         """Processing an operator."""
-        can_follow = [
-            Token.NUMBER,
-            Token.NEGATIVE_SIGN,
-            Token.GROUP_OPEN,
-            Token.U_POOL_DEGEN_OPERATOR,
-            Token.WHITESPACE,
-        ]
-        self._check_char(char, can_follow)
+        self._check_char(char, self.follows[Token.MD_OPERATOR])
 
     def _number(self, char: str) -> None:
         """Processing a number."""
-        can_follow = [
-            Token.AS_OPERATOR,
-            Token.COMPARISON_OPERATOR,
-            Token.DICE_OPERATOR,
-            Token.EX_OPERATOR,
-            Token.GROUP_CLOSE,
-            Token.MAPPING_OPERATOR,
-            Token.MD_OPERATOR,
-            Token.POOL_GEN_OPERATOR,
-            Token.ROLL_DELIMITER,
-            Token.WHITESPACE,
-        ]
+        can_follow = self.follows[Token.NUMBER]
 
         # Check here if the character is a digit because the checks in
         # Char are currently limited to tokens that no longer than two
@@ -256,11 +337,7 @@ class Lexer(BaseLexer):
 
     def _options_operator(self, char: str) -> None:
         """Processing an options operator."""
-        can_follow = [
-            Token.QUALIFIER_DELIMITER,
-            Token.WHITESPACE,
-        ]
-        self._check_char(char, can_follow)
+        self._check_char(char, self.follows[Token.OPTIONS_OPERATOR])
 
     def _pool(self, char: str) -> None:
         """Processing a pool."""
@@ -271,25 +348,11 @@ class Lexer(BaseLexer):
 
     def _pool_end(self, char: str) -> None:
         """Processing after a pool."""
-        can_follow = [
-            Token.GROUP_CLOSE,
-            Token.POOL_DEGEN_OPERATOR,
-            Token.POOL_OPERATOR,
-            Token.ROLL_DELIMITER,
-            Token.WHITESPACE,
-        ]
-        self._check_char(char, can_follow)
+        self._check_char(char, self.follows[Token.POOL_END])
 
     def _pool_gen_operator(self, char: str) -> None:
         """Processing an pool generation operator."""
-        can_follow = [
-            Token.NUMBER,
-            Token.NEGATIVE_SIGN,
-            Token.GROUP_OPEN,
-            Token.U_POOL_DEGEN_OPERATOR,
-            Token.WHITESPACE,
-        ]
-        self._check_char(char, can_follow)
+        self._check_char(char, self.follows[Token.POOL_GEN_OPERATOR])
 
     def _qualifier(self, char: str) -> None:
         """Processing a qualifier."""
@@ -300,51 +363,19 @@ class Lexer(BaseLexer):
 
     def _qualifier_end(self, char: str) -> None:
         """Process after a qualifier."""
-        can_follow = [
-            Token.OPTIONS_OPERATOR,
-            Token.ROLL_DELIMITER,
-            Token.WHITESPACE,
-        ]
-        self._check_char(char, can_follow)
+        self._check_char(char, self.follows[Token.QUALIFIER_END])
 
     def _pool_degen_operator(self, char: str) -> None:
         """Processing a pool degeneration operator."""
-        can_follow = [
-            Token.NUMBER,
-            Token.NEGATIVE_SIGN,
-            Token.GROUP_OPEN,
-            Token.U_POOL_DEGEN_OPERATOR,
-            Token.WHITESPACE,
-        ]
-        self._check_char(char, can_follow)
+        self._check_char(char, self.follows[Token.POOL_DEGEN_OPERATOR])
 
     def _pool_operator(self, char: str) -> None:
         """Lex pool operators."""
-        can_follow = [
-            Token.GROUP_OPEN,
-            Token.NUMBER,
-            Token.NEGATIVE_SIGN,
-            Token.U_POOL_DEGEN_OPERATOR,
-            Token.WHITESPACE,
-        ]
-        self._check_char(char, can_follow)
+        self._check_char(char, self.follows[Token.POOL_OPERATOR])
 
     def _roll_delimiter(self, char: str) -> None:
         """Lex roll delimiters."""
-        can_follow = [
-            Token.MAP_OPEN,
-            Token.NUMBER,
-            Token.NEGATIVE_SIGN,
-            Token.BOOLEAN,
-            Token.GROUP_OPEN,
-            Token.POOL_OPEN,
-            Token.U_POOL_DEGEN_OPERATOR,
-            Token.QUALIFIER_DELIMITER,
-            Token.QUALIFIER,
-            Token.BOOLEAN,
-            Token.WHITESPACE,
-        ]
-        self._check_char(char, can_follow)
+        self._check_char(char, self.follows[Token.ROLL_DELIMITER])
 
     def _start(self, char: str) -> None:
         """The starting state."""
@@ -354,12 +385,249 @@ class Lexer(BaseLexer):
 
     def _u_pool_degen_operator(self, char: str) -> None:
         """Processing a unary pool degeneration operator."""
-        can_follow = [
-            Token.GROUP_OPEN,
+        self._check_char(char, self.follows[Token.U_POOL_DEGEN_OPERATOR])
+
+
+class FastLexer:
+    """A lexer for :ref:`YADN` dice notation that scans with a
+    regular expression.
+
+    :return: A :class:`yadr.lex.FastLexer` object.
+    :rtype: yadr.lex.FastLexer
+
+    :class:`yadr.lex.Lexer` looks at every character in the string.
+    :class:`yadr.lex.FastLexer` instead uses one precompiled regular
+    expression to find each symbol in the string, then uses the
+    transition table of :class:`yadr.lex.Lexer` to check that the
+    symbol is allowed to follow the previous one. This means Python
+    only has to do work for each symbol rather than each character.
+    The text of dice maps is still lexed by :class:`yadr.maps.Lexer`,
+    so dice maps don't lex much faster than with
+    :class:`yadr.lex.Lexer`.
+
+    The tokens returned are the same as :class:`yadr.lex.Lexer`. If
+    the string can't be scanned, usually because it isn't valid
+    :ref:`YADN`, it is sent to :class:`yadr.lex.Lexer` to produce the
+    tokens or raise the error.
+    """
+    # The states for bracketed text and the token that closes them.
+    brackets: dict[Token, Token] = {
+        Token.MAP: Token.MAP_CLOSE,
+        Token.POOL: Token.POOL_CLOSE,
+        Token.QUALIFIER: Token.QUALIFIER_DELIMITER,
+    }
+
+    # The compiled regular expression and steps for the class.
+    _pattern: re.Pattern
+    _start: dict[str, list]
+
+    def __init__(self) -> None:
+        # The rules of the lexer are only needed to build the pattern
+        # and steps, which are built once for the class.
+        cls = type(self)
+        if '_pattern' not in cls.__dict__:
+            lexer = Lexer()
+            cls._pattern, groups = self._compile_pattern(lexer)
+            cls._start = self._compile_steps(lexer, groups)
+
+    # Public methods.
+    def lex(self, code: str) -> tuple[TokenInfo, ...]:
+        """Lex code into tokens for parsing.
+
+        :param code: A string of code to tranform into tokens.
+        :return: A :class:`tuple` object.
+        :rtype: tuple
+
+        The tokens are the same as :class:`yadr.lex.Lexer` returns, so
+        they are stored in :data:`yadr.base.lex_cache` as if they had
+        been lexed by it.
+        """
+        key = (Lexer, code)
+        tokens = lex_cache.get(key)
+        if tokens is None:
+            tokens = self._scan(code)
+            if tokens is None:
+                lexer = Lexer()
+                tokens = lexer._lex(code)
+            lex_cache.put(key, tokens)
+        return tokens
+
+    # Private methods.
+    def _compile_pattern(
+        self,
+        lexer: Lexer
+    ) -> tuple[re.Pattern, dict[str, str]]:
+        """Build the regular expression from the rules of the lexer.
+        It returns the expression and the group each character that
+        starts a symbol belongs to.
+
+        No character starts symbols in more than one group, so the
+        group of a symbol is known from its first character. That lets
+        the expression be used without capturing groups.
+        """
+        table = lexer._table
+        whitespace = table.starts[Token.WHITESPACE]
+        parts = [f'[{_chars(whitespace)}]\\s*', '[0-9]+']
+        groups = {char: Token.WHITESPACE.name for char in whitespace}
+        groups.update({char: Token.NUMBER.name for char in '0123456789'})
+
+        # Bracketed text runs from the opening symbol to the closing
+        # symbol.
+        for opener, state in lexer.bracket_states.items():
+            if state not in self.brackets:
+                continue
+            starts = table.starts[opener]
+            close = _chars(table.starts[self.brackets[state]])
+            parts.append(f'[{_chars(starts)}][^{close}]*[{close}]')
+            groups.update({char: state.name for char in starts})
+
+        # Other symbols keep going while the next character could
+        # still be part of the symbol.
+        followers = {t for follows in lexer.follows.values() for t in follows}
+        for token in sorted(followers, key=lambda t: t.value):
+            starts = table.starts[token] - set(groups)
+            if not starts:
+                continue
+            pattern = ''
+            for chars in reversed(table.stills[token][1:]):
+                pattern = f'(?:[{_chars(chars)}]{pattern})?'
+            parts.append(f'[{_chars(starts)}]{pattern}')
+            groups.update({char: token.name for char in starts})
+        return re.compile('|'.join(parts)), groups
+
+    def _compile_steps(
+        self,
+        lexer: Lexer,
+        groups: dict[str, str]
+    ) -> dict[str, list]:
+        """Build the steps for each symbol from the transition table
+        of the lexer. It returns the steps for the start of the string.
+
+        The steps are stored by the first character of the symbol.
+        Each step is a :class:`list` of:
+
+        *   The state of the token,
+        *   Whether the token is stored,
+        *   The transformation for the value of the token or `None`,
+        *   The steps for the symbol after the token.
+
+        The steps for a negative sign have a state of `None`, since
+        they only mark that the next symbol must be a number. White
+        space has no steps, since it only separates symbols.
+        """
+        rows = lexer._table.rows
+        steps: dict[Token, dict[str, list]] = {}
+        for rule in lexer.follows:
+            row = rows.get((Token.WHITESPACE, rule), {})
+            steps[rule] = {}
+            for char, (_, state, _) in row.items():
+                group = groups.get(char)
+                if state is None or group == Token.WHITESPACE.name:
+                    continue
+                if state == Token.NUMBER and char == '-':
+                    state = None
+                elif state.name != group:
+                    continue
+                steps[rule][char] = [
+                    state,
+                    state not in lexer.no_store,
+                    _transform(lexer, state),
+                    lexer.bracket_ends.get(state, state),
+                ]
+
+        # Link each step to the steps that follow it. The number after
+        # a negative sign is checked as if it started with the sign.
+        number = [
             Token.NUMBER,
-            Token.NEGATIVE_SIGN,
-            Token.POOL_OPEN,
-            Token.U_POOL_DEGEN_OPERATOR,
-            Token.WHITESPACE,
+            Token.NUMBER not in lexer.no_store,
+            _transform(lexer, Token.NUMBER),
+            steps.get(Token.NUMBER, {}),
         ]
-        self._check_char(char, can_follow)
+        for rule_steps in steps.values():
+            for step in rule_steps.values():
+                if step[0] is None:
+                    step[3] = {'-': number}
+                else:
+                    step[3] = steps.get(step[3], {})
+
+        # The start state of the lexer uses the rules for a roll
+        # delimiter.
+        return steps[Token.ROLL_DELIMITER]
+
+    def _scan(self, code: str) -> Optional[tuple[TokenInfo, ...]]:
+        """Scan the code for tokens, returning `None` if the code
+        can't be scanned.
+        """
+        # Finding every symbol at once keeps the scan in C. The symbols
+        # found can only add up to the code if nothing was skipped.
+        symbols = self._pattern.findall(code)
+        if sum(map(len, symbols)) != len(code):
+            return None
+
+        whitespace = _whitespace
+        digits = _digits
+        tokens: list[TokenInfo] = []
+        append = tokens.append
+        steps = self._start
+        negative = False
+        for text in symbols:
+            first = text[0]
+
+            # White space only separates tokens, but it can't come
+            # between a negative sign and its number.
+            if first in whitespace:
+                if negative:
+                    return None
+                continue
+
+            # Negative signs are part of the following number.
+            if negative:
+                if first not in digits:
+                    return None
+                text = f'-{text}'
+                first = '-'
+                negative = False
+
+            # Check the symbol can follow the previous token.
+            step = steps.get(first)
+            if step is None:
+                return None
+            state, store, transform, steps = step
+            if state is None:
+                negative = True
+                continue
+
+            # Store the token.
+            if store:
+                if transform is None:
+                    append((state, text))
+                    continue
+                try:
+                    append((state, transform(text)))
+                except Exception:
+                    return None
+
+        if negative:
+            return None
+        return tuple(tokens)
+
+
+# Utility functions.
+def _transform(
+    lexer: Lexer,
+    state: Optional[Token]
+) -> Optional[Callable]:
+    """Get the transformation for the value of a token. Numbers are
+    turned into integers with :class:`int` directly, since that's all
+    the lexer's transformation does.
+    """
+    if state is None:
+        return None
+    if state == Token.NUMBER:
+        return int
+    return lexer.result_map.get(state)
+
+
+def _chars(chars: frozenset[str] | set[str]) -> str:
+    """Escape characters for use in a regular expression set."""
+    return ''.join(re.escape(char) for char in sorted(chars))
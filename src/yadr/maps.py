@@ -3,16 +3,306 @@ maps
 ~~~~
 
 A module for handling :ref:`YADN` dice maps.
+
+Dice maps are parsed into :class:`yadr.maps.DenseMap` objects. These
+are :class:`dict` objects that also keep a table of their values
+indexed by face, so a whole pool can be mapped with one lookup into
+the table rather than a lookup and conversion for each die.
+
+Dice maps for narrative dice map faces to strings of symbols. Rather
+than parsing those strings again, :func:`yadr.maps.tally` counts the
+symbols in mapped results.
+
+The default dice maps are also loaded here, rather than in
+:mod:`yadr.yadr`, so listing them doesn't need to import the lexer and
+parser for :ref:`YADN`. They are only read from their file the first
+time a dice map is looked up.
 """
-from typing import Callable, Optional
+import os
+from collections import ChainMap, Counter
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from functools import wraps
+from itertools import repeat
+from operator import sub
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Optional
 
+import yadr.data
 from yadr.base import BaseLexer, _mutable
-from yadr.model import NamedMap, Result, Token, TokenInfo, symbols
+from yadr.model import (
+    DiceMapping,
+    NamedMap,
+    Result,
+    Tally,
+    Token,
+    TokenInfo,
+    symbols
+)
+from yadr.profiling import phase
+
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+# The largest span of faces a dice map can cover and still be given a
+# table. Maps with keys further apart than this are only looked up as
+# a dict, so a sparse map can't be used to allocate a huge table.
+MAX_TABLE_SPAN = 2 ** 16
+
+
+# Dice maps.
+def _rebuilds(method: Callable) -> Callable:
+    """Rebuild the tables of a :class:`DenseMap` after it changes, or
+    refuse to change it if it's frozen.
+    """
+    @wraps(method)
+    def wrapper(self: 'DenseMap', *args: Any, **kwargs: Any) -> Any:
+        if self._frozen:
+            name = type(self).__name__
+            raise TypeError(f'This {name} is frozen and cannot be changed.')
+        result = method(self, *args, **kwargs)
+        self._build()
+        return result
+    return wrapper
+
+
+class DenseMap(dict):
+    """A dice map with its values also stored in a table indexed by
+    face.
+
+    :param args: The same arguments as :class:`dict`.
+    :return: None.
+    :rtype: NoneType
+
+    Usage::
+
+        >>> map_ = DenseMap({1: '-', 2: '', 3: '+'})
+        >>> map_[3]
+        '+'
+        >>> map_.gather((3, 1, 3))
+        ('+', '-', '+')
+
+    A map that is shared, like the default dice maps, can be frozen
+    with :meth:`DenseMap.freeze` so it can't be changed. Copies of a
+    frozen map aren't frozen.
+    """
+    __slots__ = ('_base', '_table', '_str_table', '_tallies', '_frozen')
+
+    _tallies: Optional[dict[int, Tally]]
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        self._frozen = False
+        super().__init__(*args, **kwargs)
+        self._build()
+
+    def __reduce__(self) -> tuple[type, tuple[dict]]:
+        return (type(self), (dict(self),))
+
+    __delitem__ = _rebuilds(dict.__delitem__)
+    __ior__ = _rebuilds(dict.__ior__)
+    __setitem__ = _rebuilds(dict.__setitem__)
+    clear = _rebuilds(dict.clear)
+    pop = _rebuilds(dict.pop)
+    popitem = _rebuilds(dict.popitem)
+    setdefault = _rebuilds(dict.setdefault)
+    update = _rebuilds(dict.update)
+
+    @property
+    def base(self) -> int:
+        """The face at the start of the tables."""
+        return self._base
+
+    @property
+    def table(self) -> Optional[tuple[int | str | None, ...]]:
+        """The values of the map indexed by face minus
+        :attr:`DenseMap.base`. Faces that aren't in the map are `None`.
+        This is `None` if the keys of the map are too far apart to
+        fit in a table.
+        """
+        return self._table
+
+    @property
+    def str_table(self) -> Optional[tuple[str | None, ...]]:
+        """The same as :attr:`DenseMap.table`, but with the values
+        converted to :class:`str`.
+        """
+        return self._str_table
+
+    @property
+    def frozen(self) -> bool:
+        """Whether the map can no longer be changed."""
+        return self._frozen
+
+    @property
+    def tallies(self) -> dict[int, Tally]:
+        """The :func:`yadr.maps.tally` of the value of each face. They
+        are only counted the first time they are needed.
+        """
+        if self._tallies is None:
+            self._tallies = {
+                face: tally(value) for face, value in self.items()
+            }
+        return self._tallies
+
+    def freeze(self) -> 'DenseMap':
+        """Stop the map from being changed.
+
+        :return: The map as a :class:`yadr.maps.DenseMap`.
+        :rtype: yadr.maps.DenseMap
+        """
+        self._frozen = True
+        return self
+
+    def gather(self, pool: Iterable[int]) -> tuple[str, ...]:
+        """Map each member of a pool.
+
+        :param pool: The pool to map.
+        :return: The mapped values as a :class:`tuple` of :class:`str`.
+        :rtype: tuple
+        :raises KeyError: If a member of the pool isn't in the map.
+        """
+        if self._str_table is None:
+            return tuple(str(self[member]) for member in pool)
+
+        # Negative indices would wrap around to the end of the table,
+        # so any members below the start of the table are missing.
+        members = pool if isinstance(pool, tuple) else tuple(pool)
+        if self._base:
+            members = tuple(map(sub, members, repeat(self._base)))
+        result: tuple[str | None, ...]
+        try:
+            if members and min(members) < 0:
+                raise IndexError
+            result = tuple(map(self._str_table.__getitem__, members))
+        except IndexError:
+            result = (None,)
+        if None in result:
+            raise KeyError(next(m for m in pool if m not in self))
+        return result  # type: ignore[return-value]
+
+    def _build(self) -> None:
+        """Build the tables of the map."""
+        self._tallies = None
+
+        # Tables start at zero unless the map has negative keys, so
+        # mapping the usual dice doesn't need to shift the faces.
+        self._base = min(min(self, default=0), 0)
+        span = max(self, default=-1) - self._base + 1
+        if span > MAX_TABLE_SPAN:
+            self._table = self._str_table = None
+            return
+
+        table: list[int | str | None] = [None] * span
+        str_table: list[str | None] = [None] * span
+        for key, value in self.items():
+            table[key - self._base] = value
+            str_table[key - self._base] = str(value)
+        self._table = tuple(table)
+        self._str_table = tuple(str_table)
+
+
+def map_values(
+    map_: DiceMapping,
+    result: int | tuple[int, ...]
+) -> str | int | tuple[str, ...]:
+    """Map a roll result to a dice map.
+
+    :param map_: The dice map.
+    :param result: The roll result to map.
+    :return: The mapped value for a number, or a :class:`tuple` of
+        :class:`str` for a pool.
+    :rtype: str, int, or tuple
+    """
+    if isinstance(result, int):
+        return map_[result]
+    if isinstance(map_, DenseMap):
+        return map_.gather(result)
+    new_result = [map_values(map_, n) for n in result]
+    return tuple(str(item) for item in new_result)
+
+
+def tally(mapped: Any) -> Tally:
+    """Count the symbols in a mapped result.
+
+    :param mapped: The mapped result. This can be a :class:`str`, or
+        any nesting of :class:`tuple` objects containing them, such as
+        a mapped pool or the results of a compound roll.
+    :return: Each symbol and the number of times it appears, sorted by
+        symbol, as a :class:`tuple`. Whitespace isn't counted.
+    :rtype: tuple
+    :raises ValueError: If the result has anything other than strings.
+
+    Usage::
+
+        >>> tally(('++', '•+', ''))
+        (('+', 3), ('•', 1))
+    """
+    counts: Counter[str] = Counter()
+    items = [mapped]
+    while items:
+        item = items.pop()
+        if isinstance(item, str):
+            counts.update(item)
+        elif isinstance(item, tuple):
+            items.extend(item)
+        else:
+            msg = f'Can only tally mapped results, not {item!r}.'
+            raise ValueError(msg)
+    return tuple(sorted(
+        (symbol, count) for symbol, count in counts.items()
+        if not symbol.isspace()
+    ))
 
 
 # Lexing.
 class Lexer(BaseLexer):
     """A state machine to lex dice maps in :ref:`YADN` dice notation."""
+    # The tokens allowed to follow each state.
+    follows: dict[Token, tuple[Token, ...]] = {
+        Token.KV_DELIMITER: (
+            Token.NEGATIVE_SIGN,
+            Token.NUMBER,
+            Token.QUALIFIER_DELIMITER,
+            Token.WHITESPACE,
+        ),
+        Token.MAP_CLOSE: (),
+        Token.MAP_OPEN: (
+            Token.MAP_CLOSE,
+            Token.QUALIFIER_DELIMITER,
+            Token.WHITESPACE,
+        ),
+        Token.NAME_DELIMITER: (
+            Token.NEGATIVE_SIGN,
+            Token.NUMBER,
+            Token.WHITESPACE,
+        ),
+        Token.NEGATIVE_SIGN: (
+            Token.NUMBER,
+        ),
+        Token.NUMBER: (
+            Token.KV_DELIMITER,
+            Token.MAP_CLOSE,
+            Token.PAIR_DELIMITER,
+            Token.WHITESPACE,
+        ),
+        Token.PAIR_DELIMITER: (
+            Token.NEGATIVE_SIGN,
+            Token.NUMBER,
+            Token.WHITESPACE,
+        ),
+        Token.QUALIFIER_END: (
+            Token.MAP_CLOSE,
+            Token.NAME_DELIMITER,
+            Token.PAIR_DELIMITER,
+            Token.WHITESPACE,
+        ),
+        Token.START: (
+            Token.MAP_OPEN,
+            Token.WHITESPACE,
+        ),
+    }
+
     def __init__(self) -> None:
         state_map: dict[Token, Callable] = {
             Token.START: self._start,
@@ -66,45 +356,23 @@ class Lexer(BaseLexer):
     # Lexing rules.
     def _kv_delimiter(self, char: str) -> None:
         """Lex a key-value delimiter symbol."""
-        can_follow = [
-            Token.NEGATIVE_SIGN,
-            Token.NUMBER,
-            Token.QUALIFIER_DELIMITER,
-            Token.WHITESPACE,
-        ]
-        self._check_char(char, can_follow)
+        self._check_char(char, self.follows[Token.KV_DELIMITER])
 
     def _map_close(self, char: str) -> None:
         """Lex a map close symbol."""
-        can_follow: list[Token] = []
-        self._check_char(char, can_follow)
+        self._check_char(char, self.follows[Token.MAP_CLOSE])
 
     def _map_open(self, char: str) -> None:
         """Lex a map open symbol."""
-        can_follow = [
-            Token.MAP_CLOSE,
-            Token.QUALIFIER_DELIMITER,
-            Token.WHITESPACE,
-        ]
-        self._check_char(char, can_follow)
+        self._check_char(char, self.follows[Token.MAP_OPEN])
 
     def _name_delimiter(self, char: str) -> None:
         """Lex a name delimiter symbol."""
-        can_follow = [
-            Token.NEGATIVE_SIGN,
-            Token.NUMBER,
-            Token.WHITESPACE,
-        ]
-        self._check_char(char, can_follow)
+        self._check_char(char, self.follows[Token.NAME_DELIMITER])
 
     def _number(self, char: str) -> None:
         """Processing a number."""
-        can_follow = [
-            Token.KV_DELIMITER,
-            Token.MAP_CLOSE,
-            Token.PAIR_DELIMITER,
-            Token.WHITESPACE,
-        ]
+        can_follow = self.follows[Token.NUMBER]
 
         # Check here if the character is a digit because the checks in
         # Char are currently limited to tokens that no longer than two
@@ -118,19 +386,11 @@ class Lexer(BaseLexer):
 
     def _negative_sign(self, char: str) -> None:
         """Processing a number."""
-        can_follow = [
-            Token.NUMBER,
-        ]
-        self._check_char(char, can_follow)
+        self._check_char(char, self.follows[Token.NEGATIVE_SIGN])
 
     def _pair_delimiter(self, char: str) -> None:
         """Lex a pair delimiter symbol."""
-        can_follow = [
-            Token.NEGATIVE_SIGN,
-            Token.NUMBER,
-            Token.WHITESPACE,
-        ]
-        self._check_char(char, can_follow)
+        self._check_char(char, self.follows[Token.PAIR_DELIMITER])
 
     def _qualifier(self, char: str) -> None:
         """Lex a qualifier."""
@@ -140,23 +400,13 @@ class Lexer(BaseLexer):
             self._change_state(new_state, char)
 
     def _qualifier_end(self, char: str) -> None:
-        can_follow = [
-            Token.MAP_CLOSE,
-            Token.NAME_DELIMITER,
-            Token.PAIR_DELIMITER,
-            Token.WHITESPACE,
-        ]
-        self._check_char(char, can_follow)
+        self._check_char(char, self.follows[Token.QUALIFIER_END])
 
     def _start(self, char: str) -> None:
         """Initial lexer state."""
         if self.tokens:
             self.tokens = []
-        can_follow = [
-            Token.MAP_OPEN,
-            Token.WHITESPACE,
-        ]
-        self._check_char(char, can_follow)
+        self._check_char(char, self.follows[Token.START])
 
 
 # Parsing.
@@ -186,7 +436,7 @@ class Parser:
         for token_info in tokens:
             process = self.state_map[self.state]
             process(token_info)
-        return (self.name, {k: v for k, v in self.pairs})
+        return (self.name, DenseMap(self.pairs))
 
     # Parsing rules.
     def _key(self, token_info: tuple[Token, Result]) -> None:
@@ -241,3 +491,210 @@ class Parser:
         else:
             msg = f'Dice mapping cannot start with a {value}'
             raise ValueError(msg)
+
+
+# Default dice maps.
+# The cache of the default dice maps. It holds the location of the
+# default dice maps file, the modification time of the file when it
+# was parsed, and the parsed maps.
+_default_maps: Optional[
+    tuple['str | Path', int, Mapping[str, DiceMapping]]
+] = None
+
+
+class _DefaultMaps(Mapping):
+    """A view of the default dice maps that only loads them when a
+    dice map is looked up in it.
+
+    Most rolls don't use a dice map, so they shouldn't have to wait
+    for the default dice maps file to be read and parsed. Once loaded,
+    the maps are kept by the view, so rolling a compiled roll doesn't
+    check the file each time it looks up a dice map.
+    """
+    __slots__ = ('_maps',)
+
+    def __init__(self) -> None:
+        self._maps: Optional[Mapping[str, DiceMapping]] = None
+
+    def __getitem__(self, key: str) -> DiceMapping:
+        return self._load()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._load())
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}()'
+
+    def _load(self) -> Mapping[str, DiceMapping]:
+        if self._maps is None:
+            self._maps = load_default_maps()
+        return self._maps
+
+
+def add_dice_map(loc: str) -> dict[str, DiceMapping]:
+    """Load the dice-maps from a given file.
+
+    :param loc: The location of the file of dice mappings to load.
+    :return: None.
+    :rtype: NoneType
+
+    Usage::
+
+        >>> from yadr import add_dice_map
+        >>>
+        >>> path = 'tests/data/__test_dice_map.txt'
+        >>> add_dice_map(path)              # doctest: +NORMALIZE_WHITESPACE
+        {'spam': {1: 'eggs', 2: 'bacon', 3: 'eggs', 4: 'tomato'}, 'fudge':
+        {1: '-', 2: '', 3: '+'}}
+    """
+    with phase('map-load'):
+        yadn = read_file(loc)
+        return parse_map(yadn)
+
+
+def get_default_maps() -> dict[str, DiceMapping]:
+    """Get the default dice maps.
+
+    :return: The default dice maps as a :class:`dict` of :class:`dict`
+        objects.
+    :rtype: dict
+
+    Usage::
+
+        >>> from yadr.maps import get_default_maps
+        >>>
+        >>> get_default_maps()              # doctest: +ELLIPSIS
+        {'sweote boost': {1: '',...
+
+    The returned maps are a copy that is safe to change. If you only
+    need to read the default maps, :func:`yadr.maps.load_default_maps`
+    avoids making the copy.
+    """
+    default_maps = load_default_maps()
+    return {name: dict(map_) for name, map_ in default_maps.items()}
+
+
+def list_dice_maps() -> str:
+    """Get the list of the default dice maps.
+
+    :return: A :class:`str` object.
+    :rtype: str
+
+    Usage::
+
+        >>> from yadr import list_dice_maps
+        >>>
+        >>> list_dice_maps()                # doctest: +ELLIPSIS
+        'sweote boost...
+    """
+    dice_map = load_default_maps()
+    maps_ = '\n'.join(dice_map)
+    return maps_
+
+
+def load_default_maps() -> Mapping[str, DiceMapping]:
+    """Get a read-only view of the default dice maps.
+
+    :return: The default dice maps as a :class:`types.MappingProxyType`
+        of frozen :class:`yadr.maps.DenseMap` objects.
+    :rtype: types.MappingProxyType
+
+    The default dice maps file is only parsed the first time this is
+    called in a process. After that the parsed maps are returned from
+    a cache until the modification time of the file changes. Since
+    every roll in the process uses the same maps, neither the view nor
+    the maps in it can be changed.
+
+    Usage::
+
+        >>> from yadr.maps import load_default_maps
+        >>>
+        >>> load_default_maps()['sweote boost']      # doctest: +ELLIPSIS
+        {1: '',...
+    """
+    global _default_maps
+    with phase('map-load'):
+        default_file: str | Path
+        if _default_maps is None:
+            data_dir = os.path.dirname(yadr.data.__file__)
+            default_file = os.path.join(data_dir, 'dice_maps.yadn')
+        else:
+            default_file, mtime, default_maps = _default_maps
+            if os.stat(default_file).st_mtime_ns == mtime:
+                return default_maps
+
+        mtime = os.stat(default_file).st_mtime_ns
+        yadn = read_file(default_file)
+        parsed = parse_map(yadn)
+        for map_ in parsed.values():
+            if isinstance(map_, DenseMap):
+                map_.freeze()
+        default_maps = MappingProxyType(parsed)
+        _default_maps = (default_file, mtime, default_maps)
+        return default_maps
+
+
+def overlay_maps(
+    dice_map: Optional[Mapping[str, DiceMapping]] = None
+) -> ChainMap[str, DiceMapping]:
+    """Lay dice maps over the default dice maps.
+
+    :param dice_map: (Optional.) The dice maps to lay over the default
+        dice maps.
+    :return: A :class:`collections.ChainMap` object.
+    :rtype: collections.ChainMap
+
+    Looking up a dice map looks in the given dice maps before the
+    default dice maps. Any dice maps added to the overlay are stored
+    in the overlay, so neither the given dice maps nor the default
+    dice maps are changed.
+
+    Usage::
+
+        >>> from yadr.maps import overlay_maps
+        >>>
+        >>> maps_ = overlay_maps({'spam': {1: 'eggs'}})
+        >>> maps_['spam']
+        {1: 'eggs'}
+        >>> maps_['sweote boost']                   # doctest: +ELLIPSIS
+        {1: '',...
+    """
+    # A ChainMap only ever writes to its first mapping, so the other
+    # mappings don't need to be mutable. The default dice maps are
+    # only loaded if a dice map isn't found in the others.
+    maps_: list[Any] = [{}, _DefaultMaps()]
+    if dice_map:
+        maps_.insert(1, dice_map)
+    return ChainMap(*maps_)
+
+
+def read_file(loc: 'str | Path') -> str:
+    """Read test from a file.
+
+    :param loc: The file system location of the file.
+    :return: A :class:str object.
+    :rtype: str
+    """
+    with open(loc) as fh:
+        contents = fh.read()
+    return contents
+
+
+def parse_map(yadn: str) -> dict[str, DiceMapping]:
+    """Parse the contents of a dice mapping file."""
+    if ';' in yadn:
+        yadn_parts = yadn.split(';')
+        dice_map = {}
+        for part in yadn_parts:
+            assert ';' not in part
+            dice_map.update(parse_map(part))
+        return dice_map
+
+    mlexer = Lexer()
+    mparser = Parser()
+    tokens = mlexer.lex(yadn)
+    name, value = mparser.parse(tokens)
+    return {name: value, }
@@ -141,9 +141,16 @@ Result = Union[
     Pool,
     NamedMap,
 ]
+Tally = tuple[tuple[str, int], ...]
 TokenInfo = tuple[Token, Result]
 
 
+# The names of the pools of workers that can execute rolls. They are
+# here rather than in yadr.parallel so the command line can offer them
+# without importing it.
+EXECUTORS = ('process', 'thread')
+
+
 # Symbols by token.
 symbols = {k: v.split() for k, v in yadn_symbols_raw.items()}
 symbols[Token.WHITESPACE] = [' ', '\t', '\n']
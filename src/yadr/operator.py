@@ -6,8 +6,13 @@ Operators for handling the dice part of dice notation.
 """
 import operator
 import random
-import secrets
-from collections.abc import Callable, Sequence
+from collections.abc import Callable, Iterator, Sequence
+from contextvars import ContextVar
+from itertools import compress, repeat
+from math import fabs, floor, lgamma, log, log2, sqrt
+from typing import Optional, overload
+
+from yadr.rng import Backend
 
 
 # Result types for annotation.
@@ -28,6 +33,174 @@ UPoolDegenOp = Callable[[Pool], int]
 Operation = Callable
 
 
+# Pools with at least this many dice are rolled as a count of the dice
+# that rolled each face rather than rolling each die.
+FACE_POOL_THRESHOLD = 1_000
+
+# The most times an exploding die can explode, unless it's changed in
+# :data:`explode_limit`. Without a limit a die with one side would
+# explode forever.
+EXPLODE_LIMIT = 100
+
+
+class FacePool(Sequence[int]):
+    """A dice pool stored as the number of dice showing each face.
+
+    :param counts: The number of dice showing each face.
+    :return: A :class:`yadr.operator.FacePool` object.
+    :rtype: yadr.operator.FacePool
+
+    Large pools of dice only have a few different faces, so pool
+    operators can work on the count of each face rather than on each
+    die. A :class:`FacePool` is only turned into the values of each
+    die when something needs them, like when it's returned as the
+    result of a roll.
+
+    Since a count doesn't remember the order the dice were rolled in,
+    the values are shuffled when they are expanded. Rolled dice are in
+    a random order anyway, so this doesn't change the odds of any
+    result.
+
+    Usage::
+
+        >>> pool = FacePool({1: 2, 6: 1})
+        >>> len(pool)
+        3
+        >>> sorted(pool)
+        [1, 1, 6]
+    """
+    def __init__(self, counts: dict[int, int]) -> None:
+        self.counts = {
+            face: counts[face]
+            for face in sorted(counts)
+            if counts[face] > 0
+        }
+        self._values: Optional[tuple[int, ...]] = None
+
+    def __repr__(self) -> str:
+        name = self.__class__.__name__
+        return f'{name}({self.counts!r})'
+
+    @overload
+    def __getitem__(self, index: int) -> int:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[int]:
+        ...
+
+    def __getitem__(self, index):
+        return self.expand()[index]
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.expand())
+
+    def __len__(self) -> int:
+        return sum(self.counts.values())
+
+    @classmethod
+    def roll(cls, num: int, size: int) -> 'FacePool':
+        """Roll a pool of dice by drawing the number of dice that show
+        each face from a multinomial distribution.
+
+        :param num: The number of dice to roll.
+        :param size: The highest number that can be rolled on a die.
+        :return: A :class:`yadr.operator.FacePool` object.
+        :rtype: yadr.operator.FacePool
+        """
+        counts = {}
+        remaining = num
+        for face in range(1, size):
+            counts[face] = _binomial(remaining, 1 / (size - face + 1))
+            remaining -= counts[face]
+        counts[size] = remaining
+        return cls(counts)
+
+    @classmethod
+    def roll_exploding(cls, num: int, size: int, limit: int) -> 'FacePool':
+        """Roll a pool of exploding dice.
+
+        :param num: The number of dice to roll.
+        :param size: The highest number that can be rolled on a die.
+        :param limit: The most times a die can explode.
+        :return: A :class:`yadr.operator.FacePool` object.
+        :rtype: yadr.operator.FacePool
+
+        The number of times a die explodes follows a geometric
+        distribution. Rather than rolling each die until it stops, this
+        draws how many of the dice still exploding explode again, which
+        only takes a few draws for each explosion.
+        """
+        counts = {}
+        remaining = num
+        for explosions in range(limit + 1):
+            exploded = _binomial(remaining, 1 / size)
+
+            # The dice that stopped show a face other than the highest
+            # on their last roll.
+            stopped = cls.roll(remaining - exploded, size - 1)
+            base = explosions * size
+            for face, count in stopped.counts.items():
+                counts[base + face] = count
+            remaining = exploded
+            if not remaining:
+                break
+        counts[(limit + 1) * size] = remaining
+        return cls(counts)
+
+    def expand(self) -> tuple[int, ...]:
+        """Get the value of each die in the pool.
+
+        :return: The values as a :class:`tuple`.
+        :rtype: tuple
+        """
+        if self._values is None:
+            values: list[int] = []
+            for face, count in self.counts.items():
+                values.extend(repeat(face, count))
+            backend = rng_backend.get()
+            if backend is None:
+                random.shuffle(values)
+            else:
+                backend.shuffle(values)
+            self._values = tuple(values)
+        return self._values
+
+    def filter(self, keep: Callable[[int], bool]) -> 'FacePool':
+        """Keep only the dice showing faces that pass a test.
+
+        :param keep: The test for each face.
+        :return: A :class:`yadr.operator.FacePool` object.
+        :rtype: yadr.operator.FacePool
+        """
+        return FacePool({
+            face: count
+            for face, count in self.counts.items()
+            if keep(face)
+        })
+
+    def map(self, fn: Callable[[int], int]) -> 'FacePool':
+        """Change the face shown by each die.
+
+        :param fn: The change for each face.
+        :return: A :class:`yadr.operator.FacePool` object.
+        :rtype: yadr.operator.FacePool
+        """
+        counts: dict[int, int] = {}
+        for face, count in self.counts.items():
+            new = fn(face)
+            counts[new] = counts.get(new, 0) + count
+        return FacePool(counts)
+
+    def total(self) -> int:
+        """Get the sum of the dice in the pool.
+
+        :return: The sum as an :class:`int`.
+        :rtype: int
+        """
+        return sum(face * count for face, count in self.counts.items())
+
+
 # Registration.
 ops: dict[str, Operation] = {
     '^': operator.pow,
@@ -45,6 +218,11 @@ ops: dict[str, Operation] = {
 }
 
 
+# Operations that roll dice. Any expression without one of these always
+# has the same result.
+random_ops = frozenset(('d', 'd!', 'dc', 'dh', 'dl', 'dw', 'g', 'g!'))
+
+
 class operation:
     """A registration decorator for operations.
 
@@ -133,6 +311,10 @@ def concat(num: int, size: int) -> int:
         >>> # that problem, too.
         >>> concat(2, 10)
         21
+
+    Large numbers of dice are rolled as a :class:`FacePool`, but they
+    still have to be expanded to be concatenated. See
+    :func:`pool_concatenate`.
     """
     base = 10
     pool = dice_pool(num, size)
@@ -163,7 +345,7 @@ def die(num: int, size: int) -> int:
 
     """
     pool = dice_pool(num, size)
-    return sum(pool)
+    return pool_sum(pool)
 
 
 @operation('d!')
@@ -188,7 +370,7 @@ def exploding_die(num: int, size: int) -> int:
         15
 
     """
-    return sum(exploding_pool(num, size))
+    return pool_sum(exploding_pool(num, size))
 
 
 @operation('dh')
@@ -214,6 +396,8 @@ def keep_high_die(num: int, size: int) -> int:
 
     """
     pool = dice_pool(num, size)
+    if isinstance(pool, FacePool):
+        return max(pool.counts)
     return max(pool)
 
 
@@ -240,6 +424,8 @@ def keep_low_die(num: int, size: int) -> int:
 
     """
     pool = dice_pool(num, size)
+    if isinstance(pool, FacePool):
+        return min(pool.counts)
     return min(pool)
 
 
@@ -270,7 +456,7 @@ def wild_die(num: int, size: int) -> int:
     regular = dice_pool(num - 1, size)
     if wild[0] == 1:
         return 0
-    return sum((sum(wild), sum(regular)))
+    return sum(wild) + pool_sum(regular)
 
 
 # Pool operators.
@@ -292,6 +478,8 @@ def pool_cap(pool: Pool, cap: int) -> Pool:
         (4, 6, 3, 5, 1, 6)
 
     """
+    if isinstance(pool, FacePool):
+        return pool.map(lambda face: min(face, cap))
     result = []
     for value in pool:
         if value > cap:
@@ -318,6 +506,8 @@ def pool_floor(pool: Pool, floor: int) -> Pool:
         (6, 10, 6, 6, 6, 9)
 
     """
+    if isinstance(pool, FacePool):
+        return pool.map(lambda face: max(face, floor))
     result = []
     for value in pool:
         if value < floor:
@@ -344,6 +534,8 @@ def pool_keep_above(pool: Pool, floor: int) -> Pool:
         (10, 9)
 
     """
+    if isinstance(pool, FacePool):
+        return pool.filter(lambda face: face >= floor)
     return tuple(n for n in pool if n >= floor)
 
 
@@ -365,6 +557,8 @@ def pool_keep_below(pool: Pool, ceiling: int) -> Pool:
         (4, 3, 5, 1)
 
     """
+    if isinstance(pool, FacePool):
+        return pool.filter(lambda face: face <= ceiling)
     return tuple(n for n in pool if n <= ceiling)
 
 
@@ -386,17 +580,14 @@ def pool_keep_high(pool: Pool, keep: int) -> Pool:
         (10, 5, 9)
 
     """
-    pool = list(pool)
-    remove = len(pool) - keep
-    for _ in range(remove):
-        low_value = max(pool)
-        low_index = 0
-        for i, n in enumerate(pool):
-            if n < low_value:
-                low_value = n
-                low_index = i
-        pool.pop(low_index)
-    return tuple(pool)
+    _check_keep(keep)
+    if isinstance(pool, FacePool):
+        return _keep_faces(pool, keep, reverse=True)
+
+    # Dice are removed lowest first. Since sorts are stable, the
+    # earliest of any tied dice is removed first.
+    order = sorted(range(len(pool)), key=pool.__getitem__)
+    return _remove(pool, order, len(pool) - keep)
 
 
 @operation('pl')
@@ -417,17 +608,14 @@ def pool_keep_low(pool: Pool, keep: int) -> Pool:
         (4, 3, 1)
 
     """
-    pool = list(pool)
-    remove = len(pool) - keep
-    for _ in range(remove):
-        high_value = min(pool)
-        high_index = 0
-        for i, n in enumerate(pool):
-            if n > high_value:
-                high_value = n
-                high_index = i
-        pool.pop(high_index)
-    return tuple(pool)
+    _check_keep(keep)
+    if isinstance(pool, FacePool):
+        return _keep_faces(pool, keep)
+
+    # Dice are removed highest first. Since sorts are stable even when
+    # reversed, the earliest of any tied dice is removed first.
+    order = sorted(range(len(pool)), key=pool.__getitem__, reverse=True)
+    return _remove(pool, order, len(pool) - keep)
 
 
 @operation('p%')
@@ -448,6 +636,8 @@ def pool_modulo(pool: Pool, divisor: int) -> Pool:
         (1, 1, 0, 2, 1, 0)
 
     """
+    if isinstance(pool, FacePool):
+        return pool.map(lambda face: face % divisor)
     return tuple(n % divisor for n in pool)
 
 
@@ -469,6 +659,8 @@ def pool_remove(pool: Pool, cut: int) -> Pool:
         (4, 10, 3, 1, 9)
 
     """
+    if isinstance(pool, FacePool):
+        return pool.filter(lambda face: face != cut)
     return tuple(n for n in pool if n != cut)
 
 
@@ -489,7 +681,13 @@ def pool_concatenate(pool: Pool) -> int:
         >>> pool_concatenate([4, 10, 3, 5, 1, 9])
         4103519
 
+    The order of the dice matters, so a :class:`FacePool` has to be
+    expanded into its dice to be concatenated. That makes this take
+    time for each die rather than for each face.
     """
+    if isinstance(pool, FacePool):
+        digits = {face: str(face) for face in pool.counts}
+        return int(''.join(map(digits.__getitem__, pool.expand())))
     str_value = ''.join((str(m) for m in pool))
     return int(str_value)
 
@@ -531,6 +729,8 @@ def pool_sum(pool: Pool) -> int:
         32
 
     """
+    if isinstance(pool, FacePool):
+        return pool.total()
     return sum(pool)
 
 
@@ -575,6 +775,9 @@ def count_successes_with_botch(pool: Pool, target: int) -> int:
         1
 
     """
+    if isinstance(pool, FacePool):
+        botches = pool.counts.get(1, 0)
+        return count_successes(pool, target) - botches
     botches = len([n for n in pool if n == 1])
     pool = pool_keep_above(pool, target)
     return len(pool) - botches
@@ -603,6 +806,14 @@ def dice_pool(num: int, size: int) -> Pool:
         (1, 1, 3, 5, 5)
 
     """
+    # Large pools are rolled as counts of each face, but only when
+    # dice are rolled with :mod:`random` or a backend.
+    backend = rng_backend.get()
+    counted = backend is not None or roll is _roll_random
+    if num >= FACE_POOL_THRESHOLD and 0 < size < num and counted:
+        return FacePool.roll(num, size)
+    if backend is not None:
+        return backend.pool(num, size)
     return tuple(roll(size) for _ in range(num))
 
 
@@ -628,6 +839,12 @@ def exploding_pool(num: int, size: int) -> Pool:
         (1, 1, 3, 5, 5)
 
     """
+    # Large pools draw the number of times the dice explode rather
+    # than rolling each die, but only when dice are rolled with
+    # :mod:`random` or a backend.
+    counted = rng_backend.get() is not None or roll is _roll_random
+    if num >= FACE_POOL_THRESHOLD and size > 0 and counted:
+        return FacePool.roll_exploding(num, size, explode_limit.get())
     return tuple(_explode(size) for n in range(num))
 
 
@@ -658,13 +875,122 @@ def _explode(size: int) -> int:
     :param size: The highest number that can be rolled on a die.
     :return: The the values as an :class:`int`.
     :rtype: int
+
+    The die stops exploding after :data:`yadr.operator.explode_limit`
+    explosions.
     """
-    result = roll(size)
-    if result == size:
-        result += _explode(size)
+    backend = rng_backend.get()
+    roll_die = roll if backend is None else backend.roll
+    result = 0
+    for _ in range(explode_limit.get() + 1):
+        value = roll_die(size)
+        result += value
+        if value != size:
+            break
     return result
 
 
+def _binomial(num: int, chance: float) -> int:
+    """Get the number of successes in a number of trials with the
+    same chance of success.
+
+    :param num: The number of trials.
+    :param chance: The chance of success for each trial.
+    :return: The number of successes as an :class:`int`.
+    :rtype: int
+
+    This uses :func:`random.binomialvariate` if it's available and no
+    backend is set. If not, it uses the same methods: a geometric
+    method for small numbers of expected successes and Hoermann's
+    transformed rejection with squeeze for larger numbers.
+    """
+    backend = rng_backend.get()
+    if backend is None and _binomialvariate is not None:
+        return _binomialvariate(num, chance)
+    rand = random.random if backend is None else backend.random
+    if chance >= 1:
+        return num
+    if num == 0 or chance <= 0:
+        return 0
+    if chance > 0.5:
+        return num - _binomial(num, 1 - chance)
+
+    # Count the gaps between successes when few are expected.
+    if num * chance < 10:
+        successes = trials = 0
+        step = log2(1 - chance)
+
+        # A small enough chance rounds away to nothing when it's
+        # taken from one, and then it can never succeed.
+        if not step:
+            return 0
+        while True:
+            trials += floor(log2(rand()) / step) + 1
+            if trials > num:
+                return successes
+            successes += 1
+
+    # Otherwise use transformed rejection with squeeze.
+    spq = sqrt(num * chance * (1 - chance))
+    b = 1.15 + 2.53 * spq
+    a = -0.0873 + 0.0248 * b + 0.01 * chance
+    c = num * chance + 0.5
+    vr = 0.92 - 4.2 / b
+    alpha = (2.83 + 5.1 / b) * spq
+    lpq = log(chance / (1 - chance))
+    m = floor((num + 1) * chance)
+    h = lgamma(m + 1) + lgamma(num - m + 1)
+    while True:
+        u = rand() - 0.5
+        us = 0.5 - fabs(u)
+        k = floor((2 * a / us + b) * u + c)
+        if k < 0 or k > num:
+            continue
+        v = rand()
+        if us >= 0.07 and v <= vr:
+            return k
+        v *= alpha / (a / (us * us) + b)
+        if log(v) <= h - lgamma(k + 1) - lgamma(num - k + 1) + (k - m) * lpq:
+            return k
+
+
+def _check_keep(keep: int) -> None:
+    """Raise an error if a number of dice to keep is negative."""
+    if keep < 0:
+        msg = f'Keep count cannot be negative. Was {keep}.'
+        raise ValueError(msg)
+
+
+def _keep_faces(pool: FacePool, keep: int, reverse: bool = False) -> Pool:
+    """Keep a number of the lowest dice in a pool of faces, or the
+    highest if reversed.
+    """
+    counts = {}
+    for face in sorted(pool.counts, reverse=reverse):
+        if keep <= 0:
+            break
+        counts[face] = min(pool.counts[face], keep)
+        keep -= counts[face]
+    return FacePool(counts)
+
+
+def _remove(pool: Pool, order: Sequence[int], remove: int) -> Pool:
+    """Remove dice from a pool.
+
+    :param pool: A sequence of die values.
+    :param order: The indices of the dice in the order they should be
+        removed.
+    :param remove: The number of dice to remove.
+    :return: The remaining values in their original order as a
+        :class:`tuple`.
+    :rtype: tuple
+    """
+    kept = [True] * len(pool)
+    for index in order[:max(remove, 0)]:
+        kept[index] = False
+    return tuple(compress(pool, kept))
+
+
 def _seed(seed: int | str | bytes) -> None:
     """Seed the random number generator for testing purposes.
 
@@ -697,6 +1023,9 @@ def _roll_secrets(size: int) -> int:
     :returns: An :class:'int' object.
     :rtype: int
     """
+    # Few rolls use secrets, so it isn't imported with the module.
+    import secrets
+
     return secrets.randbelow(size) + 1
 
 
@@ -706,3 +1035,26 @@ def _roll_secrets(size: int) -> int:
 # you could, theoretically, run into thread safety issues when changing it,
 # So be cautious.
 roll = _roll_random
+
+# This sets the RNG backend used to roll dice in the current context.
+# It's set by :class:`yadr.Roller`. Since each thread has its own
+# context, setting it in one thread doesn't affect any other. When it
+# isn't set, dice are rolled with :func:`roll`.
+rng_backend: ContextVar[Optional[Backend]] = ContextVar(
+    'rng_backend',
+    default=None
+)
+
+# This sets the most times an exploding die can explode in the current
+# context. Exact distributions use the same limit, so they include
+# every result the dice can roll. Like :data:`rng_backend`, setting it
+# in one thread doesn't affect any other.
+explode_limit: ContextVar[int] = ContextVar(
+    'explode_limit',
+    default=EXPLODE_LIMIT
+)
+
+# Python 3.12 added binomial variates to :mod:`random`.
+_binomialvariate: Optional[Callable[[int, float], int]] = getattr(
+    random, 'binomialvariate', None
+)
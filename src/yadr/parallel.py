@@ -0,0 +1,392 @@
+"""
+parallel
+~~~~~~~~
+
+Roll the independent rolls of a compound roll in parallel.
+
+The rolls in a compound roll don't depend on each other once the
+:ref:`YADN` has been compiled. The dice maps defined in the
+:ref:`YADN` are all added in order while it is compiled, so the
+instructions for the rolls can be split into chunks and handed to a
+pool of threads or processes.
+
+Each roll gets its own random number generator, seeded from the seed
+for the whole roll and the position of the roll. This means the
+results for a given seed don't depend on how many workers there are
+or which worker rolls which roll.
+
+Separate strings of :ref:`YADN`, such as the lines of a file, can be
+rolled the same way with :func:`yadr.parallel.roll_lines`.
+
+.. autofunction:: yadr.parallel.compute
+.. autofunction:: yadr.parallel.compute_range
+.. autofunction:: yadr.parallel.derive_seed
+.. autofunction:: yadr.parallel.roll_lines
+"""
+import pickle
+import secrets
+from collections import ChainMap, deque
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from contextvars import Context, copy_context
+from hashlib import sha256
+from io import BytesIO
+from itertools import islice, repeat
+from typing import TYPE_CHECKING, Any, Optional
+
+from yadr import operator as yo
+from yadr import rng, vm
+from yadr.encode import Encoder
+from yadr.lex import FastLexer
+from yadr.model import EXECUTORS, DiceMapping, Result
+from yadr.yadr import _compile, overlay_maps
+
+
+# The executors are only imported when there are workers, since they
+# import most of multiprocessing.
+if TYPE_CHECKING:
+    from concurrent.futures import Executor, ProcessPoolExecutor
+
+
+# The number of chunks given to each worker. More chunks than workers
+# keeps the workers busy when some rolls take longer than others.
+CHUNKS_PER_WORKER = 4
+
+# The number of lines sent to a worker at a time by roll_lines.
+LINES_PER_CHUNK = 32
+
+# The rolls rolled by a worker process. They are sent once when the
+# process starts rather than with each chunk. This is only set in the
+# worker processes, never in the process that started them.
+_rolls: Sequence[vm.Code] = ()
+
+
+# Pickling.
+class _RollPickler(pickle.Pickler):
+    """Pickle rolls with their dice maps replaced by a reference.
+
+    The dice maps of compiled rolls can include read-only default
+    maps, which can't be pickled. They are sent as a plain
+    :class:`dict` instead, once for all of the rolls.
+    """
+    def __init__(
+        self,
+        file: BytesIO,
+        dice_map: Optional[Mapping[str, DiceMapping]]
+    ) -> None:
+        super().__init__(file)
+        self.dice_map = dice_map
+
+    def persistent_id(self, obj: Any) -> Optional[str]:
+        if self.dice_map is not None and obj is self.dice_map:
+            return 'dice_map'
+        return None
+
+
+class _RollUnpickler(pickle.Unpickler):
+    """Unpickle rolls pickled by :class:`_RollPickler`."""
+    def __init__(
+        self,
+        file: BytesIO,
+        dice_map: Optional[dict[str, DiceMapping]]
+    ) -> None:
+        super().__init__(file)
+        self.dice_map = dice_map
+
+    def persistent_load(self, pid: Any) -> Any:
+        return self.dice_map
+
+
+# Public functions.
+def compute(
+    rolls: Sequence[vm.Code],
+    dice_map: Optional[Mapping[str, DiceMapping]] = None,
+    workers: Optional[int] = None,
+    executor: str = 'thread',
+    seed: Optional[int] = None
+) -> list[Result]:
+    """Run each roll with its own random number generator.
+
+    :param rolls: The instructions for each roll, lowered by
+        :func:`yadr.vm.lower`.
+    :param dice_map: (Optional.) The dice maps the rolls were compiled
+        with. Only needed when rolling in worker processes.
+    :param workers: (Optional.) The number of threads or processes to
+        roll with. The default is to roll in the current thread.
+    :param executor: (Optional.) Whether to roll with a pool of
+        `thread` or `process` workers. The default is `thread`.
+    :param seed: (Optional.) The seed for the rolls. The default is a
+        random seed.
+    :return: The result of each roll as a :class:`list`.
+    :rtype: list
+    """
+    _check_workers(workers, executor)
+    if seed is None:
+        seed = secrets.randbits(64)
+
+    chunks = _chunk(len(rolls), workers)
+    if workers is None or workers == 1 or len(chunks) < 2:
+        return compute_range(rolls, seed, range(len(rolls)))
+
+    pool: Executor
+    if executor == 'thread':
+        from concurrent.futures import ThreadPoolExecutor
+
+        # Each chunk is rolled in a copy of the current context, so
+        # the threads use the same explosion limit.
+        with ThreadPoolExecutor(workers) as pool:
+            futures = [
+                pool.submit(
+                    copy_context().run,
+                    compute_range,
+                    rolls,
+                    seed,
+                    chunk
+                )
+                for chunk in chunks
+            ]
+            return [
+                result
+                for future in futures
+                for result in future.result()
+            ]
+
+    with _process_pool(rolls, dice_map, workers) as pool:
+        parts = pool.map(_compute_process, repeat(seed), chunks)
+        return [result for part in parts for result in part]
+
+
+def compute_range(
+    rolls: Sequence[vm.Code],
+    seed: int,
+    indices: range
+) -> list[Result]:
+    """Run some of the rolls, each with its own random number
+    generator.
+
+    :param rolls: The instructions for each roll.
+    :param seed: The seed for the rolls.
+    :param indices: The positions of the rolls to run.
+    :return: The result of each roll as a :class:`list`.
+    :rtype: list
+    """
+    results = []
+    for index in indices:
+        backend = rng.RandomBackend(derive_seed(seed, index))
+        token = yo.rng_backend.set(backend)
+        try:
+            result = vm.run(rolls[index])
+            if isinstance(result, yo.FacePool):
+                result = result.expand()
+        finally:
+            yo.rng_backend.reset(token)
+        results.append(result)
+    return results
+
+
+def derive_seed(seed: int, index: int) -> int:
+    """Derive the seed for one roll in a compound roll.
+
+    :param seed: The seed for the compound roll.
+    :param index: The position of the roll in the compound roll.
+    :return: The seed as an :class:`int`.
+    :rtype: int
+
+    Usage::
+
+        >>> derive_seed(1138, 0) == derive_seed(1138, 0)
+        True
+        >>> derive_seed(1138, 0) == derive_seed(1138, 1)
+        False
+    """
+    digest = sha256(f'{seed}:{index}'.encode()).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def roll_lines(
+    lines: Iterable[str],
+    dice_map: Optional[dict[str, DiceMapping]] = None,
+    workers: Optional[int] = None,
+    executor: str = 'process',
+    seed: Optional[int] = None
+) -> Iterator[str | Exception]:
+    """Roll each line of :ref:`YADN`, yielding each result as soon as
+    it is rolled.
+
+    :param lines: The lines of :ref:`YADN` to roll.
+    :param dice_map: (Optional.) A dictionary of maps for transforming
+        the value rolled. They are laid over the default dice maps once
+        for all of the lines.
+    :param workers: (Optional.) The number of threads or processes to
+        roll with. The default is to roll in the current thread.
+    :param executor: (Optional.) Whether to roll with a pool of
+        `thread` or `process` workers. The default is `process`, since
+        rolling is limited by the CPU, and threads only roll one line
+        at a time.
+    :param seed: (Optional.) The seed for the rolls. Each line gets a
+        seed derived from this and its position.
+    :return: A generator that yields the result of each line encoded
+        as :ref:`YADN`, an empty string for a blank line, or the
+        exception raised by a line that couldn't be rolled.
+    :rtype: collections.abc.Iterator
+
+    Usage::
+
+        >>> for result in roll_lines(['3', '', '1 / 0'], seed=1138):
+        ...     print(repr(result))
+        '3'
+        ''
+        ZeroDivisionError('integer division or modulo by zero')
+
+    The lines share a lexer and the dice maps, but dice maps defined
+    in a line are only used by that line. When rolling with workers,
+    the lines are sent to the workers in chunks of
+    :data:`yadr.parallel.LINES_PER_CHUNK` lines, and each result is
+    yielded once its chunk and the chunks before it are done. Rolling
+    with workers always seeds each line, so worker processes copied
+    from the same process don't roll the same dice.
+    """
+    _check_workers(workers, executor)
+    if workers is None or workers == 1:
+        lexer = FastLexer()
+        maps_ = overlay_maps(dice_map)
+        for index, line in enumerate(lines):
+            yield _roll_line(line, index, seed, maps_, lexer)
+        return
+    if seed is None:
+        seed = secrets.randbits(64)
+
+    pool: Executor
+    if executor == 'thread':
+        from concurrent.futures import ThreadPoolExecutor
+
+        pool = ThreadPoolExecutor(workers)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        pool = ProcessPoolExecutor(
+            workers,
+            initializer=_set_explode_limit,
+            initargs=(yo.explode_limit.get(),)
+        )
+
+    # Only a few chunks are in flight at a time, so the lines are read
+    # as the results are yielded rather than all at once.
+    numbered = enumerate(lines)
+    pending: deque = deque()
+    with pool:
+        while chunk := list(islice(numbered, LINES_PER_CHUNK)):
+            # Threads roll in a copy of the current context, so they
+            # use the same explosion limit. Processes are given the
+            # limit when they start.
+            context = copy_context() if executor == 'thread' else None
+            future = pool.submit(_roll_chunk, dice_map, seed, chunk, context)
+            pending.append(future)
+            if len(pending) >= workers * CHUNKS_PER_WORKER:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+# Utility functions.
+def _check_workers(workers: Optional[int], executor: str) -> None:
+    """Check the workers can be started."""
+    if executor not in EXECUTORS:
+        msg = f'Executor must be one of {", ".join(EXECUTORS)}.'
+        raise ValueError(msg)
+    if workers is not None and workers < 1:
+        msg = f'Must have at least one worker. Was {workers}.'
+        raise ValueError(msg)
+
+
+def _chunk(length: int, workers: Optional[int]) -> list[range]:
+    """Split the positions of the rolls into chunks for the workers."""
+    count = (workers or 1) * CHUNKS_PER_WORKER
+    size = max(-(-length // count), 1)
+    return [
+        range(start, min(start + size, length))
+        for start in range(0, length, size)
+    ]
+
+
+def _compute_process(seed: int, indices: range) -> list[Result]:
+    """Compute a chunk of rolls in a worker process."""
+    return compute_range(_rolls, seed, indices)
+
+
+def _process_pool(
+    rolls: Sequence[vm.Code],
+    dice_map: Optional[Mapping[str, DiceMapping]],
+    workers: int
+) -> 'ProcessPoolExecutor':
+    """Start a pool of worker processes that can run the rolls.
+
+    The rolls are given to each pool when its workers start, so pools
+    started at the same time by different threads don't share them.
+    The workers are started the platform's default way, since forking
+    isn't safe when the process has other threads running.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    file = BytesIO()
+    _RollPickler(file, dice_map).dump(tuple(rolls))
+    maps = dict(dice_map) if dice_map is not None else None
+    return ProcessPoolExecutor(
+        workers,
+        initializer=_init_process,
+        initargs=(file.getvalue(), maps, yo.explode_limit.get())
+    )
+
+
+def _roll_chunk(
+    dice_map: Optional[dict[str, DiceMapping]],
+    seed: Optional[int],
+    lines: list[tuple[int, str]],
+    context: Optional[Context] = None
+) -> list[str | Exception]:
+    """Roll a chunk of numbered lines of YADN in a worker, in the
+    given context if there is one.
+    """
+    if context is not None:
+        return context.run(_roll_chunk, dice_map, seed, lines)
+    lexer = FastLexer()
+    maps_ = overlay_maps(dice_map)
+    return [
+        _roll_line(line, index, seed, maps_, lexer)
+        for index, line in lines
+    ]
+
+
+def _roll_line(
+    line: str,
+    index: int,
+    seed: Optional[int],
+    maps_: ChainMap[str, DiceMapping],
+    lexer: FastLexer
+) -> str | Exception:
+    """Roll a line of YADN, returning the exception if it fails."""
+    if not line.strip():
+        return ''
+    line_seed = None if seed is None else derive_seed(seed, index)
+    try:
+        compiled = _compile(line, maps_.new_child(), lexer)
+        return Encoder().encode(compiled.roll(seed=line_seed))
+    except Exception as ex:
+        return ex
+
+
+def _init_process(
+    pickled: bytes,
+    dice_map: Optional[dict[str, DiceMapping]],
+    limit: int
+) -> None:
+    """Load the rolls when a worker process starts."""
+    global _rolls
+    _rolls = _RollUnpickler(BytesIO(pickled), dice_map).load()
+    _set_explode_limit(limit)
+
+
+def _set_explode_limit(limit: int) -> None:
+    """Use the explosion limit of the process that started a worker
+    process.
+    """
+    yo.explode_limit.set(limit)
@@ -5,11 +5,19 @@ parse
 Parse dice notation.
 """
 import operator
-from collections.abc import Callable, Sequence
+from collections import ChainMap
+from collections.abc import (
+    Callable,
+    Iterable,
+    Iterator,
+    MutableMapping,
+    Sequence
+)
 from functools import wraps
 from typing import Any, Optional
 
 from yadr import operator as yo
+from yadr.maps import map_values
 from yadr.model import (
     CompoundResult,
     DiceMapping,
@@ -33,11 +41,32 @@ def map_result(
     key: str
 ) -> str | int | tuple[str, ...]:
     """Map a roll result to a dice map."""
-    if isinstance(result, int):
-        return dice_map[key][result]
-    new_result = [map_result(n, key) for n in result]
-    str_result = tuple(str(item) for item in new_result)
-    return str_result
+    return map_values(dice_map[key], result)
+
+
+def collect_results(
+    results: Sequence[Result]
+) -> None | Result | CompoundResult:
+    """Package the results of the rolls in a :ref:`YADN` string for
+    return.
+
+    :param results: The results of each roll that produced one.
+    :return: A :class:`yadr.model.CompoundResult` if there was more
+        than one result, the result if there was only one, or `None`
+        if there were none.
+    :rtype: None, Result, or CompoundResult
+    """
+    # Pools stored as counts of each face are turned into the values
+    # of each die before they are returned.
+    results = [
+        result.expand() if isinstance(result, yo.FacePool) else result
+        for result in results
+    ]
+    if len(results) > 1:
+        return CompoundResult(results)
+    elif results:
+        return results[0]
+    return None
 
 
 # Exceptons
@@ -78,7 +107,7 @@ class Tree:
         value: Result,
         left: Optional['Tree'] = None,
         right: Optional['Tree'] = None,
-        dice_map: Optional[dict[str, DiceMapping]] = None
+        dice_map: Optional[MutableMapping[str, DiceMapping]] = None
     ) -> None:
         self.kind = kind
         self.value = value
@@ -142,11 +171,7 @@ class Tree:
         key: str
     ) -> str | int | tuple[str, ...]:
         """Map a roll result to a dice map."""
-        if isinstance(result, int):
-            return self.dice_map[key][result]
-        new_result = [self._map_result(n, key) for n in result]
-        str_result = tuple(str(item) for item in new_result)
-        return str_result
+        return map_values(self.dice_map[key], result)
 
 
 class Unary(Tree):
@@ -229,10 +254,47 @@ class Parser:
 
     """
     def __init__(self) -> None:
-        self.dice_map: dict[str, DiceMapping] = dict()
+        self.dice_map: MutableMapping[str, DiceMapping] = dict()
         self.top_rule = self._map_operator
 
-    # Public method.
+    # Public methods.
+    def build(self, tokens: Sequence[TokenInfo]) -> tuple[Tree, ...]:
+        """Parse one or more die rolls into trees without executing
+        them.
+
+        Any dice maps defined in the tokens are added to the dice
+        maps of the parser as they are found. Since nothing is
+        executed, the returned trees can be computed as many times
+        as needed.
+
+        Like :meth:`Parser.parse`, each roll only uses the dice maps
+        defined before it. A dice map defined after a roll doesn't
+        change the dice maps that roll uses, even if it has the same
+        name as one the roll uses.
+
+        :param tokens: A sequence of lexed :ref:`YADN` tokens to parse.
+        :return: A :class:`tuple` of :class:`yadr.parser.Tree` objects,
+            one for each roll that produces a result.
+        :rtype: tuple
+        """
+        trees: list[Tree] = []
+        shared = False
+        for roll in self._split_rolls(tokens):
+            # The trees already built keep the dice maps they were
+            # built with, so dice maps defined after them are added
+            # to a new layer over those dice maps.
+            if shared and roll and roll[0][0] == Token.MAP:
+                self.dice_map = ChainMap({}, self.dice_map)
+                shared = False
+            try:
+                trees.append(self._build_tree(roll))
+            except IsMap:
+                continue
+            except NoResult:
+                continue
+            shared = True
+        return tuple(trees)
+
     def parse(
         self,
         tokens: Sequence[TokenInfo]
@@ -244,48 +306,64 @@ class Parser:
             :class:`yadr.model.CompoundResult`.
         :rtype: Result | CompoundResult
         """
-        # Split tokens into rolls for parsing.
-        rolls = []
-        while (Token.ROLL_DELIMITER, ';') in tokens:
-            index = tokens.index((Token.ROLL_DELIMITER, ';'))
-            roll = tokens[0:index]
-            rolls.append(roll)
-            tokens = tokens[index + 1:]
-        else:
-            rolls.append(tokens)
+        return collect_results(list(self.parse_iter(tokens)))
+
+    def parse_iter(self, tokens: Iterable[TokenInfo]) -> Iterator[Result]:
+        """Parse one or more die rolls, yielding the result of each
+        roll as soon as it has been executed.
 
-        # Parse each roll.
-        results: list[Result] = []
-        for roll in rolls:
+        Since the tokens are only read as far as the end of the roll
+        being parsed, they can come from a generator, such as a
+        lexer reading a long file.
+
+        :param tokens: An iterable of lexed :ref:`YADN` tokens to parse.
+        :return: The result of each roll that produces one.
+        :rtype: Iterator
+        """
+        for roll in self._split_rolls(tokens):
             try:
-                results.append(self._parse_roll(roll))
+                result = self._parse_roll(roll)
             except IsMap:
                 continue
             except NoResult:
                 continue
-
-        # Return the results of the rolls.
-        if len(results) > 1:
-            return CompoundResult(results)
-        elif results:
-            return results[0]
-        return None
+            if isinstance(result, yo.FacePool):
+                result = result.expand()
+            yield result
 
     def _make_tree(self, kind: Token, value: Result) -> Tree:
         """Tranform tokens into trees for execution."""
         return Tree(kind, value, dice_map=self.dice_map)
 
-    def _parse_roll(self, tokens: Sequence[TokenInfo]) -> Result:
-        """Parse a sequence of YADN tokens."""
-        # Parse the tokens into a tree.
+    def _build_tree(self, tokens: Sequence[TokenInfo]) -> Tree:
+        """Parse a sequence of YADN tokens into a tree."""
         trees = [self._make_tree(kind, value) for kind, value in tokens]
         trees = trees[::-1]
         parsed = self.top_rule(trees)
-
-        # Execute the parsed tree.
         if not parsed:
             raise NoResult('The parsed string did not create a Tree.')
-        return parsed.compute()
+        return parsed
+
+    def _parse_roll(self, tokens: Sequence[TokenInfo]) -> Result:
+        """Parse and execute a sequence of YADN tokens."""
+        return self._build_tree(tokens).compute()
+
+    def _split_rolls(
+        self, tokens: Iterable[TokenInfo]
+    ) -> Iterator[list[TokenInfo]]:
+        """Split tokens into individual rolls for parsing.
+
+        The tokens are read once, and each roll is yielded when its
+        delimiter is reached, so splitting takes linear time.
+        """
+        roll: list[TokenInfo] = []
+        for token in tokens:
+            if token[0] is Token.ROLL_DELIMITER and token[1] == ';':
+                yield roll
+                roll = []
+            else:
+                roll.append(token)
+        yield roll
 
     # Parsing rules.
     def _identity(self, trees: list[Tree]) -> Tree:
@@ -12,6 +12,28 @@ from yadr.model import Token, TokenInfo, symbols
 
 class Lexer(BaseLexer):
     """A state machine to lex dice pools in :ref:`YADN` dice notation."""
+    # The tokens allowed to follow each state.
+    follows: dict[Token, tuple[Token, ...]] = {
+        Token.MEMBER_DELIMITER: (
+            Token.NUMBER,
+            Token.NEGATIVE_SIGN,
+            Token.WHITESPACE,
+        ),
+        Token.NUMBER: (
+            Token.MEMBER_DELIMITER,
+            Token.POOL_CLOSE,
+            Token.WHITESPACE,
+        ),
+        Token.POOL: (
+            Token.NUMBER,
+            Token.NEGATIVE_SIGN,
+            Token.WHITESPACE,
+        ),
+        Token.START: (
+            Token.POOL_OPEN,
+        ),
+    }
+
     def __init__(self) -> None:
         state_map: dict[Token, Callable] = {
             Token.NUMBER: self._number,
@@ -55,20 +77,11 @@ class Lexer(BaseLexer):
     # Lexing rules.
     def _member_delimiter(self, char: str) -> None:
         """Lex a member delimiter."""
-        can_follow = [
-            Token.NUMBER,
-            Token.NEGATIVE_SIGN,
-            Token.WHITESPACE,
-        ]
-        self._check_char(char, can_follow)
+        self._check_char(char, self.follows[Token.MEMBER_DELIMITER])
 
     def _number(self, char: str) -> None:
         """Lex a member."""
-        can_follow = [
-            Token.MEMBER_DELIMITER,
-            Token.POOL_CLOSE,
-            Token.WHITESPACE,
-        ]
+        can_follow = self.follows[Token.NUMBER]
 
         # Check here if the character is a digit because the checks in
         # Char are currently limited to tokens that no longer than two
@@ -87,19 +100,11 @@ class Lexer(BaseLexer):
 
     def _pool(self, char: str) -> None:
         """Lex a pool open."""
-        can_follow = [
-            Token.NUMBER,
-            Token.NEGATIVE_SIGN,
-            Token.WHITESPACE,
-        ]
-        self._check_char(char, can_follow)
+        self._check_char(char, self.follows[Token.POOL])
 
     def _start(self, char: str) -> None:
         """Start lexing the string."""
-        can_follow = [
-            Token.POOL_OPEN,
-        ]
-        self._check_char(char, can_follow)
+        self._check_char(char, self.follows[Token.START])
 
 
 class Parser:
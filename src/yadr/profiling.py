@@ -0,0 +1,290 @@
+"""
+profiling
+~~~~~~~~~
+
+Measure where the time goes when rolling :ref:`YADN`.
+
+When profiling is enabled, :func:`yadr.roll` records the wall time
+and the number of calls of each of its phases:
+
+lex
+    Lexing the :ref:`YADN` into tokens.
+map-load
+    Loading dice maps from files.
+parse
+    Parsing the tokens into trees and lowering the trees into
+    instructions.
+compute
+    Running the instructions.
+encode
+    Encoding the results as :ref:`YADN`.
+
+The time of a phase doesn't include the time of any phases run within
+it. Dice maps can be loaded while parsing or computing, for example,
+so that time is only counted in map-load.
+
+It also records the time and calls of each operator, by the symbol of
+the operator. Operators are only timed in rolls compiled while
+profiling is enabled, since the operators are looked up when the
+:ref:`YADN` is compiled. Operators that are run on constants while
+compiling aren't timed, since their results are saved in the
+compiled roll.
+
+Usage::
+
+    >>> import yadr
+    >>> from yadr import profiling
+    >>>
+    >>> with profiling.profile() as profiler:
+    ...     _ = yadr.roll('3d6 + 2')
+    >>> data = profiler.as_dict()
+    >>> data['phases']['lex']['calls']
+    1
+    >>> data['operators']['d']['calls']
+    1
+
+When profiling is disabled, each phase only costs a check of whether
+profiling is enabled.
+
+.. autoclass:: yadr.profiling.Profiler
+    :members:
+.. autofunction:: yadr.profiling.disable
+.. autofunction:: yadr.profiling.enable
+.. autofunction:: yadr.profiling.phase
+.. autofunction:: yadr.profiling.profile
+.. autofunction:: yadr.profiling.timed
+"""
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager, nullcontext
+from threading import Lock, local
+from time import perf_counter_ns
+from types import TracebackType
+from typing import Any, ContextManager, Optional
+
+
+# Types.
+Record = dict[str, dict[str, int]]
+
+
+# The profiler that is recording, if profiling is enabled.
+_active: Optional['Profiler'] = None
+
+# The context returned by phase when profiling is disabled. It's
+# reused so a disabled phase doesn't create anything.
+_disabled = nullcontext()
+
+# The phase each thread is in, so a phase run within another phase
+# can be taken out of the time of the outer phase.
+_current = local()
+
+
+# Public classes.
+class Profiler:
+    """Record the time spent in each phase of rolling and in each
+    operator.
+
+    :return: None.
+    :rtype: NoneType
+    """
+    def __init__(self) -> None:
+        self.phases: dict[str, list[int]] = {}
+        self.operators: dict[str, list[int]] = {}
+        self._lock = Lock()
+
+    def __repr__(self) -> str:
+        name = self.__class__.__name__
+        counts = f'phases={len(self.phases)}, ' \
+            f'operators={len(self.operators)}'
+        return f'{name}({counts})'
+
+    def as_dict(self) -> dict[str, Record]:
+        """Export the recorded times.
+
+        :return: A :class:`dict` with a `phases` and an `operators`
+            :class:`dict`. Each of those has the number of `calls` and
+            the total time in nanoseconds, `ns`, for each phase or
+            operator.
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                'phases': _export(self.phases),
+                'operators': _export(self.operators),
+            }
+
+    def record(self, kind: str, name: str, ns: int) -> None:
+        """Record a call.
+
+        :param kind: Whether the call was a `phase` or an `operator`.
+        :param name: The name of the phase or the symbol of the
+            operator.
+        :param ns: How long the call took in nanoseconds.
+        :return: None.
+        :rtype: NoneType
+        """
+        records = self.phases if kind == 'phase' else self.operators
+        with self._lock:
+            record = records.setdefault(name, [0, 0])
+            record[0] += 1
+            record[1] += ns
+
+    def reset(self) -> None:
+        """Forget all of the recorded times.
+
+        :return: None.
+        :rtype: NoneType
+        """
+        with self._lock:
+            self.phases.clear()
+            self.operators.clear()
+
+    def to_json(self, **kwargs: Any) -> str:
+        """Export the recorded times as JSON.
+
+        :param kwargs: Keyword arguments passed to :func:`json.dumps`.
+        :return: The output of :meth:`Profiler.as_dict` as a
+            :class:`str`.
+        :rtype: str
+        """
+        import json
+
+        return json.dumps(self.as_dict(), **kwargs)
+
+
+class _Phase:
+    """Time a phase when used as a context manager."""
+    __slots__ = ('profiler', 'name', 'start', 'nested', 'outer')
+
+    def __init__(self, profiler: Profiler, name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.start = 0
+        self.nested = 0
+        self.outer: Optional[_Phase] = None
+
+    def __enter__(self) -> None:
+        self.outer = getattr(_current, 'phase', None)
+        _current.phase = self
+        self.start = perf_counter_ns()
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType]
+    ) -> None:
+        ns = perf_counter_ns() - self.start
+        _current.phase = self.outer
+        if self.outer is not None:
+            self.outer.nested += ns
+        self.profiler.record('phase', self.name, ns - self.nested)
+
+
+class _Timed:
+    """Time the calls to an operator.
+
+    This is a class rather than a closure so rolls with timed
+    operators can still be pickled for worker processes.
+    """
+    __slots__ = ('symbol', 'fn')
+
+    def __init__(self, symbol: str, fn: Callable) -> None:
+        self.symbol = symbol
+        self.fn = fn
+
+    def __call__(self, *args: Any) -> Any:
+        profiler = _active
+        if profiler is None:
+            return self.fn(*args)
+        start = perf_counter_ns()
+        try:
+            return self.fn(*args)
+        finally:
+            ns = perf_counter_ns() - start
+            profiler.record('operator', self.symbol, ns)
+
+
+# Public functions.
+def disable() -> Optional[Profiler]:
+    """Stop profiling.
+
+    :return: The :class:`yadr.profiling.Profiler` that was recording,
+        if there was one.
+    :rtype: yadr.profiling.Profiler or NoneType
+    """
+    global _active
+    profiler, _active = _active, None
+    return profiler
+
+
+def enable(profiler: Optional[Profiler] = None) -> Profiler:
+    """Start profiling.
+
+    :param profiler: (Optional.) The profiler to record to. The default
+        is a new :class:`yadr.profiling.Profiler`.
+    :return: The :class:`yadr.profiling.Profiler` that is recording.
+    :rtype: yadr.profiling.Profiler
+    """
+    global _active
+    if profiler is None:
+        profiler = Profiler()
+    _active = profiler
+    return profiler
+
+
+def phase(name: str) -> ContextManager[None]:
+    """Time a phase of rolling, if profiling is enabled.
+
+    :param name: The name of the phase.
+    :return: A context manager that records the time spent in it.
+    :rtype: contextlib.AbstractContextManager
+    """
+    profiler = _active
+    if profiler is None:
+        return _disabled
+    return _Phase(profiler, name)
+
+
+@contextmanager
+def profile(
+    profiler: Optional[Profiler] = None
+) -> Iterator[Profiler]:
+    """Profile the rolls made within a `with` statement.
+
+    :param profiler: (Optional.) The profiler to record to. The default
+        is a new :class:`yadr.profiling.Profiler`.
+    :return: The :class:`yadr.profiling.Profiler` that is recording.
+    :rtype: yadr.profiling.Profiler
+    """
+    previous = _active
+    profiler = enable(profiler)
+    try:
+        yield profiler
+    finally:
+        if previous is None:
+            disable()
+        else:
+            enable(previous)
+
+
+def timed(symbol: str, fn: Callable) -> Callable:
+    """Time the calls to an operator, if profiling is enabled.
+
+    :param symbol: The symbol of the operator.
+    :param fn: The function of the operator.
+    :return: The function, wrapped to record its calls if profiling is
+        enabled.
+    :rtype: collections.abc.Callable
+    """
+    if _active is None:
+        return fn
+    return _Timed(symbol, fn)
+
+
+# Utility functions.
+def _export(records: dict[str, list[int]]) -> Record:
+    """Export the records of phases or operators."""
+    return {
+        name: {'calls': calls, 'ns': ns}
+        for name, (calls, ns) in sorted(records.items())
+    }
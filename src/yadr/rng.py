@@ -0,0 +1,221 @@
+"""
+rng
+~~~
+
+Random number generators used to roll dice.
+
+Each backend wraps a source of randomness behind the same small
+interface, so a :class:`yadr.Roller` can roll dice with whichever
+source fits the job.
+"""
+import os
+import random
+from abc import ABC, abstractmethod
+from typing import Any, Optional
+
+
+# Base class.
+class Backend(ABC):
+    """An abstract base class for random number generators.
+
+    Subclasses need to provide :meth:`Backend.below` and
+    :meth:`Backend.random`. The other methods are built on those, but
+    can be replaced if the source has a faster way to do them.
+    """
+    @abstractmethod
+    def below(self, num: int) -> int:
+        """Get a random integer from zero up to, but not including,
+        the given number.
+
+        :param num: The upper bound.
+        :return: An :class:`int` object.
+        :rtype: int
+        """
+
+    @abstractmethod
+    def random(self) -> float:
+        """Get a random float from zero up to, but not including, one.
+
+        :return: A :class:`float` object.
+        :rtype: float
+        """
+
+    def pool(self, num: int, size: int) -> tuple[int, ...]:
+        """Roll a number of dice.
+
+        :param num: The number of dice to roll.
+        :param size: The highest number that can be rolled on a die.
+        :return: The values as a :class:`tuple`.
+        :rtype: tuple
+        """
+        return tuple(self.roll(size) for _ in range(num))
+
+    def roll(self, size: int) -> int:
+        """Roll a die.
+
+        :param size: The highest number that can be rolled on a die.
+        :return: An :class:`int` object.
+        :rtype: int
+        """
+        if size < 1:
+            msg = f'Dice must have at least one side. Was {size}.'
+            raise ValueError(msg)
+        return self.below(size) + 1
+
+    def shuffle(self, values: list[Any]) -> None:
+        """Shuffle a list in place.
+
+        :param values: The list to shuffle.
+        :return: None.
+        :rtype: NoneType
+        """
+        for i in reversed(range(1, len(values))):
+            j = self.below(i + 1)
+            values[i], values[j] = values[j], values[i]
+
+
+# Backends.
+class RandomBackend(Backend):
+    """Roll dice with a private :class:`random.Random` instance.
+
+    :param seed: (Optional.) The seed for the generator.
+    :return: A :class:`yadr.rng.RandomBackend` object.
+    :rtype: yadr.rng.RandomBackend
+    """
+    def __init__(self, seed: Optional[int | str | bytes] = None) -> None:
+        self.generator = random.Random(seed)
+
+    def below(self, num: int) -> int:
+        return self.generator.randrange(num)
+
+    def random(self) -> float:
+        return self.generator.random()
+
+    def roll(self, size: int) -> int:
+        return self.generator.randint(1, size)
+
+    def shuffle(self, values: list[Any]) -> None:
+        self.generator.shuffle(values)
+
+
+class NumpyBackend(Backend):
+    """Roll dice with a :class:`numpy.random.Generator`.
+
+    :param seed: (Optional.) The seed for the generator.
+    :param bit_generator: (Optional.) The name of the
+        :mod:`numpy.random` bit generator to use. The default is
+        `PCG64`. `Philox` is also a good choice when each worker needs
+        its own independent stream.
+    :return: A :class:`yadr.rng.NumpyBackend` object.
+    :rtype: yadr.rng.NumpyBackend
+
+    Rolling one die at a time with :mod:`numpy` is slower than with
+    :mod:`random`, but rolling a pool of dice is much faster.
+
+    .. note::
+        This requires :mod:`numpy`.
+    """
+    def __init__(
+        self,
+        seed: Optional[int] = None,
+        bit_generator: str = 'PCG64'
+    ) -> None:
+        import numpy as np
+        bits = getattr(np.random, bit_generator)(seed)
+        self.generator = np.random.Generator(bits)
+
+    def below(self, num: int) -> int:
+        return int(self.generator.integers(num))
+
+    def pool(self, num: int, size: int) -> tuple[int, ...]:
+        if size < 1:
+            msg = f'Dice must have at least one side. Was {size}.'
+            raise ValueError(msg)
+        values = self.generator.integers(1, size + 1, max(num, 0))
+        return tuple(values.tolist())
+
+    def random(self) -> float:
+        return float(self.generator.random())
+
+    def shuffle(self, values: list[Any]) -> None:
+        order = self.generator.permutation(len(values)).tolist()
+        values[:] = [values[i] for i in order]
+
+
+class SecretsBackend(Backend):
+    """Roll dice with :mod:`secrets`.
+
+    :return: A :class:`yadr.rng.SecretsBackend` object.
+    :rtype: yadr.rng.SecretsBackend
+
+    The extra security provided by :mod:`secrets` is unnecessary for
+    the intended usage of :mod:`yadr`, but it's here if you want it.
+    It can't be seeded.
+    """
+    def __init__(self) -> None:
+        # The secrets module is a thin layer over SystemRandom, so it's
+        # used directly rather than importing secrets with this module.
+        self.generator = random.SystemRandom()
+
+    def below(self, num: int) -> int:
+        return self.generator.randrange(num)
+
+    def random(self) -> float:
+        return self.generator.random()
+
+    def shuffle(self, values: list[Any]) -> None:
+        self.generator.shuffle(values)
+
+
+class UrandomBackend(Backend):
+    """Roll dice with bytes read from :func:`os.urandom`.
+
+    :param buffer_size: (Optional.) The number of bytes to read from
+        the operating system at a time.
+    :return: A :class:`yadr.rng.UrandomBackend` object.
+    :rtype: yadr.rng.UrandomBackend
+
+    Reading from the operating system is slow, so bytes are read in
+    blocks and kept until they are used. It can't be seeded.
+    """
+    def __init__(self, buffer_size: int = 4096) -> None:
+        self.buffer_size = buffer_size
+        self._buffer = b''
+        self._index = 0
+
+    def below(self, num: int) -> int:
+        if num < 1:
+            raise ValueError('Upper bound must be positive.')
+
+        # Numbers that don't fit evenly in the bits read are thrown out,
+        # so every number has the same chance of being chosen.
+        bits = (num - 1).bit_length()
+        length = (bits + 7) // 8
+        while True:
+            value = int.from_bytes(self._read(length), 'little')
+            value >>= length * 8 - bits
+            if value < num:
+                return value
+
+    def random(self) -> float:
+        value = int.from_bytes(self._read(7), 'little') >> 3
+        return value / (1 << 53)
+
+    def _read(self, length: int) -> bytes:
+        """Read bytes from the buffer, refilling it when needed."""
+        if self._index + length > len(self._buffer):
+            rest = self._buffer[self._index:]
+            self._buffer = rest + os.urandom(max(self.buffer_size, length))
+            self._index = 0
+        start = self._index
+        self._index += length
+        return self._buffer[start:self._index]
+
+
+# Registration.
+backends: dict[str, type[Backend]] = {
+    'numpy': NumpyBackend,
+    'random': RandomBackend,
+    'secrets': SecretsBackend,
+    'urandom': UrandomBackend,
+}
@@ -0,0 +1,873 @@
+"""
+server
+~~~~~~
+
+A long running server that rolls :ref:`YADN` sent to it as JSON.
+
+Starting :mod:`yadr` for every roll means importing it, loading the
+dice maps, and lexing and parsing the :ref:`YADN` each time. A program
+that rolls a lot of dice, like a chat bot, can instead start a server
+once and send it each roll::
+
+    $ yadr serve --socket /tmp/yadr.sock
+    $ curl --unix-socket /tmp/yadr.sock -d '{"yadn": "3d6"}' \\
+    >     http://localhost/roll
+    {"result": 11, "yadn": "11"}
+
+The server keeps the default dice maps loaded, and it keeps the most
+recently rolled :ref:`YADN` compiled, so rolling the same :ref:`YADN`
+again only has to roll the dice.
+
+The server speaks a small subset of HTTP/1.1 with JSON bodies, over
+either a Unix domain socket or a TCP port on `127.0.0.1`. It only
+listens on the local machine, since it has no authentication. So web
+pages open in a browser on the machine can't send it rolls, requests
+with a `Host` header other than the local machine or an `Origin`
+header from anywhere else are refused.
+
+The :ref:`YADN` sent to the server may come from people who shouldn't
+be trusted, like the users of a chat bot. Some :ref:`YADN`, like
+`7^100000000`, takes a very long time to roll. So, rolls are made in
+worker processes, and a roll that takes longer than the timeout is
+stopped by stopping its worker.
+
+Requests
+--------
+`POST /roll`
+    Roll the :ref:`YADN` in the `yadn` key of the request. The
+    `session` key names the session whose dice maps are used for the
+    roll, and the `seed` key gives the seed for the roll. Both are
+    optional. The response has the result as JSON in the `result` key
+    and as :ref:`YADN` in the `yadn` key.
+`POST /maps`
+    Add the dice maps defined by the :ref:`YADN` in the `maps` key of
+    the request to the session named by the `session` key. The response
+    has the names of the session's dice maps in the `maps` key.
+`DELETE /maps`
+    Forget the dice maps of the session named by the `session` key.
+`GET /maps`
+    Get the names of the default dice maps in the `maps` key.
+
+A session lets each user of the server, like each channel a chat bot is
+in, have its own dice maps without changing the dice maps of the other
+sessions. Rolling with a session that has no dice maps uses the default
+dice maps. Only the most recently used sessions are kept, so a session
+that isn't used for a long time can lose its dice maps.
+
+A request that can't be completed gets a response with an error status
+and a description of the error in the `error` key. The status is `400`
+if the request or its :ref:`YADN` is wrong, `504` if the roll took
+longer than the timeout, and `500` if the error is in the server.
+
+.. autoclass:: yadr.server.RollServer
+    :members:
+.. autofunction:: yadr.server.main
+.. autofunction:: yadr.server.serve
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import traceback
+from argparse import ArgumentParser
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+from multiprocessing.connection import Connection
+from typing import Any, Optional
+
+from yadr.encode import Encoder
+from yadr.maps import load_default_maps, overlay_maps, parse_map
+from yadr.model import DiceMapping
+from yadr.yadr import CompiledRoll, _compile
+
+
+# Types.
+Handler = Callable[['RollServer', dict[str, Any]], dict[str, Any]]
+
+# The port the server listens on if none is given.
+DEFAULT_PORT = 8765
+
+# The number of compiled rolls kept for each session.
+CACHE_SIZE = 256
+
+# The number of sessions with dice maps kept.
+MAX_SESSIONS = 1024
+
+# The largest request body the server will read, in bytes.
+MAX_BODY = 64 * 1024
+
+# The most headers the server will read for a request.
+MAX_HEADERS = 64
+
+# The most seconds a roll can take before it is stopped.
+TIMEOUT = 5.0
+
+# The names of the local machine that requests can be sent to.
+LOCAL_HOSTS = ('localhost', '127.0.0.1', '[::1]')
+
+# The reasons sent with each status the server responds with.
+REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    403: 'Forbidden',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Content Too Large',
+    431: 'Request Header Fields Too Large',
+    500: 'Internal Server Error',
+    504: 'Gateway Timeout',
+}
+
+# The errors raised by YADN that can't be rolled. These are the
+# client's errors. Any other error is an error in the server.
+YADN_ERRORS = (
+    ArithmeticError,
+    LookupError,
+    RecursionError,
+    TypeError,
+    ValueError,
+)
+
+
+# Exceptions.
+class RequestError(ValueError):
+    """A request couldn't be completed.
+
+    :param msg: The description of the error.
+    :param status: (Optional.) The HTTP status of the response. The
+        default is `400`.
+    """
+    def __init__(self, msg: str, status: int = 400) -> None:
+        super().__init__(msg)
+        self.status = status
+
+
+# Public classes.
+class RollServer:
+    """Roll :ref:`YADN` for the clients of a server.
+
+    :param cache_size: (Optional.) The number of compiled rolls kept
+        for each session. The default is :data:`CACHE_SIZE`.
+    :param max_sessions: (Optional.) The number of sessions with dice
+        maps kept. The default is :data:`MAX_SESSIONS`.
+    :param timeout: (Optional.) The most seconds a roll can take. The
+        default is :data:`TIMEOUT`. If it's `None`, rolls are made in
+        the server's process and can take any amount of time.
+    :param workers: (Optional.) The most worker processes rolling at
+        once. The default is the number of CPUs.
+    :return: A :class:`yadr.server.RollServer` object.
+    :rtype: yadr.server.RollServer
+
+    The methods that roll and manage dice maps can be called directly,
+    which is how the server completes requests. Call :meth:`start` to
+    listen for requests, and :meth:`close` to stop the workers when
+    the server is done.
+
+    When there are too many sessions, the dice maps of the session
+    that was used least recently are forgotten.
+
+    Requests are completed in worker threads, so a roll that takes a
+    long time doesn't stop the server from reading and answering the
+    requests of other clients. If there is a timeout, each roll is
+    sent to a worker process. The worker keeps its own compiled rolls,
+    and it is stopped and replaced if a roll takes longer than the
+    timeout.
+
+    Usage::
+
+        >>> server = RollServer()
+        >>> server.roll('3d6', seed=1)['result']    # doctest: +SKIP
+        9
+        >>> server.add_maps('{"coin"=1:"tails",2:"heads"}', 'chat')
+        ['coin']
+        >>> result = server.roll('1d2m"coin"', 'chat')
+        >>> result['result'] in ('heads', 'tails')
+        True
+    """
+    def __init__(
+        self,
+        cache_size: int = CACHE_SIZE,
+        max_sessions: int = MAX_SESSIONS,
+        timeout: Optional[float] = TIMEOUT,
+        workers: Optional[int] = None
+    ) -> None:
+        if cache_size < 1:
+            msg = f'The cache size must be at least 1, not {cache_size}.'
+            raise ValueError(msg)
+        if max_sessions < 1:
+            msg = (
+                'The maximum number of sessions must be at least 1, '
+                f'not {max_sessions}.'
+            )
+            raise ValueError(msg)
+        if timeout is not None and timeout <= 0:
+            msg = f'The timeout must be more than 0, not {timeout}.'
+            raise ValueError(msg)
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers < 1:
+            msg = f'The number of workers must be at least 1, not {workers}.'
+            raise ValueError(msg)
+        self.cache_size = cache_size
+        self.max_sessions = max_sessions
+        self.timeout = timeout
+        self.workers = workers
+        self.sessions: OrderedDict[str, dict[str, DiceMapping]]
+        self.sessions = OrderedDict()
+        self._compiled: dict[
+            Optional[str],
+            OrderedDict[str, CompiledRoll]
+        ] = {}
+        self._lock = threading.Lock()
+        self._idle: list[_Worker] = []
+        self._slots = threading.BoundedSemaphore(workers)
+
+    def __repr__(self) -> str:
+        name = self.__class__.__name__
+        return f'{name}(sessions={len(self.sessions)})'
+
+    def add_maps(self, yadn: str, session: str) -> list[str]:
+        """Add dice maps to a session.
+
+        :param yadn: The :ref:`YADN` defining the dice maps, with each
+            dice map separated by a semicolon.
+        :param session: The name of the session.
+        :return: The names of the session's dice maps as a
+            :class:`list`.
+        :rtype: list
+        """
+        new_maps = parse_map(yadn)
+
+        # The maps are replaced rather than changed, so rolls already
+        # compiled with the old maps keep using them while they are
+        # rolled. Those rolls are dropped from the cache.
+        with self._lock:
+            maps_ = {**self.sessions.get(session, {}), **new_maps}
+            self.sessions[session] = maps_
+            self.sessions.move_to_end(session)
+            self._compiled.pop(session, None)
+            if len(self.sessions) > self.max_sessions:
+                oldest, _ = self.sessions.popitem(last=False)
+                self._compiled.pop(oldest, None)
+        return list(maps_)
+
+    def close(self) -> None:
+        """Stop the worker processes that aren't rolling.
+
+        :return: `None`.
+        :rtype: NoneType
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.stop()
+
+    def clear_maps(self, session: str) -> None:
+        """Forget the dice maps of a session.
+
+        :param session: The name of the session.
+        :return: `None`.
+        :rtype: NoneType
+        """
+        with self._lock:
+            self.sessions.pop(session, None)
+            self._compiled.pop(session, None)
+
+    def compile(
+        self,
+        yadn: str,
+        session: Optional[str] = None
+    ) -> CompiledRoll:
+        """Get the compiled roll for :ref:`YADN`, compiling it if it
+        hasn't been compiled recently.
+
+        :param yadn: The :ref:`YADN` to compile.
+        :param session: (Optional.) The name of the session whose dice
+            maps are used.
+        :return: A :class:`yadr.yadr.CompiledRoll` object.
+        :rtype: yadr.yadr.CompiledRoll
+        """
+        # Sessions without dice maps share the compiled rolls that
+        # only use the default dice maps.
+        with self._lock:
+            dice_map = None
+            if session is not None and session in self.sessions:
+                dice_map = self.sessions[session]
+                self.sessions.move_to_end(session)
+            if dice_map is None:
+                session = None
+            cache = self._compiled.setdefault(session, OrderedDict())
+            if yadn in cache:
+                cache.move_to_end(yadn)
+                return cache[yadn]
+
+        # The lock isn't held while compiling, so other requests don't
+        # wait for it.
+        compiled = _compile(yadn, overlay_maps(dice_map))
+        with self._lock:
+            cache[yadn] = compiled
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)
+        return compiled
+
+    def roll(
+        self,
+        yadn: str,
+        session: Optional[str] = None,
+        seed: Optional[int] = None
+    ) -> dict[str, Any]:
+        """Roll :ref:`YADN`.
+
+        :param yadn: The :ref:`YADN` to roll.
+        :param session: (Optional.) The name of the session whose dice
+            maps are used.
+        :param seed: (Optional.) The seed for the roll.
+        :return: The result as JSON in the `result` key and as
+            :ref:`YADN` in the `yadn` key of a :class:`dict`.
+        :rtype: dict
+
+        If the server has a timeout, the roll is made by a worker
+        process, and :class:`yadr.server.RequestError` is raised if it
+        takes longer than the timeout.
+        """
+        if self.timeout is None:
+            return self._roll(yadn, session, seed)
+
+        # The worker is sent the session's dice maps with the roll, so
+        # it only needs to keep its compiled rolls.
+        with self._lock:
+            dice_map = None
+            if session is not None and session in self.sessions:
+                dice_map = self.sessions[session]
+                self.sessions.move_to_end(session)
+        request = (yadn, session, dice_map, seed)
+        with self._slots:
+            with self._lock:
+                worker = self._idle.pop() if self._idle else None
+            if worker is None:
+                worker = _Worker(self.cache_size, self.max_sessions)
+            try:
+                return worker.roll(request, self.timeout)
+            finally:
+                if not worker.stopped:
+                    with self._lock:
+                        self._idle.append(worker)
+
+    async def handle(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter
+    ) -> None:
+        """Respond to the requests sent over a connection until it is
+        closed.
+
+        :param reader: The stream the requests are read from.
+        :param writer: The stream the responses are written to.
+        :return: `None`.
+        :rtype: NoneType
+        """
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    request = await _read_request(reader)
+                except RequestError as ex:
+                    writer.write(_response(ex.status, {'error': str(ex)}))
+                    break
+                if request is None:
+                    break
+                method, path, keep_alive, body = request
+                response = await asyncio.to_thread(
+                    self._answer, method, path, body, keep_alive
+                )
+                writer.write(response)
+                await writer.drain()
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def respond(
+        self,
+        method: str,
+        path: str,
+        body: bytes
+    ) -> tuple[int, dict[str, Any]]:
+        """Complete a request.
+
+        :param method: The HTTP method of the request.
+        :param path: The path of the request.
+        :param body: The body of the request.
+        :return: The HTTP status and the JSON data of the response as
+            a :class:`tuple`.
+        :rtype: tuple
+        """
+        try:
+            if path not in routes:
+                raise RequestError(f'Unknown path {path}.', 404)
+            if method not in routes[path]:
+                msg = f'{path} does not allow {method}.'
+                raise RequestError(msg, 405)
+            return 200, routes[path][method](self, _parse_body(body))
+        except RequestError as ex:
+            return ex.status, {'error': str(ex)}
+        except YADN_ERRORS as ex:
+            name = type(ex).__name__
+            return 400, {'error': f'{name}: {ex}'}
+
+        # An error in the server shouldn't stop it from answering
+        # other requests.
+        except Exception as ex:
+            traceback.print_exc()
+            name = type(ex).__name__
+            return 500, {'error': f'{name}: {ex}'}
+
+    async def start(
+        self,
+        path: Optional[str] = None,
+        port: int = DEFAULT_PORT
+    ) -> asyncio.AbstractServer:
+        """Start listening for requests.
+
+        :param path: (Optional.) The path of a Unix domain socket to
+            listen on. If it isn't given, the server listens on a port
+            of `127.0.0.1`.
+        :param port: (Optional.) The port to listen on if no path is
+            given. The default is :data:`DEFAULT_PORT`. If the port is
+            `0`, a free port is chosen.
+        :return: A :class:`asyncio.Server` object.
+        :rtype: asyncio.Server
+        """
+        # Load the default dice maps now, so the first request doesn't
+        # have to wait for them.
+        load_default_maps()
+        if path is not None:
+            return await asyncio.start_unix_server(self.handle, path)
+        return await asyncio.start_server(self.handle, '127.0.0.1', port)
+
+    def _roll(
+        self,
+        yadn: str,
+        session: Optional[str],
+        seed: Optional[int]
+    ) -> dict[str, Any]:
+        """Roll :ref:`YADN` in this process."""
+        compiled = self.compile(yadn, session)
+        result = compiled.roll(seed=seed)
+        return {
+            'result': result,
+            'yadn': Encoder().encode(result),
+        }
+
+    def _set_maps(
+        self,
+        session: str,
+        dice_map: dict[str, DiceMapping]
+    ) -> None:
+        """Give a session the dice maps it has in the server, dropping
+        its compiled rolls if the dice maps changed.
+        """
+        with self._lock:
+            if self.sessions.get(session) != dice_map:
+                self.sessions[session] = dice_map
+                self._compiled.pop(session, None)
+            self.sessions.move_to_end(session)
+            if len(self.sessions) > self.max_sessions:
+                oldest, _ = self.sessions.popitem(last=False)
+                self._compiled.pop(oldest, None)
+
+    def _answer(
+        self,
+        method: str,
+        path: str,
+        body: bytes,
+        keep_alive: bool
+    ) -> bytes:
+        """Complete a request and build its response."""
+        status, data = self.respond(method, path, body)
+        return _response(status, data, keep_alive)
+
+
+class _Worker:
+    """A process that rolls for a server, so a roll that takes too long
+    can be stopped.
+    """
+    def __init__(self, cache_size: int, max_sessions: int) -> None:
+        # The server has threads running, so the worker is spawned
+        # rather than forked. A forked worker could copy a lock held by
+        # another thread and never be able to take it.
+        context = multiprocessing.get_context('spawn')
+        self.conn, child = context.Pipe()
+        self.process = context.Process(
+            target=_work,
+            args=(child, cache_size, max_sessions),
+            daemon=True
+        )
+        self.process.start()
+        child.close()
+        self.stopped = False
+
+        # Wait for the worker to load, so starting it doesn't count
+        # against the timeout of the first roll.
+        self.conn.recv()
+
+    def roll(
+        self,
+        request: tuple[str, Optional[str], Any, Optional[int]],
+        timeout: float
+    ) -> dict[str, Any]:
+        """Send a roll to the worker and wait for the result."""
+        self.conn.send(request)
+        if not self.conn.poll(timeout):
+            self.stop()
+            msg = f'The roll took longer than {timeout:g} seconds.'
+            raise RequestError(msg, 504)
+        try:
+            ok, value = self.conn.recv()
+        except EOFError:
+            self.stop()
+            raise RuntimeError('The worker stopped before the roll ended.')
+        if not ok:
+            raise value
+        return value
+
+    def stop(self) -> None:
+        """Stop the worker."""
+        self.stopped = True
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+# Request handlers.
+def _get_maps(server: RollServer, data: dict[str, Any]) -> dict[str, Any]:
+    return {'maps': list(load_default_maps())}
+
+
+def _add_maps(server: RollServer, data: dict[str, Any]) -> dict[str, Any]:
+    session = _get(data, 'session', str)
+    maps_ = server.add_maps(_get(data, 'maps', str), session)
+    return {'session': session, 'maps': maps_}
+
+
+def _clear_maps(server: RollServer, data: dict[str, Any]) -> dict[str, Any]:
+    session = _get(data, 'session', str)
+    server.clear_maps(session)
+    return {'session': session, 'maps': []}
+
+
+def _roll(server: RollServer, data: dict[str, Any]) -> dict[str, Any]:
+    return server.roll(
+        _get(data, 'yadn', str),
+        _get(data, 'session', str, True),
+        _get(data, 'seed', int, True)
+    )
+
+
+routes: dict[str, dict[str, Handler]] = {
+    '/maps': {
+        'DELETE': _clear_maps,
+        'GET': _get_maps,
+        'POST': _add_maps,
+    },
+    '/roll': {
+        'POST': _roll,
+    },
+}
+
+
+# Public functions.
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Run the server from the command line.
+
+    :param argv: (Optional.) The command line arguments. The default
+        is the arguments the script was run with.
+    :return: `None`.
+    :rtype: NoneType
+
+    The server runs until it is interrupted or sent `SIGTERM`.
+    """
+    p = ArgumentParser(
+        description='Roll YADN sent as JSON over HTTP.',
+        prog='yadr serve'
+    )
+    p.add_argument(
+        '--socket', '-u',
+        help='Listen on the Unix domain socket at this path.',
+        metavar='PATH',
+        action='store',
+        type=str
+    )
+    p.add_argument(
+        '--port', '-p',
+        help='Listen on this port of 127.0.0.1 if no socket is given.',
+        action='store',
+        type=int,
+        default=DEFAULT_PORT
+    )
+    p.add_argument(
+        '--cache_size', '-c',
+        help='The number of compiled rolls kept for each session.',
+        action='store',
+        type=int,
+        default=CACHE_SIZE
+    )
+    p.add_argument(
+        '--max_sessions', '-s',
+        help='The number of sessions with dice maps kept.',
+        action='store',
+        type=int,
+        default=MAX_SESSIONS
+    )
+    p.add_argument(
+        '--timeout', '-t',
+        help=(
+            'The most seconds a roll can take. Use 0 to roll in the '
+            'server process without a limit.'
+        ),
+        action='store',
+        type=float,
+        default=TIMEOUT
+    )
+    p.add_argument(
+        '--workers', '-w',
+        help='The most worker processes rolling at once.',
+        action='store',
+        type=int
+    )
+    args = p.parse_args(argv)
+    if args.cache_size < 1:
+        p.error('--cache_size must be at least 1.')
+    if args.max_sessions < 1:
+        p.error('--max_sessions must be at least 1.')
+    if args.timeout < 0:
+        p.error('--timeout must not be negative.')
+    if args.workers is not None and args.workers < 1:
+        p.error('--workers must be at least 1.')
+
+    try:
+        asyncio.run(serve(
+            args.socket,
+            args.port,
+            args.cache_size,
+            args.max_sessions,
+            args.timeout or None,
+            args.workers
+        ))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+
+
+async def serve(
+    path: Optional[str] = None,
+    port: int = DEFAULT_PORT,
+    cache_size: int = CACHE_SIZE,
+    max_sessions: int = MAX_SESSIONS,
+    timeout: Optional[float] = TIMEOUT,
+    workers: Optional[int] = None
+) -> None:
+    """Run a server until it is cancelled.
+
+    :param path: (Optional.) The path of a Unix domain socket to
+        listen on. If it isn't given, the server listens on a port of
+        `127.0.0.1`.
+    :param port: (Optional.) The port to listen on if no path is
+        given. The default is :data:`DEFAULT_PORT`.
+    :param cache_size: (Optional.) The number of compiled rolls kept
+        for each session. The default is :data:`CACHE_SIZE`.
+    :param max_sessions: (Optional.) The number of sessions with dice
+        maps kept. The default is :data:`MAX_SESSIONS`.
+    :param timeout: (Optional.) The most seconds a roll can take, or
+        `None` for no limit. The default is :data:`TIMEOUT`.
+    :param workers: (Optional.) The most worker processes rolling at
+        once. The default is the number of CPUs.
+    :return: `None`.
+    :rtype: NoneType
+    """
+    # Stopping the server with SIGTERM cleans up like an interrupt.
+    task = asyncio.current_task()
+    if task is not None:
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGTERM, task.cancel)
+
+    roller = RollServer(cache_size, max_sessions, timeout, workers)
+    server = await roller.start(path, port)
+    address = path if path is not None else f'127.0.0.1:{port}'
+    print(f'yadr: listening on {address}', file=sys.stderr, flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        roller.close()
+        if path is not None and os.path.exists(path):
+            os.remove(path)
+
+
+# Utility functions.
+def _work(conn: Connection, cache_size: int, max_sessions: int) -> None:
+    """Roll the requests sent to a worker process until the server
+    closes its end of the connection.
+    """
+    server = RollServer(cache_size, max_sessions, timeout=None)
+    load_default_maps()
+    conn.send(None)
+    while True:
+        try:
+            yadn, session, dice_map, seed = conn.recv()
+        except EOFError:
+            return
+        try:
+            if dice_map is None:
+                session = None
+            else:
+                server._set_maps(session, dice_map)
+            conn.send((True, server._roll(yadn, session, seed)))
+
+        # Errors are raised again in the server. Not every error can
+        # be pickled, so those are sent as their description.
+        except Exception as ex:
+            try:
+                conn.send((False, ex))
+            except Exception:
+                name = type(ex).__name__
+                conn.send((False, RuntimeError(f'{name}: {ex}')))
+
+
+def _get(
+    data: dict[str, Any],
+    key: str,
+    type_: type,
+    optional: bool = False
+) -> Any:
+    """Get a value from the data of a request."""
+    value = data.get(key)
+    if value is None and optional:
+        return None
+    if value is None:
+        raise RequestError(f'The request has no {key}.')
+
+    # Booleans are ints in Python, but not in JSON.
+    if not isinstance(value, type_) or isinstance(value, bool):
+        msg = (
+            f'The {key} must be of type {type_.__name__}, '
+            f'not {value!r}.'
+        )
+        raise RequestError(msg)
+    return value
+
+
+def _check_origin(headers: dict[str, str]) -> None:
+    """Refuse requests that weren't sent to the local machine or that
+    come from a web page somewhere else. Clients that aren't browsers
+    don't have to send the headers.
+    """
+    host = headers.get('host')
+    if host is not None and _host_name(host) not in LOCAL_HOSTS:
+        raise RequestError(f'Requests to {host} are not allowed.', 403)
+    origin = headers.get('origin')
+    if origin is not None:
+        scheme, _, host = origin.partition('://')
+        local = _host_name(host) in LOCAL_HOSTS
+        if scheme not in ('http', 'https') or not local:
+            msg = f'Requests from {origin} are not allowed.'
+            raise RequestError(msg, 403)
+
+
+def _host_name(host: str) -> str:
+    """Get the name of a host without its port."""
+    host = host.lower()
+    if host.startswith('['):
+        return host.partition(']')[0] + ']'
+    return host.partition(':')[0]
+
+
+def _parse_body(body: bytes) -> dict[str, Any]:
+    """Parse the JSON body of a request."""
+    if not body:
+        return {}
+    try:
+        data = json.loads(body)
+    except ValueError as ex:
+        raise RequestError(f'The request is not valid JSON: {ex}')
+    if not isinstance(data, dict):
+        raise RequestError('The request must be a JSON object.')
+    return data
+
+
+async def _read_request(
+    reader: asyncio.StreamReader
+) -> Optional[tuple[str, str, bool, bytes]]:
+    """Read the method, path, whether to keep the connection open, and
+    body of a request. If the connection was closed before a request
+    was sent, return `None`.
+    """
+    try:
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, path, version = line.decode('latin-1').split()
+        except ValueError:
+            raise RequestError('The request line is malformed.')
+
+        headers = {}
+        for _ in range(MAX_HEADERS + 1):
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        else:
+            msg = f'The request must have at most {MAX_HEADERS} headers.'
+            raise RequestError(msg, 431)
+    except RequestError:
+        raise
+    except ValueError:
+        raise RequestError('The request headers are too long.', 413)
+    _check_origin(headers)
+
+    try:
+        length = int(headers.get('content-length', '0'))
+    except ValueError:
+        raise RequestError('The content length is not a number.')
+    if length < 0:
+        msg = f'The content length must not be negative, not {length}.'
+        raise RequestError(msg)
+    if length > MAX_BODY:
+        msg = f'The request body must be at most {MAX_BODY} bytes.'
+        raise RequestError(msg, 413)
+    body = await reader.readexactly(length)
+
+    # HTTP/1.1 connections stay open unless the client closes them.
+    connection = headers.get('connection', '').lower()
+    if version == 'HTTP/1.1':
+        keep_alive = connection != 'close'
+    else:
+        keep_alive = connection == 'keep-alive'
+    return method, path.partition('?')[0], keep_alive, body
+
+
+def _response(
+    status: int,
+    data: dict[str, Any],
+    keep_alive: bool = False
+) -> bytes:
+    """Build the response to a request."""
+    body = json.dumps(data).encode('utf8')
+    lines = [
+        f'HTTP/1.1 {status} {REASONS[status]}',
+        'Content-Type: application/json',
+        f'Content-Length: {len(body)}',
+    ]
+    if not keep_alive:
+        lines.append('Connection: close')
+    head = '\r\n'.join(lines) + '\r\n\r\n'
+    return head.encode('latin-1') + body
+
+
+if __name__ == '__main__':
+    main()
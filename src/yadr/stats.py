@@ -0,0 +1,160 @@
+"""
+stats
+~~~~~
+
+Summary statistics for :ref:`YADN` rolled many times.
+
+:func:`yadr.roll_stats` rolls each roll of the :ref:`YADN` many times
+and counts how often each result was rolled. Dice only have a few
+possible results, so the statistics are found from those counts
+rather than from every result.
+
+Usage::
+
+    >>> from yadr.stats import Summary
+    >>>
+    >>> summary = Summary({1: 1, 2: 2, 3: 1})
+    >>> summary.mean
+    2.0
+    >>> summary.percentile(95)
+    3
+    >>> print(summary.report())
+    rolls  4
+    mean   2.0000
+    std    0.7071
+    min    1
+    max    3
+    p5     1
+    p25    1
+    p50    2
+    p75    2
+    p95    3
+    <BLANKLINE>
+    result  count        %
+         1      1   25.00%  ####################
+         2      2   50.00%  ########################################
+         3      1   25.00%  ####################
+
+.. autoclass:: yadr.stats.Summary
+    :members:
+"""
+from collections.abc import Mapping
+from math import ceil, sqrt
+
+
+# The percentiles shown by Summary.report.
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# The number of characters in the longest bar of a histogram.
+HISTOGRAM_WIDTH = 40
+
+
+# Public classes.
+class Summary:
+    """The statistics for the results of a roll rolled many times.
+
+    :param counts: The number of times each result was rolled.
+    :return: A :class:`yadr.stats.Summary` object.
+    :rtype: yadr.stats.Summary
+
+    Only numbers and booleans can be summarized. Booleans count as `1`
+    and `0`.
+    """
+    def __init__(self, counts: Mapping[int, int]) -> None:
+        for result in counts:
+            if not isinstance(result, int):
+                msg = (
+                    'Only rolls with numbers as results can be '
+                    f'summarized, not {type(result).__name__}.'
+                )
+                raise ValueError(msg)
+        if not counts:
+            raise ValueError('There are no results to summarize.')
+        self.counts = tuple(sorted(counts.items()))
+
+    def __repr__(self) -> str:
+        name = self.__class__.__name__
+        return f'{name}(rolls={self.rolls})'
+
+    @property
+    def rolls(self) -> int:
+        """The number of times the roll was rolled."""
+        return sum(count for _, count in self.counts)
+
+    @property
+    def mean(self) -> float:
+        """The mean of the results."""
+        total = sum(result * count for result, count in self.counts)
+        return total / self.rolls
+
+    @property
+    def std(self) -> float:
+        """The standard deviation of the results."""
+        mean = self.mean
+        squares = sum(
+            count * (result - mean) ** 2
+            for result, count in self.counts
+        )
+        return sqrt(squares / self.rolls)
+
+    @property
+    def min(self) -> int:
+        """The lowest result."""
+        return self.counts[0][0]
+
+    @property
+    def max(self) -> int:
+        """The highest result."""
+        return self.counts[-1][0]
+
+    def percentile(self, percent: float) -> int:
+        """Find the result that the given percent of the results are
+        less than or equal to.
+
+        :param percent: The percentile from `0` to `100`.
+        :return: The result as an :class:`int`.
+        :rtype: int
+
+        Since results are whole numbers, this is the nearest rank
+        rather than an interpolation between ranks.
+        """
+        if not 0 <= percent <= 100:
+            msg = f'Percentiles must be from 0 to 100, not {percent}.'
+            raise ValueError(msg)
+        rank = max(ceil(percent / 100 * self.rolls), 1)
+        seen = 0
+        for result, count in self.counts:
+            seen += count
+            if seen >= rank:
+                break
+        return result
+
+    def report(self) -> str:
+        """Describe the results as text.
+
+        :return: The statistics followed by a table of how often each
+            result was rolled with a histogram, as a :class:`str`.
+        :rtype: str
+        """
+        stats = [
+            ('rolls', str(self.rolls)),
+            ('mean', f'{self.mean:.4f}'),
+            ('std', f'{self.std:.4f}'),
+            ('min', str(int(self.min))),
+            ('max', str(int(self.max))),
+        ]
+        stats.extend(
+            (f'p{percent}', str(int(self.percentile(percent))))
+            for percent in PERCENTILES
+        )
+        lines = [f'{name:<7}{value}' for name, value in stats]
+
+        rolls = self.rolls
+        most = max(count for _, count in self.counts)
+        lines.append('')
+        lines.append(f'{"result":>6}{"count":>7}{"%":>9}')
+        for result, count in self.counts:
+            bar = '#' * round(count / most * HISTOGRAM_WIDTH)
+            percent = f'{count / rolls:.2%}'
+            lines.append(f'{int(result):>6}{count:>7}{percent:>9}  {bar}')
+        return '\n'.join(lines)
@@ -0,0 +1,238 @@
+"""
+vm
+~~
+
+A stack machine for executing parsed :ref:`YADN`.
+
+:meth:`yadr.parser.Tree.compute` executes a tree by walking it, which
+means a method call for each node, a check of the kind of each node,
+and a look up of the operator for each operation. It also means
+deeply nested trees can exceed the recursion limit.
+
+Instead, a tree can be lowered once into a flat list of instructions
+in postfix order, with each operator already looked up. The
+instructions can then be run as many times as needed by a simple
+loop over the list.
+
+Before a tree is lowered, any branch without a random operator can be
+folded into a single value by :func:`yadr.vm.fold`, since its result
+is the same every time it is rolled.
+
+.. autofunction:: yadr.vm.fold
+.. autofunction:: yadr.vm.lower
+.. autofunction:: yadr.vm.run
+"""
+from typing import Any, Optional
+
+from yadr import operator as yo
+from yadr.model import Result, Token, id_tokens, op_tokens
+from yadr.parser import Tree, Unary
+from yadr.profiling import timed
+
+
+# Types.
+Instruction = tuple[int, Any]
+Code = tuple[Instruction, ...]
+
+# Opcodes. The opcode of an instruction is the number of values it
+# takes from the stack.
+PUSH = 0
+UNARY = 1
+BINARY = 2
+
+# The token kinds of the values folded trees are replaced with.
+literal_kinds: tuple[tuple[type, Token], ...] = (
+    (bool, Token.BOOLEAN),
+    (int, Token.NUMBER),
+    (str, Token.QUALIFIER),
+    (tuple, Token.POOL),
+)
+
+
+# Public functions.
+def fold(tree: Tree) -> Tree:
+    """Replace the branches of a tree that don't roll dice with their
+    results.
+
+    :param tree: The tree to fold.
+    :return: The folded tree as a :class:`yadr.parser.Tree`. The given
+        tree isn't changed.
+    :rtype: yadr.parser.Tree
+
+    A branch is folded if neither it nor any of its branches has one
+    of the operators in :data:`yadr.operator.random_ops`. Branches
+    that raise an error when computed aren't folded, so the error is
+    still raised when the tree is rolled.
+
+    Usage::
+
+        >>> from yadr.yadr import compile
+        >>>
+        >>> tree = fold(compile('(2 * 3 + 1)d6').trees[0])
+        >>> tree.left
+        Tree(kind=Token.NUMBER, value=7)
+    """
+    folded: dict[int, tuple[Tree, bool]] = {}
+    nodes: list[tuple[Tree, bool]] = [(tree, False)]
+    while nodes:
+        node, children_done = nodes.pop()
+        if node.kind in id_tokens:
+            folded[id(node)] = (node, True)
+            continue
+        branches = _branches(node)
+        if not children_done:
+            nodes.append((node, True))
+            nodes.extend((branch, False) for branch in branches)
+            continue
+
+        # Rebuild the node from its folded branches, then fold the
+        # node itself if all of its branches are constant.
+        children = [folded.pop(id(branch)) for branch in branches]
+        new_node = _rebuild(node, [child for child, _ in children])
+        constant = (
+            all(is_constant for _, is_constant in children)
+            and node.value not in yo.random_ops
+        )
+        if constant:
+            new_node, constant = _literal(new_node, children)
+        folded[id(node)] = (new_node, constant)
+    return folded[id(tree)][0]
+
+
+def lower(tree: Tree) -> Code:
+    """Lower a tree into instructions for :func:`yadr.vm.run`.
+
+    :param tree: The tree to lower.
+    :return: The instructions as a :class:`tuple`.
+    :rtype: tuple
+
+    Each instruction is a :class:`tuple` of an opcode and an argument.
+    A `PUSH` instruction pushes its argument onto the stack. `UNARY`
+    and `BINARY` instructions pop one or two values from the stack,
+    pass them to their argument, and push the result.
+
+    Usage::
+
+        >>> from yadr.model import Token
+        >>> from yadr.parser import Tree
+        >>>
+        >>> tree = Tree(Token.AS_OPERATOR, '+')
+        >>> tree.left = Tree(Token.NUMBER, 3)
+        >>> tree.right = Tree(Token.NUMBER, 2)
+        >>> code = lower(tree)
+        >>> [opcode for opcode, _ in code]
+        [0, 0, 2]
+        >>> run(code)
+        5
+    """
+    code: list[Instruction] = []
+    nodes: list[tuple[Tree, bool]] = [(tree, False)]
+    while nodes:
+        node, children_done = nodes.pop()
+        if node.kind in id_tokens:
+            code.append((PUSH, node.value))
+            continue
+        if children_done:
+            code.append(_operation(node))
+            continue
+
+        # The node goes back on the stack under its branches, so its
+        # instruction is added after theirs.
+        nodes.append((node, True))
+        nodes.extend((branch, False) for branch in _branches(node))
+    return tuple(code)
+
+
+def run(code: Code) -> Result:
+    """Run the instructions lowered from a tree.
+
+    :param code: The instructions to run.
+    :return: The result of the tree the instructions were lowered
+        from.
+    :rtype: Result
+    """
+    stack: list[Any] = []
+    for opcode, arg in code:
+        if opcode == PUSH:
+            stack.append(arg)
+        elif opcode == BINARY:
+            right = stack.pop()
+            stack[-1] = arg(stack[-1], right)
+        else:
+            stack[-1] = arg(stack[-1])
+    return stack[-1]
+
+
+# Utility functions.
+def _branches(node: Tree) -> tuple[Tree, ...]:
+    """Get the branches of an operation tree, last branch first."""
+    branches: tuple[Optional[Tree], ...]
+    if isinstance(node, Unary):
+        branches = (node.child,)
+    else:
+        branches = (node.right, node.left)
+    checked = []
+    for branch in branches:
+        if branch is None:
+            msg = f'Operator {node.value} is missing an operand.'
+            raise ValueError(msg)
+        checked.append(branch)
+    return tuple(checked)
+
+
+def _literal(
+    node: Tree,
+    children: list[tuple[Tree, bool]]
+) -> tuple[Tree, bool]:
+    """Replace an operation on constant branches with its result."""
+    # The branches are stored last branch first.
+    args = [child.value for child, _ in reversed(children)]
+    result: Result
+    try:
+        result = _operator(node)[1](*args)
+    except (ArithmeticError, LookupError, TypeError, ValueError):
+        return node, False
+    for type_, kind in literal_kinds:
+        if type(result) is type_:
+            return Tree(kind, result), True
+    return node, False
+
+
+def _operation(node: Tree) -> Instruction:
+    """Look up the operator for an operation tree, timing it if
+    profiling is enabled.
+    """
+    opcode, fn = _operator(node)
+    return (opcode, timed(str(node.value), fn))
+
+
+def _operator(node: Tree) -> Instruction:
+    """Look up the operator for an operation tree."""
+    symbol = str(node.value)
+    if isinstance(node, Unary):
+        return (UNARY, yo.ops[symbol])
+
+    # These are the same errors Tree.compute raises.
+    if node.kind not in op_tokens:
+        msg = f'Unknown token {node.kind}'
+        raise TypeError(msg)
+    try:
+        return (BINARY, yo.ops[symbol])
+    except KeyError:
+        if symbol != 'm':
+            msg = f'Operator not recognized: {symbol}.'
+            raise ValueError(msg)
+        return (BINARY, node._map_result)
+
+
+def _rebuild(node: Tree, branches: list[Tree]) -> Tree:
+    """Rebuild an operation tree with new branches."""
+    if isinstance(node, Unary):
+        child, = branches
+        if child is node.child:
+            return node
+        return Unary(node.kind, node.value, child)
+    right, left = branches
+    if left is node.left and right is node.right:
+        return node
+    return Tree(node.kind, node.value, left, right, node.dice_map)
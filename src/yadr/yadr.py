@@ -19,6 +19,75 @@ cases it's all you need.
 .. autofunction:: yadr.roll
 
 
+Compiling Rolls
+===============
+If you need to roll the same :ref:`YADN` many times, you can compile
+it once with :func:`yadr.compile`. The :ref:`YADN` is lexed and parsed
+when it is compiled, so each roll of the compiled object only has to
+execute it.
+
+.. autofunction:: yadr.compile
+.. autoclass:: yadr.yadr.CompiledRoll
+    :members:
+
+
+Finding Probabilities
+=====================
+If you want to know how likely each result of a roll is, you can get
+the exact odds from :func:`yadr.distribution` rather than rolling the
+dice many times.
+
+.. autofunction:: yadr.distribution
+
+
+Choosing a Random Number Generator
+==================================
+By default, :func:`yadr.roll` rolls dice with :mod:`random`. If you
+need a different random number generator, or a separate one for each
+thread or worker, roll with a :class:`yadr.Roller` instead.
+
+.. autoclass:: yadr.Roller
+    :members:
+
+
+Rolling in Batches
+==================
+If you need to roll the same :ref:`YADN` many thousands of times, like
+when simulating a game, :func:`yadr.roll_batch` rolls every trial at
+once using :mod:`numpy`. Since :mod:`numpy` is an optional dependency,
+you will need to install it separately to use batches.
+
+.. autofunction:: yadr.roll_batch
+
+To know how a roll behaves over many rolls without keeping every
+result, :func:`yadr.roll_stats` summarizes them instead.
+
+.. autofunction:: yadr.roll_stats
+
+
+.. _parallel:
+
+Rolling in Parallel
+===================
+The rolls in a compound roll are independent of each other, so a
+long compound roll can be split between several workers by passing
+`workers` to :func:`yadr.roll`. Dice maps defined in the :ref:`YADN`
+are all added, in order, before any roll is handed to a worker. The
+results are returned in the same order as the rolls.
+
+When rolling with workers or a seed, each roll gets its own random
+number generator seeded from the `seed` and the position of the roll.
+The same seed gives the same results however many workers there are.
+Since threads share the global interpreter lock, `process` workers
+are usually faster for long rolls.
+
+    >>> import yadr
+    >>>
+    >>> yadn = '; '.join(['3d6'] * 5)
+    >>> yadr.roll(yadn, seed=1138) == yadr.roll(yadn, workers=2, seed=1138)
+    True
+
+
 Managing Dice Maps
 ==================
 If you're playing a game that uses symbol-based dice rather than ones
@@ -29,74 +98,390 @@ following functions can be useful, too.
 .. autofunction:: yadr.add_dice_map
 .. autofunction:: yadr.list_dice_maps
 
+Rather than parsing the symbols in mapped results yourself,
+:func:`yadr.tally` counts them for you, and
+:func:`yadr.tally_distribution` finds the exact odds of each count.
+
+.. autofunction:: yadr.tally
+.. autofunction:: yadr.tally_distribution
+
 
 #################
 Utility Functions
 #################
 
 The following functions are used within the API, but they are not intended
-for public use. They are only documented here for support purposes.
+for public use. They are only documented here for support purposes. They
+are defined in :mod:`yadr.maps`, so the command line can list the dice
+maps without importing the rest of :mod:`yadr`, but they can still be
+imported from :mod:`yadr.yadr`.
 
-.. autofunction:: yadr.yadr.get_default_maps
-.. autofunction:: yadr.yadr.read_file
-.. autofunction:: yadr.yadr.parse_map
+.. autofunction:: yadr.maps.get_default_maps
+.. autofunction:: yadr.maps.load_default_maps
+.. autofunction:: yadr.maps.overlay_maps
+.. autofunction:: yadr.maps.read_file
+.. autofunction:: yadr.maps.parse_map
 
 """
-from importlib.resources import files
-from pathlib import Path
-from typing import Optional
+from collections import Counter
+from collections.abc import Iterator, Mapping, MutableMapping, Sequence
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Optional
 
-import yadr.data
 from yadr import maps as m
+from yadr import operator as yo
+from yadr import rng, stats, vm
 from yadr.encode import Encoder
-from yadr.lex import Lexer
-from yadr.model import CompoundResult, DiceMapping, Result, TokenInfo
-from yadr.parser import Parser, dice_map
+from yadr.lex import FastLexer
+from yadr.maps import (
+    add_dice_map,
+    get_default_maps,
+    list_dice_maps,
+    load_default_maps,
+    overlay_maps,
+    parse_map,
+    read_file
+)
+from yadr.model import CompoundResult, DiceMapping, Result, Tally, TokenInfo
+from yadr.parser import Parser, Tree, collect_results, dice_map
+from yadr.profiling import phase
+
+
+# These are only imported when they are used, since they take a while
+# to import and most rolls don't need them.
+if TYPE_CHECKING:
+    from yadr import dist
+
+
+# Public classes.
+class CompiledRoll:
+    """A string of :ref:`YADN` that has been lexed and parsed so it
+    can be rolled many times.
+
+    :param yadn: The string of :ref:`YADN` that was compiled.
+    :param trees: The parsed rolls in the :ref:`YADN`.
+    :param dice_map: (Optional.) The dice maps the :ref:`YADN` was
+        compiled with.
+    :return: A :class:`yadr.yadr.CompiledRoll` object.
+    :rtype: yadr.yadr.CompiledRoll
+
+    :class:`CompiledRoll` objects are immutable. They should be
+    created with :func:`yadr.compile` rather than directly.
+
+    Usage::
+
+        >>> import yadr
+        >>>
+        >>> compiled = yadr.compile('3d6')
+        >>> compiled.roll()                         # doctest: +SKIP
+        16
+        >>> compiled.roll_many(3)                   # doctest: +SKIP
+        (9, 12, 7)
+    """
+    __slots__ = ('_yadn', '_trees', '_dice_map', '_code')
+    _yadn: str
+    _trees: tuple[Tree, ...]
+    _dice_map: Optional[Mapping[str, DiceMapping]]
+    _code: tuple[vm.Code, ...]
+
+    def __init__(
+        self,
+        yadn: str,
+        trees: tuple[Tree, ...],
+        dice_map: Optional[Mapping[str, DiceMapping]] = None
+    ) -> None:
+        object.__setattr__(self, '_yadn', yadn)
+        object.__setattr__(self, '_trees', tuple(trees))
+        object.__setattr__(self, '_dice_map', dice_map)
+        code = tuple(vm.lower(vm.fold(tree)) for tree in self._trees)
+        object.__setattr__(self, '_code', code)
+
+    def __repr__(self) -> str:
+        name = self.__class__.__name__
+        return f'{name}({self._yadn!r})'
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        msg = f'{self.__class__.__name__} objects are immutable.'
+        raise AttributeError(msg)
+
+    def __delattr__(self, name: str) -> None:
+        msg = f'{self.__class__.__name__} objects are immutable.'
+        raise AttributeError(msg)
+
+    @property
+    def trees(self) -> tuple[Tree, ...]:
+        """The parsed rolls in the :ref:`YADN`."""
+        return self._trees
+
+    @property
+    def yadn(self) -> str:
+        """The string of :ref:`YADN` that was compiled."""
+        return self._yadn
+
+    def roll(
+        self,
+        yadn_out: bool = False,
+        workers: Optional[int] = None,
+        executor: str = 'thread',
+        seed: Optional[int] = None
+    ) -> None | Result | CompoundResult:
+        """Roll the compiled :ref:`YADN`.
+
+        :param yadn_out: (Optional.) Whether the output should be in
+            native Python objects or :ref:`YADN` notation. The default
+            is native Python objects.
+        :param workers: (Optional.) The number of workers used to roll
+            the rolls of a compound roll in parallel. See
+            :ref:`parallel` for details.
+        :param executor: (Optional.) Whether the workers are `thread`
+            or `process` workers. The default is `thread`.
+        :param seed: (Optional.) The seed used to give each roll its
+            own random number generator.
+        :return: The result depends on the details of the die roll.
+        :rtype: None, Result, or CompoundResult
+        """
+        results: list[Result]
+        with phase('compute'):
+            if workers is None and seed is None:
+                results = [vm.run(code) for code in self._code]
+            else:
+                from yadr import parallel
+                results = parallel.compute(
+                    self._code,
+                    self._dice_map,
+                    workers,
+                    executor,
+                    seed
+                )
+            result: None | Result | CompoundResult
+            result = collect_results(results)
+        if yadn_out:
+            with phase('encode'):
+                encoder = Encoder()
+                result = encoder.encode(result)
+        return result
+
+    def roll_many(
+        self, num: int,
+        yadn_out: bool = False
+    ) -> tuple[None | Result | CompoundResult, ...]:
+        """Roll the compiled :ref:`YADN` several times.
+
+        :param num: The number of times to roll.
+        :param yadn_out: (Optional.) Whether the output should be in
+            native Python objects or :ref:`YADN` notation. The default
+            is native Python objects.
+        :return: The result of each roll as a :class:`tuple`.
+        :rtype: tuple
+        """
+        return tuple(self.roll(yadn_out) for _ in range(num))
+
+
+class Roller:
+    """Roll :ref:`YADN` with its own random number generator.
+
+    :param backend: (Optional.) The random number generator used to
+        roll the dice. This can be the name of one of the backends in
+        :data:`yadr.rng.backends` or a :class:`yadr.rng.Backend`
+        object. The default is `random`, which uses a private
+        :class:`random.Random` object.
+    :param seed: (Optional.) The seed for the random number generator,
+        for backends that can be seeded.
+    :param kwargs: (Optional.) Any other parameters for the backend.
+    :return: A :class:`yadr.Roller` object.
+    :rtype: yadr.Roller
+
+    The random number generator is only used for rolls made through
+    the :class:`yadr.Roller`, so rollers don't change the results of
+    each other or of :func:`yadr.roll`. Backends aren't thread safe,
+    so give each thread or worker its own :class:`yadr.Roller`.
+
+    Usage::
+
+        >>> import yadr
+        >>>
+        >>> roller = yadr.Roller(seed=1138)
+        >>> roller.roll('3d6')
+        13
+        >>> yadr.Roller('secrets').roll('3d6')     # doctest: +SKIP
+        14
+    """
+    def __init__(
+        self,
+        backend: str | rng.Backend = 'random',
+        seed: Optional[int | str | bytes] = None,
+        **kwargs: Any
+    ) -> None:
+        if isinstance(backend, str):
+            try:
+                backend_cls = rng.backends[backend]
+            except KeyError:
+                msg = f'Unknown backend {backend}.'
+                raise ValueError(msg)
+            if seed is not None:
+                kwargs['seed'] = seed
+            try:
+                backend = backend_cls(**kwargs)
+            except TypeError:
+                msg = f'Invalid parameters for the {backend} backend.'
+                raise ValueError(msg)
+        elif seed is not None or kwargs:
+            msg = 'Parameters can only be given with the name of a backend.'
+            raise ValueError(msg)
+        self.backend = backend
+
+    def __repr__(self) -> str:
+        name = self.__class__.__name__
+        return f'{name}({self.backend.__class__.__name__})'
+
+    @contextmanager
+    def active(self) -> Iterator['Roller']:
+        """Roll any dice rolled within the context with this roller.
+
+        :return: A context manager.
+        :rtype: Iterator
+
+        Usage::
+
+            >>> import yadr
+            >>>
+            >>> with yadr.Roller(seed=1138).active():
+            ...     yadr.roll('3d6')
+            13
+        """
+        token = yo.rng_backend.set(self.backend)
+        try:
+            yield self
+        finally:
+            yo.rng_backend.reset(token)
+
+    def roll(
+        self,
+        yadn: 'str | CompiledRoll',
+        yadn_out: bool = False,
+        dice_map: Optional[dict[str, DiceMapping]] = None
+    ) -> None | Result | CompoundResult:
+        """Roll a string of :ref:`YADN` or a compiled roll.
+
+        :param yadn: A string of :ref:`YADN` or a
+            :class:`yadr.yadr.CompiledRoll` to roll.
+        :param yadn_out: (Optional.) Whether the output should be in
+            native Python objects or :ref:`YADN` notation. The default
+            is native Python objects.
+        :param dice_map: (Optional.) A dictionary of maps for
+            transforming the value rolled. It's only used when rolling
+            a string of :ref:`YADN`.
+        :return: The result depends on the details of the die roll.
+        :rtype: None, Result, or CompoundResult
+        """
+        if not isinstance(yadn, CompiledRoll):
+            yadn = compile(yadn, dice_map)
+        with self.active():
+            return yadn.roll(yadn_out)
+
+    def roll_many(
+        self,
+        yadn: 'str | CompiledRoll',
+        num: int,
+        yadn_out: bool = False,
+        dice_map: Optional[dict[str, DiceMapping]] = None
+    ) -> tuple[None | Result | CompoundResult, ...]:
+        """Roll a string of :ref:`YADN` or a compiled roll many times.
+
+        :param yadn: A string of :ref:`YADN` or a
+            :class:`yadr.yadr.CompiledRoll` to roll.
+        :param num: The number of times to roll.
+        :param yadn_out: (Optional.) Whether the output should be in
+            native Python objects or :ref:`YADN` notation. The default
+            is native Python objects.
+        :param dice_map: (Optional.) A dictionary of maps for
+            transforming the value rolled. It's only used when rolling
+            a string of :ref:`YADN`.
+        :return: The result of each roll as a :class:`tuple`.
+        :rtype: tuple
+        """
+        if not isinstance(yadn, CompiledRoll):
+            yadn = compile(yadn, dice_map)
+        with self.active():
+            return yadn.roll_many(num, yadn_out)
 
 
 # Public API.
-def add_dice_map(loc: str) -> dict[str, DiceMapping]:
-    """Load the dice-maps from a given file.
+def compile(
+    yadn: str,
+    dice_map: Optional[dict[str, DiceMapping]] = None
+) -> CompiledRoll:
+    """Compile a string of :ref:`YADN` so it can be rolled many times
+    without being lexed and parsed again.
 
-    :param loc: The location of the file of dice mappings to load.
-    :return: None.
-    :rtype: NoneType
+    :param yadn: A string of :ref:`YADN` that defines the die roll to
+        compile.
+    :param dice_map: (Optional.) A dictionary of maps for transforming
+        the value rolled. See :ref:`dice_maps` for details.
+    :return: A :class:`yadr.yadr.CompiledRoll` object.
+    :rtype: yadr.yadr.CompiledRoll
 
     Usage::
 
-        >>> from yadr import add_dice_map
+        >>> import yadr
         >>>
-        >>> path = 'tests/data/__test_dice_map.txt'
-        >>> add_dice_map(path)              # doctest: +NORMALIZE_WHITESPACE
-        {'spam': {1: 'eggs', 2: 'bacon', 3: 'eggs', 4: 'tomato'}, 'fudge':
-        {1: '-', 2: '', 3: '+'}}
+        >>> compiled = yadr.compile('3d6')
+        >>> compiled.roll()                         # doctest: +SKIP
+        16
     """
-    yadn = read_file(loc)
-    return parse_map(yadn)
+    # Get the default dice maps and add any passed into the roll.
+    maps_ = overlay_maps(dice_map)
+    return _compile(yadn, maps_)
 
 
-def list_dice_maps() -> str:
-    """Get the list of the default dice maps.
+def distribution(
+    yadn: str,
+    dice_map: Optional[dict[str, DiceMapping]] = None
+) -> 'None | dist.PMF | tuple[dist.PMF, ...]':
+    """Find the exact probability of each result of a string of
+    :ref:`YADN`.
 
-    :return: A :class:`str` object.
-    :rtype: str
+    :param yadn: A string of :ref:`YADN` that defines the die roll.
+    :param dice_map: (Optional.) A dictionary of maps for transforming
+        the value rolled. See :ref:`dice_maps` for details.
+    :return: A :class:`dict` of each possible result and its probability
+        as a :class:`fractions.Fraction`. If the :ref:`YADN` has more
+        than one roll, a :class:`tuple` of those :class:`dict` objects.
+    :rtype: None, dict, or tuple
 
     Usage::
 
-        >>> from yadr import list_dice_maps
+        >>> import yadr
         >>>
-        >>> list_dice_maps()                # doctest: +ELLIPSIS
-        'sweote boost...
+        >>> yadr.distribution('1d2 + 1')
+        {2: Fraction(1, 2), 3: Fraction(1, 2)}
+
+    The distribution is calculated from the dice rather than by rolling
+    them, so it works for the dice operators `d`, `d!`, `dc`, `dh`,
+    `dl`, and `dw`, as well as for any arithmetic, comparisons, choices,
+    and dice maps done with their results. Pools of dice are not
+    supported. Since exploding dice have no highest result, their
+    distribution stops after :data:`yadr.operator.explode_limit`
+    explosions, the same as when they are rolled.
     """
-    dice_map = get_default_maps()
-    maps_ = '\n'.join(dice_map)
-    return maps_
+    from yadr import dist
+
+    compiled = compile(yadn, dice_map)
+    results = [dist.ordered(dist.pmf(tree)) for tree in compiled.trees]
+    if len(results) > 1:
+        return tuple(results)
+    elif results:
+        return results[0]
+    return None
 
 
 def roll(
     yadn: str,
     yadn_out: bool = False,
-    dice_map: Optional[dict[str, DiceMapping]] = None
+    dice_map: Optional[dict[str, DiceMapping]] = None,
+    workers: Optional[int] = None,
+    executor: str = 'thread',
+    seed: Optional[int] = None
 ) -> None | Result | CompoundResult:
     """Execute a string of :ref:`YADN` to roll dice.
 
@@ -107,6 +492,13 @@ def roll(
         Python objects.
     :param dice_map: (Optional.) A dictionary of maps for transforming
         the value rolled. See :ref:`dice_maps` for details.
+    :param workers: (Optional.) The number of workers used to roll
+        the rolls of a compound roll in parallel. See :ref:`parallel`
+        for details.
+    :param executor: (Optional.) Whether the workers are `thread` or
+        `process` workers. The default is `thread`.
+    :param seed: (Optional.) The seed used to give each roll its own
+        random number generator.
     :return: The result depends on the details of the die roll.
     :rtype: None, Result, or CompoundResult
 
@@ -122,75 +514,246 @@ def roll(
     eighteen that is created by generating three random integers in the
     range of one to six.
     """
-    # Get the default dice maps and add any passed into the roll.
-    if not dice_map:
-        dice_map = {}
-    default_maps = get_default_maps()
-    default_maps.update(dice_map)
+    compiled = compile(yadn, dice_map)
+    return compiled.roll(yadn_out, workers, executor, seed)
 
-    # Lex the YADN into tokens for parsing.
-    lexer = Lexer()
-    tokens = lexer.lex(yadn)
 
-    # Parse and execute the YADN tokens.
-    parser = Parser()
-    parser.dice_map = default_maps
-    result: None | Result | CompoundResult = parser.parse(tokens)
+def roll_batch(
+    yadn: str,
+    num: int,
+    dice_map: Optional[dict[str, DiceMapping]] = None,
+    rng: Any = None
+) -> Any:
+    """Roll a string of :ref:`YADN` for many independent trials at
+    once.
 
-    # If needed, encode the result into YADN and return the result.
-    if yadn_out:
-        encoder = Encoder()
-        result = encoder.encode(result)
-    return result
+    :param yadn: A string of :ref:`YADN` that defines the die roll to
+        execute.
+    :param num: The number of trials to roll.
+    :param dice_map: (Optional.) A dictionary of maps for transforming
+        the value rolled. See :ref:`dice_maps` for details.
+    :param rng: (Optional.) The :class:`numpy.random.Generator` used to
+        roll the dice. Pass a seeded generator if you need the trials
+        to be repeatable.
+    :return: A :class:`numpy.ndarray` with the result of each trial. If
+        the result is a pool, it's a :class:`numpy.ma.MaskedArray` with
+        a row for each trial, where dice removed from the pool are
+        masked. If the :ref:`YADN` has more than one roll, a
+        :class:`tuple` of those arrays.
+    :rtype: None, numpy.ndarray, or tuple
 
+    Usage::
 
-# Utility.
-def get_default_maps() -> dict[str, DiceMapping]:
-    """Get the default dice maps.
+        >>> import yadr
+        >>>
+        >>> yadr.roll_batch('3d6', 5)               # doctest: +SKIP
+        array([ 9, 13, 11,  6, 14])
+
+    Numbers are stored as 64-bit integers. If a result could be too
+    large for that, or is a float, like from a negative power, the
+    array holds Python numbers instead, so the results are the same as
+    :func:`yadr.roll` gives.
 
-    :return: The default dice maps as a :class:`dict` of :class:`dict`
-        objects.
+    .. note::
+        This requires :mod:`numpy`.
+    """
+    try:
+        from yadr import batch
+    except ImportError as ex:
+        msg = 'Rolling in batches requires numpy.'
+        raise ImportError(msg) from ex
+
+    compiled = compile(yadn, dice_map)
+    roller = batch.BatchRoller(num, rng)
+    results = [roller.compute(tree) for tree in compiled.trees]
+    if len(results) > 1:
+        return tuple(results)
+    elif results:
+        return results[0]
+    return None
+
+
+def roll_stats(
+    yadn: str,
+    num: int,
+    dice_map: Optional[dict[str, DiceMapping]] = None,
+    seed: Optional[int] = None
+) -> tuple[stats.Summary, ...]:
+    """Roll a string of :ref:`YADN` many times and summarize the
+    results.
+
+    :param yadn: A string of :ref:`YADN` that defines the die roll to
+        execute. Each roll must have a number as its result.
+    :param num: The number of times to roll.
+    :param dice_map: (Optional.) A dictionary of maps for transforming
+        the value rolled. See :ref:`dice_maps` for details.
+    :param seed: (Optional.) The seed for the random number generator,
+        if the results need to be repeatable.
+    :return: A :class:`yadr.stats.Summary` for each roll in the
+        :ref:`YADN` as a :class:`tuple`.
+    :rtype: tuple
+
+    Usage::
+
+        >>> import yadr
+        >>>
+        >>> summary, = yadr.roll_stats('3d6', 10_000)
+        >>> summary.min >= 3 and summary.max <= 18
+        True
+        >>> summary.mean                            # doctest: +SKIP
+        10.4872
+
+    If :mod:`numpy` is installed, every roll is rolled at once with
+    :func:`yadr.roll_batch`. Otherwise, the :ref:`YADN` is compiled
+    once and the compiled roll is rolled `num` times. The same seed
+    only gives the same results if :mod:`numpy` is installed in both
+    cases or in neither.
+    """
+    if num < 1:
+        raise ValueError('The number of rolls must be at least one.')
+    compiled = compile(yadn, dice_map)
+    counts: Sequence[Mapping[int, int]]
+    try:
+        counts = _count_batch(compiled, num, seed)
+    except ImportError:
+        counts = _count_rolls(compiled, num, seed)
+    return tuple(stats.Summary(count) for count in counts)
+
+
+def tally(
+    yadn: str,
+    dice_map: Optional[dict[str, DiceMapping]] = None
+) -> Tally:
+    """Roll a string of :ref:`YADN` and count the symbols in the
+    mapped results.
+
+    :param yadn: A string of :ref:`YADN` that defines the die roll to
+        execute. Every result must be mapped with a dice map.
+    :param dice_map: (Optional.) A dictionary of maps for transforming
+        the value rolled. See :ref:`dice_maps` for details.
+    :return: Each symbol and the number of times it was rolled, sorted
+        by symbol, as a :class:`tuple`. The symbols rolled by every
+        roll in a compound roll are counted together.
+    :rtype: tuple
+
+    Usage::
+
+        >>> import yadr
+        >>>
+        >>> yadn = '3g8m"sweote ability"; 2g8m"sweote difficulty"'
+        >>> yadr.tally(yadn)                        # doctest: +SKIP
+        (('+', 2), ('-', 1), ('°', 1), ('•', 2))
+    """
+    return m.tally(roll(yadn, dice_map=dice_map))
+
+
+def tally_distribution(
+    yadn: str,
+    dice_map: Optional[dict[str, DiceMapping]] = None
+) -> 'dist.PMF':
+    """Find the exact probability of each count of the symbols rolled
+    by a string of :ref:`YADN`.
+
+    :param yadn: A string of :ref:`YADN` where each roll is a pool
+        mapped with a dice map, such as `3g8m"sweote ability"`.
+    :param dice_map: (Optional.) A dictionary of maps for transforming
+        the value rolled. See :ref:`dice_maps` for details.
+    :return: A :class:`dict` of each possible result of
+        :func:`yadr.tally` and its probability as a
+        :class:`fractions.Fraction`.
     :rtype: dict
 
     Usage::
 
-        >>> from yadr.yadr import get_default_maps
+        >>> import yadr
         >>>
-        >>> get_default_maps()              # doctest: +ELLIPSIS
-        {'sweote boost': {1: '',...
+        >>> odds = yadr.tally_distribution('2g3m"fate"')
+        >>> odds[(('+', 1), ('-', 1))]
+        Fraction(2, 9)
+
+    The distribution is calculated rather than rolled. The symbols on
+    each face of a dice map are only counted once, and the counts for
+    the dice in all of the rolls are combined by convolution, so a
+    mixed pool like `3g8m"sweote ability"; 2g8m"sweote difficulty"`
+    only needs a few hundred steps.
     """
-    data_pkg = files(yadr.data)
-    default_file = Path(f'{data_pkg}') / 'dice_maps.yadn'
-    with open(default_file) as fh:
-        default_maps_yadn = fh.read()
-    return parse_map(default_maps_yadn)
+    from yadr import dist
 
+    compiled = compile(yadn, dice_map)
+    return dist.tally_pmf(compiled.trees)
 
-def read_file(loc: str | Path) -> str:
-    """Read test from a file.
 
-    :param loc: The file system location of the file.
-    :return: A :class:str object.
-    :rtype: str
+# Utility.
+def _compile(
+    yadn: str,
+    maps_: MutableMapping[str, DiceMapping],
+    lexer: Optional[FastLexer] = None
+) -> CompiledRoll:
+    """Compile a string of :ref:`YADN` with dice maps that have
+    already been laid over the default dice maps.
+
+    :param yadn: A string of :ref:`YADN` to compile.
+    :param maps_: The dice maps for the roll. Dice maps defined in
+        the :ref:`YADN` are added to them.
+    :param lexer: (Optional.) The lexer to lex the :ref:`YADN` with.
+        The default is a new :class:`yadr.lex.FastLexer`.
+    :return: A :class:`yadr.yadr.CompiledRoll` object.
+    :rtype: yadr.yadr.CompiledRoll
+    """
+    # Lex the YADN into tokens for parsing.
+    with phase('lex'):
+        if lexer is None:
+            lexer = FastLexer()
+        tokens = lexer.lex(yadn)
+
+    # Parse the YADN tokens into trees for execution.
+    with phase('parse'):
+        parser = Parser()
+        parser.dice_map = maps_
+        trees = parser.build(tokens)
+        return CompiledRoll(yadn, trees, maps_)
+
+
+def _count_batch(
+    compiled: CompiledRoll,
+    num: int,
+    seed: Optional[int]
+) -> list[Mapping[int, int]]:
+    """Count the results of each roll, rolling every roll at once
+    with :mod:`numpy`.
+    """
+    import numpy as np
+
+    from yadr import batch
+
+    roller = batch.BatchRoller(num, np.random.default_rng(seed))
+    counts: list[Mapping[int, int]] = []
+    for tree in compiled.trees:
+        results = roller.compute(tree)
+        if results.ndim != 1 or results.dtype.kind not in 'biuO':
+            msg = 'Only rolls with numbers as results can be summarized.'
+            raise ValueError(msg)
+
+        # Results too large for int64 are rolled as Python numbers.
+        # The summary checks they are integers.
+        if results.dtype.kind == 'O':
+            counts.append(Counter(results.tolist()))
+            continue
+        values, totals = np.unique(results, return_counts=True)
+        counts.append(dict(zip(values.tolist(), totals.tolist())))
+    return counts
+
+
+def _count_rolls(
+    compiled: CompiledRoll,
+    num: int,
+    seed: Optional[int]
+) -> list[Counter]:
+    """Count the results of each roll, running the compiled
+    instructions once for each roll.
     """
-    path = Path(loc)
-    with open(path) as fh:
-        contents = fh.read()
-    return contents
-
-
-def parse_map(yadn: str) -> dict[str, DiceMapping]:
-    """Parse the contents of a dice mapping file."""
-    if ';' in yadn:
-        yadn_parts = yadn.split(';')
-        dice_map = {}
-        for part in yadn_parts:
-            assert ';' not in part
-            dice_map.update(parse_map(part))
-        return dice_map
-
-    mlexer = m.Lexer()
-    mparser = m.Parser()
-    tokens = mlexer.lex(yadn)
-    name, value = mparser.parse(tokens)
-    return {name: value, }
+    with Roller(seed=seed).active():
+        return [
+            Counter(vm.run(code) for _ in range(num))
+            for code in compiled._code
+        ]
@@ -0,0 +1,173 @@
+"""
+test_batch
+~~~~~~~~~~
+
+Unit tests for rolling batches of trials with `yadr`.
+"""
+import pytest
+
+from yadr import operator as op
+from yadr.yadr import roll, roll_batch
+
+
+np = pytest.importorskip('numpy')
+
+
+# Utility functions.
+def batch_test(exp, yadn, num=4):
+    """Roll a batch where every trial has the same result."""
+    result = roll_batch(yadn, num, rng=np.random.default_rng(1138))
+    assert result.shape[0] == num
+    for trial in result:
+        actual = trial.compressed() if np.ma.isMaskedArray(trial) else trial
+        assert tuple(np.atleast_1d(actual).tolist()) == exp
+
+
+# Dice operator test cases.
+def test_die():
+    """Roll dice for each trial."""
+    result = roll_batch('3d6', 1000, rng=np.random.default_rng(1138))
+    assert result.shape == (1000,)
+    assert result.min() >= 3
+    assert result.max() <= 18
+    assert 10 < result.mean() < 11
+
+
+def test_keep_high_die():
+    """Keep the highest die for each trial."""
+    result = roll_batch('4dh6', 1000, rng=np.random.default_rng(1138))
+    assert result.min() >= 1
+    assert result.max() == 6
+    assert 5 < result.mean() < 5.5
+
+
+def test_exploding_die():
+    """Exploding dice can roll higher than the size of the die."""
+    result = roll_batch('1d!6', 1000, rng=np.random.default_rng(1138))
+    assert result.min() >= 1
+    assert result.max() > 6
+    assert not np.any(result % 6 == 0)
+
+
+def test_exploding_die_limit():
+    """Exploding dice stop exploding at the explosion limit."""
+    token = op.explode_limit.set(2)
+    try:
+        result = roll_batch('1d!1', 10)
+    finally:
+        op.explode_limit.reset(token)
+    assert result.tolist() == [3] * 10
+
+
+def test_wild_die():
+    """A one on the wild die loses the roll."""
+    result = roll_batch('3dw6', 1000, rng=np.random.default_rng(1138))
+    assert np.any(result == 0)
+    assert not np.any((result > 0) & (result < 3))
+
+
+def test_rolled_number_of_dice():
+    """The number of dice can be different for each trial."""
+    result = roll_batch('(1d2)g6', 1000, rng=np.random.default_rng(1138))
+    counts = result.count(axis=1)
+    assert set(counts.tolist()) == {1, 2}
+
+
+# Pool operator test cases.
+def test_pool_keep_high():
+    """Keep the highest dice in a pool in their original order."""
+    pool = [4, 10, 4, 5, 1, 9, 4]
+    exp = op.pool_keep_high(pool, 4)
+    batch_test(exp, f'{pool} ph 4')
+
+
+def test_pool_keep_low():
+    """Keep the lowest dice in a pool in their original order."""
+    pool = [4, 10, 9, 5, 1, 9, 4]
+    exp = op.pool_keep_low(pool, 4)
+    batch_test(exp, f'{pool} pl 4')
+
+
+def test_pool_keep_negative():
+    """A negative number of dice can't be kept."""
+    for symbol in ('ph', 'pl'):
+        with pytest.raises(ValueError, match='cannot be negative'):
+            roll_batch(f'[4, 10, 9] {symbol} -1', 10)
+
+
+def test_pool_cap_and_remove():
+    """Pool operations can be chained."""
+    batch_test((4, 6, 3, 1, 6), '([4, 10, 3, 5, 1, 9] pc 6) pr 5')
+
+
+def test_count_successes_with_botch():
+    """Count the successes in each pool, less the botches."""
+    batch_test((1,), '[4, 10, 3, 5, 1, 9] nb 6')
+
+
+def test_pool_concatenate():
+    """Concatenate the dice in each pool."""
+    batch_test((4103519,), 'C [4, 10, 3, 5, 1, 9]')
+
+
+@pytest.mark.parametrize('yadn', [
+    '(1d1 + 5) ^ 30',
+    '(1d1 + 5) ^ -1',
+    '(1d1 + 5) ^ (1d1 - 2)',
+    '20d1 * 10^18',
+    '1d1 - 9 * 10^18 - 9 * 10^18',
+    '25dc1',
+    'C 21g1',
+    'C [9, 9, 9, 9, 9, 9, 9, 9, 9, 9, 9, 9, 9, 9, 9, 9, 9, 9, 9, 9, 9]',
+])
+def test_large_values(yadn):
+    """Results that don't fit in an int64 or need to be floats are the
+    same as rolling the trials one at a time.
+    """
+    assert roll_batch(yadn, 3).tolist() == [roll(yadn, seed=1138)] * 3
+
+
+def test_large_values_rolled():
+    """Large results of rolled dice don't wrap around."""
+    result = roll_batch('25dc9', 100, rng=np.random.default_rng(1138))
+    assert all(0 <= value < 10 ** 25 for value in result.tolist())
+    result = roll_batch('1d6 ^ 30', 100, rng=np.random.default_rng(1138))
+    assert set(result.tolist()) <= {n ** 30 for n in range(1, 7)}
+
+
+# Tree test cases.
+def test_choice():
+    """Choices are made for each trial."""
+    batch_test(('spam',), 'T ? "spam" : "eggs"')
+
+
+def test_dice_map():
+    """Dice maps are applied to each trial."""
+    result = roll_batch('3g3m"fate"', 10, rng=np.random.default_rng(1138))
+    assert result.shape == (10, 3)
+    assert set(result.compressed().tolist()) <= {'-', '', '+'}
+
+
+def test_dice_map_number():
+    """Dice maps are applied to numbers in each trial."""
+    batch_test(('+',), '3 m "fate"')
+
+
+def test_dice_map_missing():
+    """Mapping a face that isn't in the map raises KeyError."""
+    with pytest.raises(KeyError):
+        roll_batch('4 m "fate"', 10)
+
+
+def test_compound_roll():
+    """Each roll in a compound roll has its own array."""
+    result = roll_batch('3; 1d6', 5)
+    assert len(result) == 2
+    assert result[0].tolist() == [3, 3, 3, 3, 3]
+
+
+def test_seeded_rolls_repeat():
+    """Rolls with the same seed are the same."""
+    a = roll_batch('S 5g!6', 100, rng=np.random.default_rng(1138))
+    b = roll_batch('S 5g!6', 100, rng=np.random.default_rng(1138))
+    assert a.tolist() == b.tolist()
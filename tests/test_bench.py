@@ -0,0 +1,141 @@
+"""
+test_bench
+~~~~~~~~~~
+
+Unit tests for the benchmarks of `yadr`.
+"""
+import json
+
+import pytest
+
+from yadr import bench
+from yadr import operator as yo
+from yadr.yadr import roll
+
+
+# Pool scaling test cases.
+def test_pool_scaling():
+    """Time the keep high and keep low pool operators for each size."""
+    results = bench.pool_scaling((100, 1000), repeat=1)
+    assert [(symbol, size) for symbol, size, *_ in results] == [
+        ('ph', 100),
+        ('pl', 100),
+        ('ph', 1000),
+        ('pl', 1000),
+    ]
+    assert all(seconds > 0 for _, _, seconds, _ in results)
+
+
+@pytest.mark.parametrize('sizes', [(1,), (100, 0)])
+def test_pool_scaling_small_sizes(sizes):
+    """Pools must have at least two dice to be scaled by n log n."""
+    with pytest.raises(ValueError):
+        bench.pool_scaling(sizes, repeat=1)
+
+
+# Benchmark run test cases.
+def test_run(mocker):
+    """The benchmarks are keyed by group and name."""
+    mocker.patch('yadr.bench.MIN_TIME', 0)
+    results = bench.run(['map-load', 'encode'], repeat=1)
+    assert list(results) == [
+        'map-load/default',
+        'encode/number',
+        'encode/pool',
+        'encode/mapped',
+        'encode/compound',
+    ]
+    assert all(seconds > 0 for seconds in results.values())
+
+
+def test_run_pool_scaling():
+    """The pool sizes are passed to the pool scaling group."""
+    results = bench.run(['pool-scaling'], repeat=1, sizes=(100,))
+    assert list(results) == ['pool-scaling/ph 100', 'pool-scaling/pl 100']
+
+
+def test_run_startup(mocker):
+    """The startup group times the imports of each startup command."""
+    mocker.patch.dict('yadr.bench.STARTUP_COMMANDS', clear=True)
+    bench.STARTUP_COMMANDS['import'] = ('-c', 'import yadr')
+    results = bench.run(['startup'], repeat=1)
+    assert list(results) == ['startup/import']
+    assert results['startup/import'] > 0
+
+
+def test_import_times():
+    """Commands only import the modules they need."""
+    modules = bench.import_times(('-c', 'import yadr'))
+    assert 'yadr' in modules
+    assert 'yadr.yadr' not in modules
+    modules = bench.import_times(('-m', 'yadr', '-l'))
+    assert 'yadr.maps' in modules
+    assert 'yadr.lex' not in modules
+    assert 'yadr.parser' not in modules
+    modules = bench.import_times(('-m', 'yadr', '3d6'))
+    assert 'yadr.lex' in modules
+    assert 'yadr.dist' not in modules
+    assert 'yadr.parallel' not in modules
+
+
+def test_run_unknown_group():
+    """Unknown groups raise ValueError."""
+    with pytest.raises(ValueError):
+        bench.run(['spam'])
+
+
+def test_operator_args():
+    """Every operator has arguments it can be timed with."""
+    args = bench.operator_args(10)
+    for symbol, fn in yo.ops.items():
+        fn(*args[symbol])
+
+
+def test_workloads():
+    """Every workload can be rolled."""
+    for yadn in bench.WORKLOADS.values():
+        roll(yadn)
+
+
+# Baseline test cases.
+def test_compare():
+    """Benchmarks slower than the threshold are regressions."""
+    results = {'roll/small': 3.0, 'roll/huge pool': 1.0, 'lex/small': 1.0}
+    baseline = {'roll/small': 2.0, 'roll/huge pool': 1.0}
+    assert bench.compare(results, baseline) == [
+        ('roll/small', 2.0, 3.0, 1.5, True),
+        ('roll/huge pool', 1.0, 1.0, 1.0, False),
+    ]
+    assert not bench.compare(results, baseline, threshold=2)[0][-1]
+
+
+def test_save_and_load(tmp_path):
+    """Saved results can be loaded as a baseline."""
+    path = tmp_path / 'baseline.json'
+    results = {'roll/small': 1.5e-5}
+    bench.save(results, path)
+    assert bench.load(path) == results
+    assert 'python' in json.loads(path.read_text())
+
+
+def test_main_compare(capsys, mocker, tmp_path):
+    """Comparing against a faster baseline exits with a status of 1."""
+    mocker.patch('yadr.bench.MIN_TIME', 0)
+    path = tmp_path / 'baseline.json'
+    bench.save({'map-load/default': 1e-12}, path)
+    cmd = ['yadr.bench', '-g', 'map-load', '-r', '1', '-j', '-c', str(path)]
+    mocker.patch('sys.argv', cmd)
+    with pytest.raises(SystemExit) as ex:
+        bench.main()
+    assert ex.value.code == 1
+    data = json.loads(capsys.readouterr().out)
+    assert data['comparison']['map-load/default']['regression']
+
+
+def test_main_small_sizes(capsys, mocker):
+    """Pool sizes below two are rejected on the command line."""
+    mocker.patch('sys.argv', ['yadr.bench', '-s', '1'])
+    with pytest.raises(SystemExit) as ex:
+        bench.main()
+    assert ex.value.code == 2
+    assert '--sizes must each be at least 2.' in capsys.readouterr().err
@@ -0,0 +1,215 @@
+"""
+test_dist
+~~~~~~~~~
+
+Unit tests for the exact probability distributions of `yadr`.
+"""
+from collections import Counter
+from fractions import Fraction
+from itertools import product
+
+import pytest
+
+from yadr import dist, maps
+from yadr import operator as yo
+from yadr.model import Token
+from yadr.parser import Parser
+from yadr.yadr import distribution, load_default_maps, roll, tally_distribution
+
+
+# Utility functions.
+def brute_force(fn, num, size):
+    """Find a distribution by rolling every possible combination."""
+    rolls = list(product(range(1, size + 1), repeat=num))
+    counts = Counter(fn(roll) for roll in rolls)
+    return {k: Fraction(v, len(rolls)) for k, v in sorted(counts.items())}
+
+
+# Dice distribution test cases.
+def test_concat():
+    """Find the distribution of concatenated dice."""
+    def fn(roll):
+        return int(''.join(str(n % 10) for n in roll))
+    assert dist.concat(2, 12) == brute_force(fn, 2, 12)
+
+
+def test_die():
+    """Find the distribution of the sum of dice."""
+    assert dist.die(3, 6) == brute_force(sum, 3, 6)
+
+
+def test_die_zero():
+    """Rolling no dice always gives zero."""
+    assert dist.die(0, 6) == {0: 1}
+
+
+def test_exploding_die():
+    """Find the distribution of exploding dice. The explosions stop
+    after the explosion limit.
+    """
+    result = dist.exploding_die(1, 2)
+    assert result[1] == Fraction(1, 2)
+    assert result[3] == Fraction(1, 4)
+    assert max(result) == (yo.EXPLODE_LIMIT + 1) * 2
+    assert sum(result.values()) == 1
+
+
+def test_exploding_die_matches_roll():
+    """The distribution of exploding dice stops at the same explosion
+    limit as rolling them.
+    """
+    assert dist.exploding_die(1, 1) == {yo.EXPLODE_LIMIT + 1: 1}
+    assert roll('1d!1') == yo.EXPLODE_LIMIT + 1
+    token = yo.explode_limit.set(2)
+    try:
+        assert dist.exploding_die(2, 1) == {6: 1}
+        assert dist.exploding_die(1, 2) == {
+            1: Fraction(1, 2),
+            3: Fraction(1, 4),
+            5: Fraction(1, 8),
+            6: Fraction(1, 8),
+        }
+        assert roll('2d!1') == 6
+    finally:
+        yo.explode_limit.reset(token)
+
+
+def test_keep_high_die():
+    """Find the distribution of the highest die."""
+    assert dist.keep_high_die(3, 6) == brute_force(max, 3, 6)
+
+
+def test_keep_low_die():
+    """Find the distribution of the lowest die."""
+    assert dist.keep_low_die(3, 6) == brute_force(min, 3, 6)
+
+
+def test_wild_die():
+    """Find the distribution of dice with a wild die. A one on the wild
+    die loses the roll.
+    """
+    result = dist.wild_die(2, 4)
+    assert result[0] == Fraction(1, 4)
+    assert result[2 + 1] == Fraction(1, 16)
+    assert sum(result.values()) == 1
+
+
+def test_invalid_dice():
+    """Dice that can't be rolled raise a ValueError."""
+    with pytest.raises(ValueError):
+        dist.die(3, 0)
+    with pytest.raises(ValueError):
+        dist.keep_high_die(0, 6)
+
+
+# Tree distribution test cases.
+def test_arithmetic():
+    """Find the distribution of arithmetic on dice."""
+    def fn(roll):
+        return roll[0] + roll[1] - roll[2] * 2
+    assert distribution('2d3 - 1d3 * 2') == brute_force(fn, 3, 3)
+
+
+def test_comparison():
+    """Find the distribution of a comparison of dice."""
+    assert distribution('1d6 >= 5') == {
+        False: Fraction(2, 3),
+        True: Fraction(1, 3),
+    }
+
+
+def test_choice():
+    """Find the distribution of a choice made with dice."""
+    tokens = (
+        (Token.NUMBER, 1),
+        (Token.DICE_OPERATOR, 'd'),
+        (Token.NUMBER, 4),
+        (Token.COMPARISON_OPERATOR, '=='),
+        (Token.NUMBER, 4),
+        (Token.CHOICE_OPERATOR, '?'),
+        (Token.QUALIFIER, 'spam'),
+        (Token.OPTIONS_OPERATOR, ':'),
+        (Token.QUALIFIER, 'eggs'),
+    )
+    tree, = Parser().build(tokens)
+    assert dist.pmf(tree) == {
+        'eggs': Fraction(3, 4),
+        'spam': Fraction(1, 4),
+    }
+
+
+def test_dice_of_dice():
+    """Find the distribution when the number of dice is rolled."""
+    result = distribution('(1d2)d4')
+    assert result[1] == Fraction(1, 8)
+    assert result[8] == Fraction(1, 32)
+
+
+def test_dice_map():
+    """Find the distribution of a mapped roll."""
+    assert distribution('1d3m"fate"') == {
+        '': Fraction(1, 3),
+        '+': Fraction(1, 3),
+        '-': Fraction(1, 3),
+    }
+
+
+def test_compound_roll():
+    """Each roll in a compound roll has its own distribution."""
+    assert distribution('3; 1d2') == (
+        {3: 1},
+        {1: Fraction(1, 2), 2: Fraction(1, 2)},
+    )
+
+
+def test_pool_not_supported():
+    """Pools of dice don't have a distribution of single values."""
+    with pytest.raises(ValueError):
+        distribution('S 3g6')
+
+
+# Tally distribution test cases.
+def test_tally_pool():
+    """Find the distribution of the symbols of a mixed pool."""
+    ability = load_default_maps()['sweote ability']
+    difficulty = load_default_maps()['sweote difficulty']
+
+    def fn(roll):
+        mapped = [ability[face] for face in roll[:3]]
+        mapped.extend(difficulty[face] for face in roll[3:])
+        return maps.tally(tuple(mapped))
+
+    exp = brute_force(fn, 5, 8)
+    result = dist.tally_pool([(3, 8, ability), (2, 8, difficulty)])
+    assert result == exp
+
+
+def test_tally_pool_plain_dict():
+    """Dice maps that aren't dense maps can be tallied."""
+    result = dist.tally_pool([(2, 2, {1: '', 2: '+'})])
+    assert result == {
+        (): Fraction(1, 4),
+        (('+', 1),): Fraction(1, 2),
+        (('+', 2),): Fraction(1, 4),
+    }
+
+
+def test_tally_pool_missing_face():
+    """Every face of the dice must be in the dice map."""
+    with pytest.raises(ValueError):
+        dist.tally_pool([(1, 4, maps.DenseMap({1: '', 2: '+'}))])
+
+
+def test_tally_distribution():
+    """Each roll in a compound roll is tallied together."""
+    result = tally_distribution('1g3m"fate"; 1g3m"fate"')
+    assert result[()] == Fraction(1, 9)
+    assert result[(('+', 1), ('-', 1))] == Fraction(2, 9)
+    assert result[(('-', 2),)] == Fraction(1, 9)
+
+
+def test_tally_distribution_not_mapped_pool():
+    """Only mapped pools can be tallied."""
+    for yadn in ('3g6', '1d3m"fate"', '(1d2)g3m"fate"'):
+        with pytest.raises(ValueError):
+            tally_distribution(yadn)
@@ -4,13 +4,16 @@ test_lex
 
 Unit tests for the dice notation lexer.
 """
+import io
 from collections import namedtuple
 from functools import partial
 
 import pytest
 
-from yadr import lex
+from yadr import lex, maps
 from yadr import model as m
+from yadr import pools
+from yadr.base import LexCache, lex_cache
 
 
 # Registration.
@@ -577,3 +580,200 @@ def test_start_roll():
         m.Token.U_POOL_DEGEN_OPERATOR,
     ]
     lexer_test(token, before, alloweds)
+
+
+# Transition table test cases.
+def test_transition_table_is_shared():
+    """The transition table is compiled once for each lexer class."""
+    assert lex.Lexer()._table is lex.Lexer()._table
+
+
+def test_lex_compound_roll():
+    """Lexing a long compound roll gives the same tokens as lexing
+    each of the rolls.
+    """
+    yadn = '3d6 + 2;  4dh6;2d20 >= 15 ; S 10g6\t- -3'
+    lexer = lex.Lexer()
+    expected = []
+    for roll in yadn.split(';'):
+        if expected:
+            expected.append((m.Token.ROLL_DELIMITER, ';'))
+        expected.extend(lexer.lex(roll))
+    assert lexer.lex(yadn) == tuple(expected)
+
+
+# Fast lexer test cases.
+def test_fast_lexer():
+    """Given valid YADN, the fast lexer returns the same tokens as the
+    lexer.
+    """
+    yadns = (
+        '3d6 + 2;  4dh6;2d20 >= 15 ; S 10g6\t- -3',
+        '-3 - -2',
+        '[1, 2, 3]ph2',
+        '{"spam"=1:"e",2:"b"};1d2m"spam"',
+        'T ? "a" : "b"',
+        '(1 + 2) * 3^2 % 4',
+        '3g!6; [1, 2] ns 2',
+    )
+    lexer = lex.Lexer()
+    fast = lex.FastLexer()
+    for yadn in yadns:
+        exp = lexer.lex(yadn)
+        lex_cache.clear()
+        assert fast.lex(yadn) == exp
+
+
+def test_fast_lexer_error():
+    """Given invalid YADN, the fast lexer raises the same error as the
+    lexer.
+    """
+    yadns = ('3 - - 2', '3hd6', '- 3', '3 ;; 2', '3d6 + T')
+    for yadn in yadns:
+        with pytest.raises(ValueError) as expected:
+            lex.Lexer().lex(yadn)
+        with pytest.raises(ValueError) as actual:
+            lex.FastLexer().lex(yadn)
+        assert str(actual.value) == str(expected.value)
+
+
+def test_fast_lexer_shares_pattern(mocker):
+    """The lexer rules are only read once, the first time a fast lexer
+    is built, so later fast lexers don't build a lexer.
+    """
+    lex.FastLexer()
+    mocker.patch('yadr.lex.Lexer', side_effect=AssertionError)
+    lex_cache.clear()
+    assert lex.FastLexer().lex('3d6') == (
+        (m.Token.NUMBER, 3),
+        (m.Token.DICE_OPERATOR, 'd'),
+        (m.Token.NUMBER, 6),
+    )
+
+
+# Pool literal test cases.
+def test_large_pool(mocker):
+    """Large pools of integers are parsed without the pool lexer."""
+    values = tuple(range(-5, 5000))
+    yadn = str(list(values))
+    plexer = mocker.patch('yadr.pools.Lexer')
+    lex_cache.clear()
+    assert lex.Lexer().lex(yadn) == ((m.Token.POOL, values),)
+    assert plexer.call_count == 0
+
+
+def test_pool_white_space():
+    """White space is allowed around the members of pools."""
+    lex_cache.clear()
+    assert lex.Lexer().lex('[ 1 ,\t-2,\n3 ]') == (
+        (m.Token.POOL, (1, -2, 3)),
+    )
+
+
+def test_invalid_pool():
+    """Invalid pools raise the same errors as the pool lexer."""
+    yadns = ('[1 2]', '[1,,2]', '[1,]', '[]', '[- 1]', '[1, a]')
+    for yadn in yadns:
+        with pytest.raises(ValueError) as expected:
+            pools.Lexer().lex(yadn)
+        lex_cache.clear()
+        with pytest.raises(ValueError) as actual:
+            lex.Lexer().lex(yadn)
+        assert str(actual.value) == str(expected.value)
+
+
+# Streaming test cases.
+def test_feed():
+    """Code fed in chunks gives the same tokens as lexing it at once."""
+    yadns = (
+        '3d6 + 2;  4dh6;2d20 >= 15 ; S 10g6\t- -3',
+        '{"spam"=1:"e",2:"b"};1d2m"spam"',
+        'T ? "a b" : "c"; [1, 2, 3]ph2; -3 - -2',
+    )
+    for yadn in yadns:
+        exp = lex.Lexer().lex(yadn)
+        for size in (1, 2, 3, 7):
+            lexer = lex.Lexer()
+            tokens = []
+            for i in range(0, len(yadn), size):
+                tokens.extend(lexer.feed(yadn[i:i + size]))
+            tokens.extend(lexer.close())
+            assert tuple(tokens) == exp
+
+
+def test_feed_returns_completed_tokens():
+    """Tokens are returned as soon as they are complete, and the
+    returned tokens aren't kept by the lexer.
+    """
+    lexer = lex.Lexer()
+    assert lexer.feed('3d6 + 2') == (
+        (m.Token.NUMBER, 3),
+        (m.Token.DICE_OPERATOR, 'd'),
+        (m.Token.NUMBER, 6),
+        (m.Token.AS_OPERATOR, '+'),
+    )
+    assert len(lexer.tokens) <= 1
+    assert lexer.close() == ((m.Token.NUMBER, 2),)
+    assert lexer.lex('1d4') == lex.Lexer().lex('1d4')
+
+
+def test_lex_iter():
+    """Lex code from a file, yielding each token."""
+    yadn = '; '.join(['3d6 + 2', '{"spam"=1:"e",2:"b"}', '1d2m"spam"'] * 20)
+    file = io.StringIO(yadn)
+    lexer = lex.Lexer()
+    assert tuple(lexer.lex_iter(file, size=5)) == lex.Lexer().lex(yadn)
+
+
+# Lex cache test cases.
+def test_lex_cache():
+    """Lexing the same text again returns the cached tokens."""
+    lex_cache.clear()
+    tokens = lex.Lexer().lex('3d6 + 2')
+    assert lex.Lexer().lex('3d6 + 2') is tokens
+    assert lex.FastLexer().lex('3d6 + 2') is tokens
+    assert lex_cache.info() == {
+        'hits': 2,
+        'misses': 1,
+        'maxsize': lex_cache.maxsize,
+        'size': 1,
+    }
+
+
+def test_lex_cache_sub_lexers():
+    """Maps lexed by the sub-lexers are cached."""
+    lex_cache.clear()
+    lex.Lexer().lex('{"spam"=1:"e",2:"b"}; 1d2m"spam"')
+    assert (maps.Lexer, '{"spam"=1:"e",2:"b"}') in lex_cache._tokens
+
+
+def test_lex_cache_does_not_cache_errors():
+    """Text that can't be lexed isn't cached."""
+    lex_cache.clear()
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            lex.Lexer().lex('3hd6')
+    assert lex_cache.info()['misses'] == 2
+    assert len(lex_cache) == 0
+
+
+def test_lex_cache_evicts_least_recently_used():
+    """The least recently used text is removed when the cache is full."""
+    cache = LexCache(maxsize=2)
+    cache.put((lex.Lexer, 'a'), ())
+    cache.put((lex.Lexer, 'b'), ())
+    cache.get((lex.Lexer, 'a'))
+    cache.put((lex.Lexer, 'c'), ())
+    assert cache.get((lex.Lexer, 'b')) is None
+    assert cache.get((lex.Lexer, 'a')) == ()
+    cache.maxsize = 1
+    assert list(cache._tokens) == [(lex.Lexer, 'a')]
+
+
+def test_lex_cache_disabled():
+    """A cache with a maximum size of zero stores nothing."""
+    cache = LexCache(maxsize=0)
+    cache.put((lex.Lexer, 'a'), ())
+    assert len(cache) == 0
+    with pytest.raises(ValueError):
+        cache.maxsize = -1
@@ -4,6 +4,7 @@ test_maps
 
 Unittests for the yadr.maps module.
 """
+import pickle
 from collections import namedtuple
 from functools import partial
 
@@ -412,3 +413,92 @@ def test_parser_with_numbers():
             3: 1,
         }
     )
+
+
+# Dense map test cases.
+def test_parser_builds_dense_map():
+    """Parsed dice maps are dense maps."""
+    tokens = maps.Lexer().lex('{"spam"=1:"eggs",3:"bacon"}')
+    _, map_ = maps.Parser().parse(tokens)
+    assert isinstance(map_, maps.DenseMap)
+    assert map_.base == 0
+    assert map_.table == (None, 'eggs', None, 'bacon')
+
+
+def test_dense_map_gather():
+    """Pools are mapped through the table."""
+    map_ = maps.DenseMap({1: -1, 2: 0, 3: 1})
+    assert map_.gather((3, 1, 2, 3)) == ('1', '-1', '0', '1')
+    assert map_.gather(()) == ()
+
+
+def test_dense_map_gather_missing():
+    """Mapping a face that isn't in the map raises KeyError, including
+    faces that would be negative indices into the table.
+    """
+    map_ = maps.DenseMap({1: 'eggs', 3: 'bacon'})
+    for pool, face in (((1, 2), 2), ((1, 4), 4), ((-1, 1), -1)):
+        with pytest.raises(KeyError, match=str(face)):
+            map_.gather(pool)
+
+
+def test_dense_map_negative_keys():
+    """Maps with negative keys start their tables at the lowest key."""
+    map_ = maps.DenseMap({-1: 'spam', 1: 'eggs'})
+    assert map_.base == -1
+    assert map_.gather((1, -1)) == ('eggs', 'spam')
+
+
+def test_dense_map_sparse():
+    """Maps with keys too far apart for a table are still mapped."""
+    map_ = maps.DenseMap({1: 'spam', maps.MAX_TABLE_SPAN + 1: 'eggs'})
+    assert map_.table is None
+    assert map_.gather((maps.MAX_TABLE_SPAN + 1, 1)) == ('eggs', 'spam')
+
+
+def test_dense_map_changes():
+    """Changing a dense map rebuilds its tables."""
+    map_ = maps.DenseMap({1: 'spam'})
+    map_[2] = 'eggs'
+    assert map_.gather((2,)) == ('eggs',)
+    del map_[1]
+    with pytest.raises(KeyError):
+        map_.gather((1,))
+    map_.update({1: 'bacon'})
+    assert map_.gather((1, 2)) == ('bacon', 'eggs')
+
+
+def test_dense_map_pickle():
+    """Dense maps can be pickled."""
+    map_ = maps.DenseMap({1: 'spam', 2: 'eggs'})
+    unpickled = pickle.loads(pickle.dumps(map_))
+    assert unpickled == map_
+    assert unpickled.table == map_.table
+
+
+def test_dense_map_tallies():
+    """The tally of each face is counted once and recounted when the
+    map changes.
+    """
+    map_ = maps.DenseMap({1: '', 2: '+-+'})
+    assert map_.tallies == {1: (), 2: (('+', 2), ('-', 1))}
+    map_[1] = '-'
+    assert map_.tallies[1] == (('-', 1),)
+
+
+# Tally test cases.
+def test_tally():
+    """The symbols of mapped results are counted, ignoring whitespace."""
+    assert maps.tally('success success') == (
+        ('c', 4), ('e', 2), ('s', 6), ('u', 2)
+    )
+    assert maps.tally((('++', '•'), ('°',), '')) == (
+        ('+', 2), ('°', 1), ('•', 1)
+    )
+    assert maps.tally(()) == ()
+
+
+def test_tally_not_mapped():
+    """Only strings can be tallied."""
+    with pytest.raises(ValueError):
+        maps.tally(('+', 3))
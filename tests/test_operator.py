@@ -4,6 +4,8 @@ test_operator
 
 Dice operators for the `yadr` package.
 """
+import pytest
+
 from yadr import operator as op
 
 
@@ -112,6 +114,13 @@ def test_pool_concatenate(mocker):
     assert op.pool_concatenate(pool) == 314
 
 
+def test_pool_concatenate_face_pool(mocker):
+    """Face pools concatenate their dice in the order they expand."""
+    pool = op.FacePool({1: 2, 10: 1, 3: 1})
+    expected = int(''.join(str(n) for n in pool.expand()))
+    assert op.pool_concatenate(pool) == expected
+
+
 def test_pool_count(mocker):
     """Count the members in the pool."""
     pool = (3, 1, 4)
@@ -159,6 +168,32 @@ def test_exploding_pool(mocker):
     assert op.exploding_pool(num, size) == (2, 9, 1, 1, 13, 3)
 
 
+def test_exploding_pool_limit(mocker):
+    """Exploding dice stop exploding at the explosion limit."""
+    mocker.patch('random.randint', return_value=6)
+    token = op.explode_limit.set(3)
+    try:
+        assert op.exploding_pool(2, 6) == (24, 24)
+    finally:
+        op.explode_limit.reset(token)
+
+
+def test_exploding_pool_one_side():
+    """Dice with one side explode until the explosion limit."""
+    assert op.exploding_pool(1, 1) == (op.EXPLODE_LIMIT + 1,)
+
+
+def test_exploding_pool_large():
+    """Large pools of exploding dice are rolled as counts of each
+    face.
+    """
+    num = op.FACE_POOL_THRESHOLD * 10
+    pool = op.exploding_pool(num, 6)
+    assert isinstance(pool, op.FacePool)
+    assert len(pool) == num
+    assert not any(face % 6 == 0 for face in pool.counts)
+
+
 # Pool generation operations using `secrets` test cases.
 def test_dice_pool_secrets(mocker):
     """When called, :func:`operator.dice_pool_secrets` should use
@@ -216,6 +251,41 @@ def test_pool_keep_low():
     assert op.pool_keep_low(pool, keep) == (1, 2, 1)
 
 
+@pytest.mark.parametrize('pool', [
+    (1, 2, 5, 6),
+    (),
+    op.FacePool({1: 2, 6: 1}),
+])
+def test_pool_keep_negative(pool):
+    """A negative number of dice can't be kept."""
+    for pool_op in (op.pool_keep_high, op.pool_keep_low):
+        with pytest.raises(ValueError, match='cannot be negative'):
+            pool_op(pool, -1)
+
+
+def test_pool_keep_high_ties():
+    """When dice tie, the earliest of the tied dice are removed."""
+    pool = (5, 3, 5, 1, 5)
+    keep = 2
+    assert op.pool_keep_high(pool, keep) == (5, 5)
+    assert op.pool_keep_high(pool, 4) == (5, 3, 5, 5)
+
+
+def test_pool_keep_low_ties():
+    """When dice tie, the earliest of the tied dice are removed."""
+    pool = (1, 3, 1, 5, 1)
+    keep = 4
+    assert op.pool_keep_low(pool, keep) == (1, 3, 1, 1)
+    assert op.pool_keep_low(pool, 2) == (1, 1)
+
+
+def test_pool_keep_more_than_pool():
+    """Keeping more dice than are in the pool keeps the whole pool."""
+    pool = (1, 3, 2)
+    assert op.pool_keep_high(pool, 5) == pool
+    assert op.pool_keep_low(pool, 5) == pool
+
+
 def test_pool_keep_below():
     """Perform a modulo on all members."""
     pool = (1, 2, 5, 6, 4, 5, 1, 6, 3, 6)
@@ -228,3 +298,63 @@ def test_pool_keep_below():
     pool = (1, 2, 5, 6, 4, 5, 1, 6, 3, 6)
     cut = 5
     assert op.pool_remove(pool, cut) == (1, 2, 6, 4, 1, 6, 3, 6)
+
+
+# Face pool test cases.
+def test_dice_pool_large():
+    """Large pools of dice are rolled as counts of each face."""
+    num = op.FACE_POOL_THRESHOLD * 10
+    pool = op.dice_pool(num, 6)
+    assert isinstance(pool, op.FacePool)
+    assert len(pool) == num
+    assert set(pool.counts) <= {1, 2, 3, 4, 5, 6}
+
+
+def test_face_pool_expand():
+    """Face pools expand to the value of each die."""
+    pool = op.FacePool({1: 2, 4: 0, 6: 1})
+    assert sorted(pool.expand()) == [1, 1, 6]
+    assert pool.expand() is pool.expand()
+    assert len(pool) == 3
+
+
+def test_face_pool_operations():
+    """Pool operations on face pools give the same dice as on the
+    values of each die.
+    """
+    pool = op.FacePool({1: 3, 2: 1, 4: 2, 6: 5})
+    values = pool.expand()
+    pool_ops = (
+        op.pool_cap,
+        op.pool_floor,
+        op.pool_keep_above,
+        op.pool_keep_below,
+        op.pool_keep_high,
+        op.pool_keep_low,
+        op.pool_modulo,
+        op.pool_remove,
+    )
+    for pool_op in pool_ops:
+        result = pool_op(pool, 4)
+        assert isinstance(result, op.FacePool)
+        assert sorted(result) == sorted(pool_op(values, 4))
+    for degen_op in (op.count_successes, op.count_successes_with_botch):
+        assert degen_op(pool, 4) == degen_op(values, 4)
+    for u_degen_op in (op.pool_count, op.pool_sum):
+        assert u_degen_op(pool) == u_degen_op(values)
+
+
+def test_binomial(mocker):
+    """The number of successes averages to the expected number."""
+    mocker.patch.object(op, '_binomialvariate', None)
+    op._seed('spam')
+    for num, chance in ((20, 0.2), (1000, 0.3), (50, 0.9)):
+        results = [op._binomial(num, chance) for _ in range(2000)]
+        assert all(0 <= n <= num for n in results)
+        assert abs(sum(results) / 2000 - num * chance) < num * 0.05
+
+
+def test_binomial_tiny_chance(mocker):
+    """A chance too small to change one never succeeds."""
+    mocker.patch.object(op, '_binomialvariate', None)
+    assert op._binomial(100, 1e-300) == 0
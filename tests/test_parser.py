@@ -4,6 +4,9 @@ test_parse
 
 Unit tests for the yadr.parse module.
 """
+import io
+
+from yadr import lex
 from yadr import operator as yo
 from yadr import parser as p
 from yadr.model import Token
@@ -577,6 +580,59 @@ def test_roll_delimiter_remove_none_result(mocker):
     parser_test(exp, tokens)
 
 
+def test_many_rolls():
+    """Return the results of many rolls in order."""
+    exp = tuple(range(10_000))
+    tokens = []
+    for n in exp:
+        tokens.extend(((Token.NUMBER, n), (Token.ROLL_DELIMITER, ';')))
+    parser_test(exp, tuple(tokens[:-1]))
+
+
+def test_parse_iter(mocker):
+    """Yield the result of each roll as it is executed."""
+    mocker.patch('random.randint', side_effect=(2, 1))
+    tokens = (
+        (Token.MAP, ('spam', {1: 'win', 2: 'lose'})),
+        (Token.ROLL_DELIMITER, ';'),
+        (Token.NUMBER, 1),
+        (Token.DICE_OPERATOR, 'd'),
+        (Token.NUMBER, 2),
+        (Token.MAPPING_OPERATOR, 'm'),
+        (Token.QUALIFIER, 'spam'),
+        (Token.ROLL_DELIMITER, ';'),
+        (Token.NUMBER, 1),
+        (Token.DICE_OPERATOR, 'd'),
+        (Token.NUMBER, 2),
+    )
+    parser = p.Parser()
+    assert list(parser.parse_iter(tokens)) == ['lose', 1]
+
+
+def test_parse_iter_is_lazy():
+    """Tokens are only read as far as the end of the current roll."""
+    tokens = iter((
+        (Token.NUMBER, 1),
+        (Token.ROLL_DELIMITER, ';'),
+        (Token.NUMBER, 2),
+        (Token.ROLL_DELIMITER, ';'),
+        (Token.NUMBER, 3),
+    ))
+    parser = p.Parser()
+    results = parser.parse_iter(tokens)
+    assert next(results) == 1
+    assert next(tokens) == (Token.NUMBER, 2)
+
+
+def test_parse_iter_from_file(mocker):
+    """Parse rolls streamed from a file by the lexer."""
+    mocker.patch('random.randint', side_effect=(3, 5))
+    file = io.StringIO('1d6 + 1; {"spam"=1:"e",5:"b"}; 1d6m"spam"; 4')
+    tokens = lex.Lexer().lex_iter(file, size=4)
+    parser = p.Parser()
+    assert list(parser.parse_iter(tokens)) == [4, 'b', 4]
+
+
 # Test order of precedence.
 def test_can_perform_multiple_operations():
     """The parser can parse statements with multiple operators."""
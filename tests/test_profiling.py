@@ -0,0 +1,148 @@
+"""
+test_profiling
+~~~~~~~~~~~~~~
+
+Unit tests for the yadr.profiling module.
+"""
+import json
+import pickle
+
+import pytest
+
+from yadr import __main__, profiling, yadr
+
+
+# Fixtures.
+@pytest.fixture(autouse=True)
+def no_profiler():
+    """Make sure each test starts and ends with profiling disabled."""
+    profiling.disable()
+    yield
+    profiling.disable()
+
+
+# Profiler test cases.
+def test_profiler_record():
+    """Calls to phases and operators are counted and timed."""
+    profiler = profiling.Profiler()
+    profiler.record('phase', 'lex', 10)
+    profiler.record('phase', 'lex', 5)
+    profiler.record('operator', 'd', 7)
+    assert profiler.as_dict() == {
+        'phases': {'lex': {'calls': 2, 'ns': 15}},
+        'operators': {'d': {'calls': 1, 'ns': 7}},
+    }
+
+
+def test_profiler_reset():
+    """Resetting a profiler forgets its records."""
+    profiler = profiling.Profiler()
+    profiler.record('phase', 'lex', 10)
+    profiler.reset()
+    assert profiler.as_dict() == {'phases': {}, 'operators': {}}
+
+
+def test_profiler_to_json():
+    """The records can be exported as JSON."""
+    profiler = profiling.Profiler()
+    profiler.record('operator', '+', 3)
+    assert json.loads(profiler.to_json()) == profiler.as_dict()
+
+
+# Profiling test cases.
+def test_profile_roll():
+    """Each phase and operator of a roll is recorded."""
+    with profiling.profile() as profiler:
+        yadr.roll('3d6 + 2; 2g3m"fate"', yadn_out=True)
+    data = profiler.as_dict()
+    assert set(data['phases']) == {
+        'compute', 'encode', 'lex', 'map-load', 'parse'
+    }
+    assert set(data['operators']) == {'+', 'd', 'g', 'm'}
+    assert data['operators']['d'] == {
+        'calls': 1,
+        'ns': data['operators']['d']['ns'],
+    }
+    assert all(item['ns'] >= 0 for item in data['phases'].values())
+
+
+def test_profile_folded_operators():
+    """Operators run on constants while compiling aren't timed."""
+    with profiling.profile() as profiler:
+        yadr.roll('2 + 3 * 4')
+    assert profiler.as_dict()['operators'] == {}
+
+
+def test_profile_nested_phases(mocker):
+    """The time of a phase run within another phase is only recorded
+    for the inner phase.
+    """
+    mocker.patch(
+        'yadr.profiling.perf_counter_ns',
+        side_effect=(0, 10, 15, 30)
+    )
+    with profiling.profile() as profiler:
+        with profiling.phase('parse'):
+            with profiling.phase('map-load'):
+                pass
+    assert profiler.as_dict()['phases'] == {
+        'map-load': {'calls': 1, 'ns': 5},
+        'parse': {'calls': 1, 'ns': 25},
+    }
+
+
+def test_profile_add_dice_map():
+    """Loading dice maps from a file is recorded."""
+    with profiling.profile() as profiler:
+        yadr.add_dice_map('tests/data/__test_dice_map.txt')
+    assert profiler.as_dict()['phases']['map-load']['calls'] == 1
+
+
+def test_profile_nested():
+    """Profiling restores the previous profiler when it ends."""
+    with profiling.profile() as outer:
+        with profiling.profile() as inner:
+            yadr.roll('3')
+        yadr.roll('3')
+    assert inner.as_dict()['phases']['parse']['calls'] == 1
+    assert outer.as_dict()['phases']['parse']['calls'] == 1
+    assert profiling.disable() is None
+
+
+def test_disabled():
+    """Nothing is recorded when profiling is disabled."""
+    profiler = profiling.enable()
+    compiled = yadr.compile('3d6')
+    profiling.disable()
+    compiled.roll()
+    yadr.roll('3d6')
+    assert 'd' not in profiler.as_dict()['operators']
+    assert profiler.as_dict()['phases']['lex']['calls'] == 1
+
+
+def test_disabled_operators_not_wrapped():
+    """Operators aren't wrapped when profiling is disabled."""
+    def fn(a, b):
+        return a + b
+
+    assert profiling.timed('+', fn) is fn
+    assert profiling.phase('lex') is profiling.phase('parse')
+
+
+def test_timed_pickle():
+    """Timed operators can be pickled for worker processes."""
+    profiling.enable()
+    compiled = yadr.compile('3d6 + 2')
+    code = pickle.loads(pickle.dumps(compiled._code))
+    assert [op for op, _ in code[0]] == [op for op, _ in compiled._code[0]]
+
+
+def test_profile_cli(mocker, capsys):
+    """The -p option writes the profile to stderr."""
+    mocker.patch('sys.argv', ['python -m yadr', '3', '-p'])
+    __main__.parse_cli()
+    captured = capsys.readouterr()
+    assert captured.out == '3\n'
+    data = json.loads(captured.err)
+    assert data['phases']['lex']['calls'] == 1
+    assert profiling.disable() is None
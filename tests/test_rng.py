@@ -0,0 +1,83 @@
+"""
+test_rng
+~~~~~~~~
+
+Unit tests for the random number generators of `yadr`.
+"""
+from collections import Counter
+
+import pytest
+
+from yadr import rng
+
+
+# Utility functions.
+def backend_test(backend):
+    """A backend rolls every face of a die and nothing else."""
+    rolls = Counter(backend.roll(6) for _ in range(600))
+    assert set(rolls) == {1, 2, 3, 4, 5, 6}
+    pool = backend.pool(100, 4)
+    assert len(pool) == 100
+    assert set(pool) <= {1, 2, 3, 4}
+    assert all(0 <= backend.random() < 1 for _ in range(100))
+    values = list(range(20))
+    backend.shuffle(values)
+    assert sorted(values) == list(range(20))
+    with pytest.raises(ValueError):
+        backend.roll(0)
+
+
+# Backend test cases.
+def test_random_backend():
+    """Roll dice with a private random.Random."""
+    backend_test(rng.RandomBackend())
+
+
+def test_random_backend_seeded():
+    """Seeded random.Random backends repeat their rolls."""
+    a = rng.RandomBackend(1138)
+    b = rng.RandomBackend(1138)
+    assert a.pool(20, 6) == b.pool(20, 6)
+
+
+def test_numpy_backend():
+    """Roll dice with a numpy Generator."""
+    pytest.importorskip('numpy')
+    backend_test(rng.NumpyBackend())
+    backend_test(rng.NumpyBackend(bit_generator='Philox'))
+
+
+def test_numpy_backend_seeded():
+    """Seeded numpy backends repeat their rolls."""
+    pytest.importorskip('numpy')
+    a = rng.NumpyBackend(1138, 'Philox')
+    b = rng.NumpyBackend(1138, 'Philox')
+    assert a.pool(20, 6) == b.pool(20, 6)
+    assert a.roll(6) == b.roll(6)
+
+
+def test_secrets_backend():
+    """Roll dice with secrets."""
+    backend_test(rng.SecretsBackend())
+
+
+def test_urandom_backend():
+    """Roll dice with bytes from os.urandom."""
+    backend_test(rng.UrandomBackend())
+
+
+def test_urandom_backend_buffers(mocker):
+    """Bytes are read from the operating system in blocks."""
+    urandom = mocker.patch('os.urandom', side_effect=lambda n: b'\xff' * n)
+    backend = rng.UrandomBackend(buffer_size=8)
+    assert [backend.below(2) for _ in range(8)] == [1] * 8
+    assert urandom.call_count == 1
+    backend.below(2)
+    assert urandom.call_count == 2
+
+
+def test_urandom_backend_rejects_out_of_range(mocker):
+    """Values that don't fit in the range are thrown out."""
+    mocker.patch('os.urandom', side_effect=(b'\xe0\xa0', b'\x40'))
+    backend = rng.UrandomBackend(buffer_size=2)
+    assert backend.below(5) == 2
@@ -0,0 +1,443 @@
+"""
+test_server
+~~~~~~~~~~~
+
+Unit tests for the yadr.server module.
+"""
+import asyncio
+import json
+import threading
+
+import pytest
+
+from yadr import __main__
+from yadr import server as ys
+
+
+# Utility functions.
+async def request(reader, writer, method, path, data=None, close=False):
+    """Send a request to a server and read the response."""
+    body = b'' if data is None else json.dumps(data).encode('utf8')
+    lines = [f'{method} {path} HTTP/1.1', f'Content-Length: {len(body)}']
+    if close:
+        lines.append('Connection: close')
+    head = '\r\n'.join(lines) + '\r\n\r\n'
+    writer.write(head.encode('latin-1') + body)
+    await writer.drain()
+    return await read_response(reader)
+
+
+async def read_response(reader):
+    """Read the status and data of a response."""
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while (line := await reader.readline()) != b'\r\n':
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.lower()] = value.strip()
+    body = await reader.readexactly(int(headers['content-length']))
+    return status, json.loads(body)
+
+
+def loopback(client, path=None, server=None):
+    """Run a client against a server listening on a Unix domain socket
+    if a path is given, or a free port of localhost if not.
+    """
+    async def run():
+        srv = await (server or ys.RollServer()).start(path, 0)
+        async with srv:
+            if path is not None:
+                conn = await asyncio.open_unix_connection(str(path))
+            else:
+                port = srv.sockets[0].getsockname()[1]
+                conn = await asyncio.open_connection('127.0.0.1', port)
+            reader, writer = conn
+            try:
+                return await client(reader, writer)
+            finally:
+                writer.close()
+                await writer.wait_closed()
+
+    return asyncio.run(run())
+
+
+# RollServer test cases.
+def test_roll():
+    """Rolling returns the result and the result as YADN."""
+    server = ys.RollServer()
+    assert server.roll('3d6 + 2; 3', seed=5) == {
+        'result': (9, 3),
+        'yadn': '9; 3',
+    }
+
+
+def test_roll_seeded():
+    """Rolls with the same seed have the same result."""
+    server = ys.RollServer()
+    assert server.roll('10d10', seed=7) == server.roll('10d10', seed=7)
+
+
+def test_compile_cached():
+    """YADN is only compiled the first time it's rolled."""
+    server = ys.RollServer()
+    assert server.compile('3d6') is server.compile('3d6')
+    assert server.compile('3d6') is not server.compile('3d8')
+
+
+def test_compile_cache_size():
+    """Only the most recently used compiled rolls are kept."""
+    server = ys.RollServer(cache_size=2)
+    first = server.compile('1d6')
+    server.compile('2d6')
+    server.compile('1d6')
+    server.compile('3d6')
+    assert server.compile('1d6') is first
+    assert server.compile('2d6') is not server.compile('3d6')
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'cache_size': 0},
+    {'max_sessions': 0},
+    {'timeout': 0},
+    {'workers': 0},
+])
+def test_server_invalid(kwargs):
+    """The caches must be able to hold at least one item, and rolls
+    need time and a worker to roll them.
+    """
+    with pytest.raises(ValueError):
+        ys.RollServer(**kwargs)
+
+
+def test_session_maps():
+    """Dice maps added to a session are only used by that session."""
+    server = ys.RollServer()
+    assert server.add_maps('{"coin"=1:"tails",2:"heads"}', 'a') == ['coin']
+    assert server.roll('1d2m"coin"', 'a')['result'] in ('heads', 'tails')
+    with pytest.raises(KeyError):
+        server.roll('1d2m"coin"', 'b')
+    assert server.roll('1d3m"fate"', 'a')['result'] in ('-', '', '+')
+
+
+def test_session_maps_replace_compiled():
+    """Changing the maps of a session recompiles its rolls."""
+    server = ys.RollServer()
+    server.add_maps('{"coin"=1:"tails",2:"tails"}', 'a')
+    server.roll('1d2m"coin"', 'a')
+    server.add_maps('{"coin"=1:"heads",2:"heads"}', 'a')
+    assert server.roll('1d2m"coin"', 'a')['result'] == 'heads'
+
+
+def test_clear_maps():
+    """Clearing a session forgets its dice maps."""
+    server = ys.RollServer()
+    server.add_maps('{"coin"=1:"tails",2:"heads"}', 'a')
+    server.clear_maps('a')
+    assert server.sessions == {}
+    with pytest.raises(KeyError):
+        server.roll('1d2m"coin"', 'a')
+
+
+def test_max_sessions():
+    """Only the most recently used sessions are kept."""
+    server = ys.RollServer(max_sessions=2)
+    server.add_maps('{"coin"=1:"tails",2:"heads"}', 'a')
+    server.add_maps('{"coin"=1:"tails",2:"heads"}', 'b')
+    server.roll('1d2m"coin"', 'a')
+    server.add_maps('{"coin"=1:"tails",2:"heads"}', 'c')
+    assert list(server.sessions) == ['a', 'c']
+    assert set(server._compiled) <= {None, 'a', 'c'}
+    with pytest.raises(KeyError):
+        server.roll('1d2m"coin"', 'b')
+
+
+def test_roll_in_process():
+    """Without a timeout, rolls are made in the server's process."""
+    server = ys.RollServer(timeout=None)
+    assert server.roll('3d6 + 2; 3', seed=5)['result'] == (9, 3)
+    assert list(server._compiled[None]) == ['3d6 + 2; 3']
+    assert server._idle == []
+
+
+def test_roll_timeout():
+    """Rolls that take too long are stopped, and the next roll gets a
+    new worker.
+    """
+    server = ys.RollServer(timeout=0.5, workers=1)
+    try:
+        with pytest.raises(ys.RequestError) as exc_info:
+            server.roll('7^100000000')
+        assert exc_info.value.status == 504
+        assert server._idle == []
+        assert server.roll('3')['result'] == 3
+        assert len(server._idle) == 1
+    finally:
+        server.close()
+    assert server._idle == []
+
+
+def test_roll_worker_error():
+    """Errors in a worker are raised again in the server."""
+    server = ys.RollServer(workers=1)
+    try:
+        with pytest.raises(ZeroDivisionError):
+            server.roll('1d6 / 0')
+        assert server.roll('3')['result'] == 3
+    finally:
+        server.close()
+
+
+# Request test cases.
+def test_respond_roll():
+    """A roll request responds with the result."""
+    server = ys.RollServer()
+    body = json.dumps({'yadn': '3d6', 'seed': 5}).encode()
+    assert server.respond('POST', '/roll', body) == (200, {
+        'result': 7,
+        'yadn': '7',
+    })
+
+
+@pytest.mark.parametrize('method,path,body,status,error', [
+    ('POST', '/spam', b'', 404, 'Unknown path /spam.'),
+    ('GET', '/roll', b'', 405, '/roll does not allow GET.'),
+    ('POST', '/roll', b'{', 400, 'The request is not valid JSON'),
+    ('POST', '/roll', b'[]', 400, 'The request must be a JSON object.'),
+    ('POST', '/roll', b'{}', 400, 'The request has no yadn.'),
+    ('POST', '/roll', b'{"yadn": 3}', 400, 'The yadn must be of type str'),
+    (
+        'POST', '/roll', b'{"yadn": "3", "seed": true}',
+        400, 'The seed must be of type int'
+    ),
+    ('POST', '/roll', b'{"yadn": "3d"}', 400, 'IndexError'),
+    ('POST', '/maps', b'{"maps": "{}"}', 400, 'The request has no session.'),
+])
+def test_respond_error(method, path, body, status, error):
+    """Requests that can't be completed respond with an error."""
+    server = ys.RollServer()
+    result = server.respond(method, path, body)
+    assert result[0] == status
+    assert result[1]['error'].startswith(error)
+
+
+def test_respond_server_error(mocker, capsys):
+    """Errors in the server respond with a 500 status."""
+    server = ys.RollServer()
+    mocker.patch.object(server, 'roll', side_effect=RuntimeError('spam'))
+    result = server.respond('POST', '/roll', b'{"yadn": "3"}')
+    assert result == (500, {'error': 'RuntimeError: spam'})
+    assert 'Traceback' in capsys.readouterr().err
+
+
+# Loopback test cases.
+def test_loopback_unix(tmp_path):
+    """Requests can be sent over a Unix domain socket."""
+    async def client(reader, writer):
+        maps_ = {'session': 'a', 'maps': '{"coin"=1:"tails",2:"tails"}'}
+        return [
+            await request(reader, writer, 'POST', '/maps', maps_),
+            await request(reader, writer, 'POST', '/roll', {
+                'yadn': '1d2m"coin"',
+                'session': 'a',
+            }),
+            await request(reader, writer, 'DELETE', '/maps', {
+                'session': 'a',
+            }),
+        ]
+
+    assert loopback(client, tmp_path / 'yadr.sock') == [
+        (200, {'session': 'a', 'maps': ['coin']}),
+        (200, {'result': 'tails', 'yadn': '"tails"'}),
+        (200, {'session': 'a', 'maps': []}),
+    ]
+
+
+def test_loopback_tcp():
+    """Requests can be sent over HTTP to localhost, and many requests
+    can be sent over one connection.
+    """
+    server = ys.RollServer(timeout=None)
+
+    async def client(reader, writer):
+        responses = []
+        for _ in range(3):
+            data = {'yadn': '3d6', 'seed': 5}
+            responses.append(
+                await request(reader, writer, 'POST', '/roll', data)
+            )
+        maps_ = await request(reader, writer, 'GET', '/maps', close=True)
+        closed = await reader.read()
+        return responses, maps_, closed
+
+    responses, maps_, closed = loopback(client, server=server)
+    assert responses == [(200, {'result': 7, 'yadn': '7'})] * 3
+    assert maps_[0] == 200
+    assert 'fate' in maps_[1]['maps']
+    assert closed == b''
+    assert len(server._compiled[None]) == 1
+
+
+def test_loopback_error():
+    """Errors are sent as JSON, and the server keeps running."""
+    async def client(reader, writer):
+        return [
+            await request(reader, writer, 'POST', '/roll', {'yadn': '3d'}),
+            await request(reader, writer, 'POST', '/roll', {'yadn': '3'}),
+        ]
+
+    assert loopback(client) == [
+        (400, {'error': 'IndexError: list index out of range'}),
+        (200, {'result': 3, 'yadn': '3'}),
+    ]
+
+
+@pytest.mark.parametrize('length,status,error', [
+    (
+        ys.MAX_BODY + 1, 413,
+        f'The request body must be at most {ys.MAX_BODY} bytes.'
+    ),
+    (-1, 400, 'The content length must not be negative, not -1.'),
+    ('spam', 400, 'The content length is not a number.'),
+])
+def test_loopback_bad_length(length, status, error):
+    """Request bodies with bad lengths aren't read."""
+    async def client(reader, writer):
+        writer.write(
+            f'POST /roll HTTP/1.1\r\nContent-Length: {length}\r\n\r\n'
+            .encode('latin-1')
+        )
+        await writer.drain()
+        return await read_response(reader)
+
+    assert loopback(client) == (status, {'error': error})
+
+
+@pytest.mark.parametrize('head,status,error', [
+    (
+        'POST /roll HTTP/1.1\r\n' + 'X-Spam: eggs\r\n' * (ys.MAX_HEADERS + 1),
+        431, f'The request must have at most {ys.MAX_HEADERS} headers.'
+    ),
+    ('SPAM\r\n', 400, 'The request line is malformed.'),
+    (
+        'POST /roll HTTP/1.1\r\nHost: example.com\r\n',
+        403, 'Requests to example.com are not allowed.'
+    ),
+    (
+        'POST /roll HTTP/1.1\r\nOrigin: http://example.com\r\n',
+        403, 'Requests from http://example.com are not allowed.'
+    ),
+    (
+        'POST /roll HTTP/1.1\r\nHost: localhost.example.com:8765\r\n',
+        403, 'Requests to localhost.example.com:8765 are not allowed.'
+    ),
+])
+def test_loopback_bad_headers(head, status, error):
+    """Requests with bad headers aren't completed."""
+    async def client(reader, writer):
+        writer.write(f'{head}\r\n'.encode('latin-1'))
+        await writer.drain()
+        return await read_response(reader)
+
+    assert loopback(client) == (status, {'error': error})
+
+
+def test_loopback_local_headers():
+    """Requests sent from and to the local machine are completed."""
+    async def client(reader, writer):
+        body = b'{"yadn": "3"}'
+        writer.write(
+            b'POST /roll HTTP/1.1\r\n'
+            b'Host: localhost:8765\r\n'
+            b'Origin: http://127.0.0.1:8765\r\n'
+            b'Content-Length: ' + str(len(body)).encode() + b'\r\n\r\n'
+            + body
+        )
+        await writer.drain()
+        return await read_response(reader)
+
+    assert loopback(client) == (200, {'result': 3, 'yadn': '3'})
+
+
+def test_loopback_slow_request(mocker):
+    """A slow request doesn't stop other clients being answered."""
+    server = ys.RollServer()
+    done = threading.Event()
+    roll = server.roll
+
+    def slow_roll(yadn, session=None, seed=None):
+        if yadn == 'slow':
+            done.wait(5)
+            yadn = '3'
+        return roll(yadn, session, seed)
+
+    mocker.patch.object(server, 'roll', side_effect=slow_roll)
+
+    async def run():
+        srv = await server.start(None, 0)
+        async with srv:
+            port = srv.sockets[0].getsockname()[1]
+            slow = await asyncio.open_connection('127.0.0.1', port)
+            fast = await asyncio.open_connection('127.0.0.1', port)
+            slow_request = asyncio.create_task(
+                request(*slow, 'POST', '/roll', {'yadn': 'slow'})
+            )
+            fast_response = await asyncio.wait_for(
+                request(*fast, 'POST', '/roll', {'yadn': '2'}), 2
+            )
+            finished_first = not slow_request.done()
+            done.set()
+            slow_response = await slow_request
+            for _, writer in (slow, fast):
+                writer.close()
+                await writer.wait_closed()
+            return fast_response, finished_first, slow_response
+
+    assert asyncio.run(run()) == (
+        (200, {'result': 2, 'yadn': '2'}),
+        True,
+        (200, {'result': 3, 'yadn': '3'}),
+    )
+
+
+def test_serve_removes_socket(tmp_path):
+    """The socket is removed when the server stops."""
+    path = tmp_path / 'yadr.sock'
+
+    async def run():
+        task = asyncio.create_task(ys.serve(str(path)))
+        while not path.exists():
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert not path.exists()
+
+
+# Command line test cases.
+def test_parse_cli_serve(mocker):
+    """`yadr serve` passes its options to the server."""
+    main = mocker.patch('yadr.server.main')
+    mocker.patch('sys.argv', ['yadr', 'serve', '--port', '0'])
+    __main__.parse_cli()
+    main.assert_called_once_with(['--port', '0'])
+
+
+def test_main(mocker):
+    """The server's options are passed to the server."""
+    serve = mocker.patch('yadr.server.serve', new=mocker.Mock())
+    mocker.patch('asyncio.run')
+    ys.main(['--socket', 'yadr.sock', '--cache_size', '8', '-s', '4'])
+    serve.assert_called_once_with(
+        'yadr.sock', ys.DEFAULT_PORT, 8, 4, ys.TIMEOUT, None
+    )
+
+
+def test_main_no_timeout(mocker):
+    """A timeout of 0 rolls without a limit."""
+    serve = mocker.patch('yadr.server.serve', new=mocker.Mock())
+    mocker.patch('asyncio.run')
+    ys.main(['-t', '0', '-w', '2'])
+    serve.assert_called_once_with(
+        None, ys.DEFAULT_PORT, ys.CACHE_SIZE, ys.MAX_SESSIONS, None, 2
+    )
@@ -0,0 +1,126 @@
+"""
+test_stats
+~~~~~~~~~~
+
+Unit tests for the yadr.stats module.
+"""
+import sys
+
+import pytest
+
+from yadr import stats, yadr
+
+
+# Summary test cases.
+def test_summary():
+    """The statistics are found from the count of each result."""
+    summary = stats.Summary({4: 1, 1: 2, 2: 1})
+    assert summary.counts == ((1, 2), (2, 1), (4, 1))
+    assert summary.rolls == 4
+    assert summary.mean == 2.0
+    assert summary.std == pytest.approx(1.2247, abs=1e-4)
+    assert summary.min == 1
+    assert summary.max == 4
+
+
+def test_summary_booleans():
+    """Booleans are summarized as ones and zeros."""
+    summary = stats.Summary({True: 3, False: 1})
+    assert summary.mean == 0.75
+    assert summary.min is False
+
+
+def test_summary_invalid():
+    """Only numeric results can be summarized, and there must be at
+    least one.
+    """
+    with pytest.raises(ValueError):
+        stats.Summary({'eggs': 2})
+    with pytest.raises(ValueError):
+        stats.Summary({(1, 2): 2})
+    with pytest.raises(ValueError):
+        stats.Summary({})
+
+
+@pytest.mark.parametrize('percent,exp', [
+    (0, 1),
+    (10, 1),
+    (50, 2),
+    (51, 3),
+    (90, 3),
+    (91, 10),
+    (100, 10),
+])
+def test_summary_percentile(percent, exp):
+    """Percentiles are the nearest rank of the results."""
+    summary = stats.Summary({1: 4, 2: 1, 3: 4, 10: 1})
+    assert summary.percentile(percent) == exp
+
+
+def test_summary_percentile_invalid():
+    """Percentiles must be from 0 to 100."""
+    with pytest.raises(ValueError):
+        stats.Summary({1: 1}).percentile(101)
+
+
+def test_summary_report():
+    """The report has the statistics and a histogram."""
+    lines = stats.Summary({1: 1, 2: 3}).report().split('\n')
+    assert lines[:3] == ['rolls  4', 'mean   1.7500', 'std    0.4330']
+    assert lines[-2:] == [
+        '     1      1   25.00%  ' + '#' * 13,
+        '     2      3   75.00%  ' + '#' * 40,
+    ]
+
+
+# roll_stats() test cases.
+def test_roll_stats():
+    """Each roll of a compound roll is summarized."""
+    pytest.importorskip('numpy')
+    summaries = yadr.roll_stats('3d6; 1d2 > 1', 1000, seed=1138)
+    assert len(summaries) == 2
+    assert summaries[0].rolls == 1000
+    assert 3 <= summaries[0].min <= summaries[0].max <= 18
+    assert {result for result, _ in summaries[1].counts} == {False, True}
+    again = yadr.roll_stats('3d6; 1d2 > 1', 1000, seed=1138)
+    assert [s.counts for s in again] == [s.counts for s in summaries]
+
+
+def test_roll_stats_without_numpy(mocker):
+    """Without numpy, the compiled roll is rolled once for each roll."""
+    mocker.patch.dict(sys.modules, {'numpy': None})
+    summary, = yadr.roll_stats('2d6 + 1', 500, seed=1138)
+    assert summary.rolls == 500
+    assert 3 <= summary.min <= summary.max <= 13
+    again, = yadr.roll_stats('2d6 + 1', 500, seed=1138)
+    assert again.counts == summary.counts
+
+
+def test_roll_stats_large_values():
+    """Results too large for numpy's integers are summarized without
+    wrapping around.
+    """
+    pytest.importorskip('numpy')
+    summary, = yadr.roll_stats('1d6 ^ 30', 500, seed=1138)
+    assert summary.rolls == 500
+    assert {result for result, _ in summary.counts} <= {
+        n ** 30 for n in range(1, 7)
+    }
+    assert summary.max == 6 ** 30
+    assert 1 <= summary.mean <= 6 ** 30
+
+
+@pytest.mark.parametrize('yadn', ['3g6', '1d3m"fate"', '1d6 ^ -1'])
+def test_roll_stats_not_numeric(yadn, mocker):
+    """Rolls that don't have numbers as results raise ValueError."""
+    with pytest.raises(ValueError):
+        yadr.roll_stats(yadn, 10)
+    mocker.patch.dict(sys.modules, {'numpy': None})
+    with pytest.raises(ValueError):
+        yadr.roll_stats(yadn, 10)
+
+
+def test_roll_stats_invalid_num():
+    """The roll must be rolled at least once."""
+    with pytest.raises(ValueError):
+        yadr.roll_stats('3d6', 0)
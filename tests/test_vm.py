@@ -0,0 +1,151 @@
+"""
+test_vm
+~~~~~~~
+
+Unit tests for the yadr.vm module.
+"""
+import pytest
+
+from yadr import vm
+from yadr.model import Token
+from yadr.parser import Tree, Unary
+from yadr.yadr import compile
+
+
+# Utility functions.
+def vm_test(yadn, dice, mocker):
+    """Lowered trees have the same results as the trees."""
+    for tree in compile(yadn).trees:
+        mocker.patch('random.randint', side_effect=dice)
+        exp = tree.compute()
+        mocker.patch('random.randint', side_effect=dice)
+        assert vm.run(vm.lower(tree)) == exp
+
+
+# Folding test cases.
+def test_fold_number_of_dice():
+    """Constant numbers of dice are folded."""
+    tree = vm.fold(compile('(2 * 3 + 1)d6').trees[0])
+    assert tree.value == 'd'
+    assert (tree.left.kind, tree.left.value) == (Token.NUMBER, 7)
+    assert (tree.right.kind, tree.right.value) == (Token.NUMBER, 6)
+
+
+def test_fold_literal_pool():
+    """Pool operators on literal pools are folded."""
+    tree = vm.fold(compile('[4, 10, 3, 5] ph 2').trees[0])
+    assert (tree.kind, tree.value) == (Token.POOL, (10, 5))
+
+
+def test_fold_choice():
+    """Choices with constant conditions are folded."""
+    tree = vm.fold(compile('T ? "spam" : "eggs"').trees[0])
+    assert (tree.kind, tree.value) == (Token.QUALIFIER, 'spam')
+
+
+def test_fold_comparison():
+    """Constant sides of comparisons are folded."""
+    tree = vm.fold(compile('1d20 >= 2 * 7 + 1').trees[0])
+    assert tree.left.value == 'd'
+    assert (tree.right.kind, tree.right.value) == (Token.NUMBER, 15)
+
+
+def test_fold_dice_map():
+    """Dice maps of constant values are folded."""
+    tree = vm.fold(compile('3 m "fate"').trees[0])
+    assert (tree.kind, tree.value) == (Token.QUALIFIER, '+')
+
+
+def test_fold_keeps_random():
+    """Branches with random operators aren't folded."""
+    tree = compile('S 3g6 + 1d4').trees[0]
+    assert vm.fold(tree) is tree
+
+
+def test_fold_keeps_errors():
+    """Branches that raise errors aren't folded."""
+    tree = compile('1 / 0').trees[0]
+    assert vm.fold(tree) is tree
+    with pytest.raises(ZeroDivisionError):
+        vm.run(vm.lower(tree))
+
+
+def test_fold_does_not_change_tree():
+    """Folding returns a new tree."""
+    tree = compile('(2 * 3 + 1)d6').trees[0]
+    vm.fold(tree)
+    assert tree.left.value == '+'
+
+
+def test_fold_deeply_nested():
+    """Deeply nested trees don't exceed the recursion limit."""
+    tree = compile(' + '.join(['1'] * 10_000)).trees[0]
+    assert vm.fold(tree).value == 10_000
+
+
+# Lowering test cases.
+def test_lower():
+    """Trees are lowered to instructions in postfix order."""
+    tree = compile('2 * 3 + 4').trees[0]
+    code = vm.lower(tree)
+    assert [opcode for opcode, _ in code] == [
+        vm.PUSH, vm.PUSH, vm.BINARY, vm.PUSH, vm.BINARY
+    ]
+    assert [arg for _, arg in code if not callable(arg)] == [2, 3, 4]
+
+
+def test_lower_missing_operand():
+    """Operators without operands can't be lowered."""
+    tree = Tree(Token.AS_OPERATOR, '+', Tree(Token.NUMBER, 1))
+    with pytest.raises(ValueError):
+        vm.lower(tree)
+
+
+def test_lower_unknown_operator():
+    """Unknown operators can't be lowered."""
+    tree = Tree(
+        Token.AS_OPERATOR,
+        '~',
+        Tree(Token.NUMBER, 1),
+        Tree(Token.NUMBER, 2)
+    )
+    with pytest.raises(ValueError):
+        vm.lower(tree)
+
+
+# Running test cases.
+def test_run_arithmetic(mocker):
+    """Run arithmetic."""
+    vm_test('1 + 2 * 3 - 4 ^ 2 / 2', (), mocker)
+
+
+def test_run_dice(mocker):
+    """Run dice operators."""
+    vm_test('3d6 + 2d!6 - 1d4', (4, 4, 3, 6, 2, 5, 3), mocker)
+
+
+def test_run_choice(mocker):
+    """Run choices."""
+    vm_test('T ? "spam" : "eggs"', (), mocker)
+
+
+def test_run_pools(mocker):
+    """Run pool and unary operators."""
+    vm_test('C [4, 10, 3]; S 4g6; [1, 4, 5] pa 4', (1, 5, 3, 2), mocker)
+
+
+def test_run_dice_map(mocker):
+    """Run dice maps."""
+    vm_test('3g3m"fate"', (1, 2, 3), mocker)
+
+
+def test_run_unary(mocker):
+    """Run unary trees."""
+    tree = Unary(Token.U_POOL_DEGEN_OPERATOR, 'S', Tree(Token.POOL, (1, 2)))
+    assert vm.run(vm.lower(tree)) == 3
+
+
+def test_run_deeply_nested():
+    """Deeply nested trees don't exceed the recursion limit."""
+    tree = compile(' + '.join(['1'] * 10_000)).trees[0]
+    assert vm.run(vm.lower(tree)) == 10_000
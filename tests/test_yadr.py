@@ -4,7 +4,14 @@ test_yadr
 
 Unit tests for the yadr.yadr module.
 """
-from yadr import __main__, yadr
+import copy
+import io
+
+import pytest
+
+from yadr import __main__, maps
+from yadr import operator as yo
+from yadr import parallel, yadr
 
 
 # Test yadr.roll().
@@ -32,11 +39,380 @@ def test_roll_with_yadn_output(mocker):
     roll_test(exp, yadn, dice, mocker)
 
 
+def test_roll_large_pool():
+    """Large pools are returned as the value of each die."""
+    result = yadr.roll('2000g6')
+    assert isinstance(result, tuple)
+    assert len(result) == 2000
+    assert set(result) <= {1, 2, 3, 4, 5, 6}
+
+
 def roll_test(exp, params, dice, mocker):
     mocker.patch('random.randint', side_effect=dice)
     assert yadr.roll(*params) == exp
 
 
+def test_roll_seeded():
+    """Rolls with the same seed have the same results."""
+    yadn = '3d6; 5g6; 2d!6; 2000g6; 1d3m"fate"'
+    assert yadr.roll(yadn, seed=1138) == yadr.roll(yadn, seed=1138)
+    assert yadr.roll(yadn, seed=1138) != yadr.roll(yadn, seed=1139)
+
+
+@pytest.mark.parametrize('executor', ['thread', 'process'])
+def test_roll_parallel(executor):
+    """Compound rolls rolled in parallel keep their order, and the
+    same seed gives the same results for any number of workers.
+    """
+    yadn = '; '.join(f'{n} + 1d2 * 0' for n in range(100))
+    assert yadr.roll(yadn, workers=3, executor=executor) == tuple(
+        range(100)
+    )
+    yadn = '; '.join(['3d6', '5g6', '2d!6'] * 20)
+    exp = yadr.roll(yadn, seed=1138)
+    assert yadr.roll(yadn, workers=3, executor=executor, seed=1138) == exp
+
+
+def test_roll_parallel_with_dice_maps():
+    """Dice maps are defined before the rolls that use them."""
+    yadn = '{"spam"=1:"eggs",2:"bacon"}; 1d2m"spam"; 1d3m"fate"; 3'
+    result = yadr.roll(yadn, workers=2, executor='process', seed=1138)
+    assert result[0] in ('eggs', 'bacon')
+    assert result[1] in ('-', '', '+')
+    assert result[2] == 3
+
+
+def test_roll_parallel_pickled():
+    """Trees are pickled for worker processes, and the process that
+    started them doesn't keep them.
+    """
+    yadn = '{"spam"=1:"eggs",2:"bacon"}; 4g2m"spam"; 1d3m"fate"; 3d6'
+    exp = yadr.roll(yadn, seed=1138)
+    assert yadr.roll(yadn, workers=2, executor='process', seed=1138) == exp
+    assert parallel._rolls == ()
+
+
+def test_roll_parallel_threads():
+    """Threads rolling in worker processes at the same time each get
+    the results of their own rolls.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    yadns = [
+        '; '.join(f'{n} + {offset} + 1d2 * 0' for n in range(20))
+        for offset in (0, 100)
+    ]
+    with ThreadPoolExecutor(2) as pool:
+        results = list(pool.map(
+            lambda yadn: yadr.roll(yadn, workers=2, executor='process'),
+            yadns * 2
+        ))
+    assert results == [
+        tuple(range(20)),
+        tuple(range(100, 120)),
+    ] * 2
+
+
+@pytest.mark.parametrize('executor', ['thread', 'process'])
+def test_roll_parallel_explode_limit(executor):
+    """Workers use the explosion limit of the thread that started
+    them.
+    """
+    token = yo.explode_limit.set(2)
+    try:
+        assert yadr.roll(
+            '1d!1; 2d!1; 3d!1; 4d!1',
+            workers=2,
+            executor=executor
+        ) == (3, 6, 9, 12)
+        assert list(parallel.roll_lines(
+            ['1d!1'] * 40,
+            workers=2,
+            executor=executor
+        )) == ['3'] * 40
+    finally:
+        yo.explode_limit.reset(token)
+
+
+def test_roll_parallel_invalid():
+    """Invalid executors and numbers of workers raise ValueError."""
+    with pytest.raises(ValueError):
+        yadr.roll('3d6; 3d6', workers=2, executor='spam')
+    with pytest.raises(ValueError):
+        yadr.roll('3d6; 3d6', workers=0)
+
+
+# Test yadr.parallel.roll_lines().
+@pytest.mark.parametrize('executor', ['thread', 'process'])
+def test_roll_lines(executor):
+    """Lines rolled in parallel keep their order, and the same seed
+    gives the same results for any number of workers.
+    """
+    lines = ['3d6', '5g6', '2d!6', '1d3m"fate"'] * 30
+    exp = list(parallel.roll_lines(lines, seed=1138))
+    result = parallel.roll_lines(lines, None, 3, executor, 1138)
+    assert list(result) == exp
+    assert len(exp) == 120
+    assert all(isinstance(item, str) for item in exp)
+
+
+def test_roll_lines_blank_and_invalid():
+    """Blank lines roll as empty strings, and lines that can't be
+    rolled return their errors rather than stopping the other lines.
+    """
+    lines = ['3', '', '1 / 0', '2 + 2']
+    result = list(parallel.roll_lines(lines, workers=2))
+    assert result[0:2] == ['3', '']
+    assert isinstance(result[2], ZeroDivisionError)
+    assert result[3] == '4'
+
+
+def test_roll_lines_with_dice_maps():
+    """Dice maps given or defined on a line are only used by that line,
+    so lines don't depend on which worker rolled the lines before them.
+    """
+    dice_map = {'spam': {1: 'eggs', 2: 'eggs'}}
+    lines = ['1d2m"spam"', '{"x"=1:"a",2:"a"};1d2m"x"', '1d2m"x"']
+    result = list(parallel.roll_lines(lines, dice_map, 2))
+    assert result[0] == '"eggs"'
+    assert result[1] == '"a"'
+    assert isinstance(result[2], KeyError)
+
+
+def test_roll_lines_invalid():
+    """Invalid executors and numbers of workers raise ValueError."""
+    with pytest.raises(ValueError):
+        list(parallel.roll_lines(['3d6'], workers=2, executor='spam'))
+    with pytest.raises(ValueError):
+        list(parallel.roll_lines(['3d6'], workers=0))
+
+
+# Test yadr.compile().
+def test_compile(mocker):
+    """Compile a YADN string and roll it."""
+    mocker.patch('random.randint', side_effect=(4, 4, 3))
+    compiled = yadr.compile('3d6')
+    assert compiled.roll() == 11
+
+
+def test_compile_roll_many(mocker):
+    """A compiled YADN string can be rolled many times."""
+    mocker.patch('random.randint', side_effect=(4, 4, 3, 1, 2, 3))
+    compiled = yadr.compile('3d6')
+    assert compiled.roll_many(2) == (11, 6)
+
+
+def test_compile_with_yadn_output(mocker):
+    """A compiled YADN string can return a YADN string."""
+    mocker.patch('random.randint', side_effect=(3, 1))
+    compiled = yadr.compile('2g4; 5')
+    assert compiled.roll(True) == '[3, 1]; 5'
+
+
+def test_compile_with_defined_map(mocker):
+    """Dice maps defined in a compiled YADN string are kept for each
+    roll of the compiled YADN.
+    """
+    mocker.patch('random.randint', side_effect=(1, 2))
+    compiled = yadr.compile('{"spam"=1:"eggs",2:"bacon"};1d2m"spam"')
+    assert compiled.roll_many(2) == ('eggs', 'bacon')
+
+
+def test_compile_with_redefined_map():
+    """A dice map redefined in a compiled YADN string only changes
+    the rolls after it.
+    """
+    yadn = '{"spam"=1:"eggs"};1d1m"spam";{"spam"=1:"bacon"};1d1m"spam"'
+    compiled = yadr.compile(yadn)
+    assert compiled.roll() == ('eggs', 'bacon')
+    assert compiled.roll_many(2) == (('eggs', 'bacon'), ('eggs', 'bacon'))
+
+
+def test_compile_with_later_map():
+    """A dice map defined after a roll in a compiled YADN string isn't
+    used by that roll.
+    """
+    compiled = yadr.compile('1d1m"spam";{"spam"=1:"eggs"}')
+    with pytest.raises(KeyError):
+        compiled.roll()
+
+
+def test_compile_is_immutable():
+    """Compiled YADN cannot be changed."""
+    compiled = yadr.compile('3d6')
+    with pytest.raises(AttributeError):
+        compiled.yadn = '2d6'
+
+
+# Test yadr.Roller.
+def test_roller_seeded():
+    """Rollers with the same seed roll the same results."""
+    a = yadr.Roller(seed=1138)
+    b = yadr.Roller(seed=1138)
+    yadn = '3d6; 5g6; 2d!6; 2000g6'
+    assert a.roll_many(yadn, 5) == b.roll_many(yadn, 5)
+
+
+def test_roller_with_compiled_roll():
+    """Rollers can roll compiled rolls."""
+    compiled = yadr.compile('3d6')
+    a = yadr.Roller(seed=1138)
+    b = yadr.Roller(seed=1138)
+    assert a.roll(compiled) == b.roll(compiled)
+
+
+def test_roller_does_not_change_default_rng(mocker):
+    """Rolling with a roller doesn't use or change the default RNG."""
+    randint = mocker.patch('random.randint', side_effect=(4, 4, 3))
+    roller = yadr.Roller(seed=1138)
+    roller.roll('3d6')
+    assert randint.call_count == 0
+    assert yadr.roll('3d6') == 11
+
+
+def test_roller_is_per_thread():
+    """A roller only changes the RNG in its own thread."""
+    from threading import Thread
+
+    seen = []
+    roller = yadr.Roller()
+    with roller.active():
+        thread = Thread(target=lambda: seen.append(yo.rng_backend.get()))
+        thread.start()
+        thread.join()
+        assert yo.rng_backend.get() is roller.backend
+    assert seen == [None]
+    assert yo.rng_backend.get() is None
+
+
+def test_roller_backends():
+    """Rollers can use each backend by name."""
+    for name in ('random', 'secrets', 'urandom'):
+        assert 3 <= yadr.Roller(name).roll('3d6') <= 18
+
+
+def test_roller_invalid():
+    """Rollers reject unknown backends and invalid parameters."""
+    with pytest.raises(ValueError):
+        yadr.Roller('spam')
+    with pytest.raises(ValueError):
+        yadr.Roller('secrets', seed=1138)
+
+
+# Test default dice maps.
+def test_default_maps_are_cached():
+    """The default dice maps are only parsed once."""
+    assert yadr.load_default_maps() is yadr.load_default_maps()
+
+
+def test_default_maps_are_read_only():
+    """The cached default dice maps cannot be changed."""
+    default_maps = yadr.load_default_maps()
+    with pytest.raises(TypeError):
+        default_maps['spam'] = {1: 'eggs'}
+    fate = default_maps['fate']
+    changes = (
+        lambda: fate.__setitem__(1, 'x'),
+        lambda: fate.__delitem__(1),
+        lambda: fate.update({1: 'x'}),
+        lambda: fate.pop(1),
+        fate.clear,
+    )
+    for change in changes:
+        with pytest.raises(TypeError):
+            change()
+    with pytest.raises(TypeError):
+        maps.overlay_maps()['fate'][1] = 'x'
+    assert fate == {1: '-', 2: '', 3: '+'}
+    assert yadr.roll('1d3m"fate"') in ('-', '', '+')
+
+
+def test_default_maps_copies_can_change():
+    """Copies of the default dice maps can be changed."""
+    fate = copy.copy(yadr.load_default_maps()['fate'])
+    fate[1] = 'x'
+    assert fate[1] == 'x'
+    assert fate.table[1] == 'x'
+    assert yadr.load_default_maps()['fate'][1] == '-'
+
+
+def test_default_maps_reload_when_file_changes(mocker, tmp_path):
+    """The default dice maps are parsed again if the modification time
+    of the file changes.
+    """
+    path = tmp_path / 'dice_maps.yadn'
+    path.write_text('{"spam"=1:"eggs"}')
+    mocker.patch.object(maps, '_default_maps', (path, 0, {}))
+    assert yadr.load_default_maps() == {'spam': {1: 'eggs'}}
+
+
+def test_default_maps_load_when_used(mocker):
+    """The default dice maps are only loaded when a roll looks up a
+    dice map that isn't in the given dice maps.
+    """
+    mocker.patch.object(maps, '_default_maps', None)
+    yadr.roll('3d6')
+    yadr.roll('{"spam"=1:"eggs"}; 1d1m"spam"')
+    yadr.roll('1d1m"spam"', dice_map={'spam': {1: 'eggs'}})
+    assert maps._default_maps is None
+    yadr.roll('1d3m"fate"')
+    assert maps._default_maps is not None
+
+
+def test_overlay_maps():
+    """Dice maps added to an overlay don't change the given or the
+    default dice maps.
+    """
+    dice_map = {'spam': {1: 'eggs'}}
+    maps_ = yadr.overlay_maps(dice_map)
+    maps_['bacon'] = {1: 'ham'}
+    assert maps_['spam'] == {1: 'eggs'}
+    assert 'sweote boost' in maps_
+    assert 'bacon' not in dice_map
+    assert 'bacon' not in yadr.load_default_maps()
+
+
+# Test the package.
+def test_package_modules():
+    """The modules of the package can be used as attributes of the
+    package without importing them first.
+    """
+    import subprocess
+    import sys
+
+    import yadr as package
+
+    code = (
+        'import yadr; '
+        'print(yadr.yadr.roll("3"), yadr.operator.__name__, '
+        'yadr.model.__name__, yadr.encode.__name__)'
+    )
+    process = subprocess.run(
+        [sys.executable, '-c', code],
+        capture_output=True,
+        check=True,
+        text=True
+    )
+    assert process.stdout == '3 yadr.operator yadr.model yadr.encode\n'
+    assert package.operator is yo
+    with pytest.raises(AttributeError):
+        package.spam
+
+
+# Test yadr.tally().
+def test_tally(mocker):
+    """The symbols in the mapped results are counted."""
+    mocker.patch('random.randint', side_effect=(8, 7, 1, 8, 3))
+    yadn = '3g8m"sweote ability"; 2g8m"sweote difficulty"'
+    assert yadr.tally(yadn) == (('+', 3), ('-', 1), ('°', 3), ('•', 1))
+
+
+def test_tally_not_mapped():
+    """Results that weren't mapped can't be tallied."""
+    with pytest.raises(ValueError):
+        yadr.tally('3d6')
+
+
 # Test parse_cli().
 def test_parse_cli(mocker, capsys):
     """Execute YADN from the command line."""
@@ -78,6 +454,103 @@ def test_parse_cli_with_listing_default_maps(mocker, capsys):
     assert result == expected
 
 
+def test_parse_cli_with_workers(capsys, mocker):
+    """The -w option rolls the rolls of a compound roll in parallel."""
+    yadn = '; '.join(['3d6'] * 20)
+    exp = yadr.roll(yadn, True, seed=1138)
+    cmd = ['python -m yadr', yadn, '-w', '2', '-e', 'process', '-s', '1138']
+    result = cli_test(cmd, (), mocker, capsys)
+    assert result == f'{exp}\n'
+
+
+def test_parse_cli_with_batch_file(capsys, mocker, tmp_path):
+    """The -b option rolls each line of a file."""
+    path = tmp_path / 'rolls.yadn'
+    path.write_text('3d6\n\n2g3m"fudge"\n')
+    cmd = [
+        'python -m yadr',
+        '-b', str(path),
+        '-m', 'tests/data/__test_dice_map.txt',
+    ]
+    dice = (4, 4, 3, 3, 2)
+    result = cli_test(cmd, dice, mocker, capsys)
+    assert result == '11\n\n["+", ""]\n'
+
+
+def test_parse_cli_with_batch_stdin(capsys, mocker):
+    """The -b option without a file rolls each line of stdin."""
+    lines = ['3d6', '5g6', '1d3m"fate"'] * 10
+    exp = ''.join(
+        f'{result}\n' for result in parallel.roll_lines(lines, seed=1138)
+    )
+    mocker.patch('sys.stdin', io.StringIO('\n'.join(lines) + '\n'))
+    cmd = ['python -m yadr', '-b', '-w', '2', '-s', '1138']
+    result = cli_test(cmd, (), mocker, capsys)
+    assert result == exp
+
+
+@pytest.mark.parametrize('options,executor', [
+    (['-b', '-w', '2'], 'process'),
+    (['-b', '-w', '2', '-e', 'thread'], 'thread'),
+])
+def test_parse_cli_with_batch_executor(options, executor, mocker):
+    """The lines of a batch are rolled in processes unless threads are
+    asked for.
+    """
+    roll_lines = mocker.patch('yadr.parallel.roll_lines', return_value=[])
+    mocker.patch('sys.stdin', io.StringIO('3d6\n'))
+    mocker.patch('sys.argv', ['python -m yadr', *options])
+    __main__.parse_cli()
+    assert roll_lines.call_args.args[3] == executor
+
+
+def test_parse_cli_compound_executor(mocker):
+    """The rolls of a compound roll are rolled in threads by default."""
+    roll = mocker.patch('yadr.yadr.roll', return_value=(3, 3))
+    mocker.patch('sys.argv', ['python -m yadr', '3; 3', '-w', '2'])
+    __main__.parse_cli()
+    assert roll.call_args.args[4] == 'thread'
+
+
+def test_parse_cli_with_batch_errors(capsys, mocker):
+    """Lines that can't be rolled in a batch are reported on stderr,
+    and the exit status is 1.
+    """
+    mocker.patch('sys.stdin', io.StringIO('3\n1 / 0\n4\n'))
+    mocker.patch('sys.argv', ['python -m yadr', '-b'])
+    with pytest.raises(SystemExit) as exc_info:
+        __main__.parse_cli()
+    captured = capsys.readouterr()
+    assert exc_info.value.code == 1
+    assert captured.out == '3\n\n4\n'
+    assert captured.err.startswith('yadr: line 2: ')
+
+
+def test_parse_cli_with_repeat(capsys, mocker):
+    """The -r option rolls the YADN the given number of times."""
+    exp = yadr.Roller(seed=1138).roll_many('3d6', 5, True)
+    cmd = ['python -m yadr', '3d6', '-r', '5', '-s', '1138']
+    result = cli_test(cmd, (), mocker, capsys)
+    assert result == ''.join(f'{item}\n' for item in exp)
+
+
+def test_parse_cli_with_stats(capsys, mocker):
+    """The -S option prints statistics for the repeated rolls."""
+    cmd = ['python -m yadr', '1d6; 2d4', '-r', '200', '-S', '-s', '1138']
+    result = cli_test(cmd, (), mocker, capsys)
+    exp = yadr.roll_stats('1d6; 2d4', 200, seed=1138)
+    assert result == '\n\n'.join(item.report() for item in exp) + '\n'
+    assert result.startswith('rolls  200\n')
+
+
+@pytest.mark.parametrize('options', [['-S'], ['-r', '0']])
+def test_parse_cli_with_invalid_repeat(options, capsys, mocker):
+    """Statistics need a number of repeats of at least one."""
+    mocker.patch('sys.argv', ['python -m yadr', '3d6', *options])
+    with pytest.raises(SystemExit):
+        __main__.parse_cli()
+
+
 def cli_test(cmd, dice, mocker, capsys):
     """Test the output of running `yadr` from the command line."""
     # Set up the test.